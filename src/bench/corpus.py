@@ -0,0 +1,78 @@
+"""Corpus sintético de regimentos em PDF para benchmarks."""
+import random
+from pathlib import Path
+from typing import List
+
+import fitz  # PyMuPDF
+
+
+_SUBJECTS = [
+    "uso da piscina", "horário de silêncio", "vagas de garagem", "animais de estimação",
+    "mudanças", "salão de festas", "obras nas unidades", "coleta de lixo",
+    "academia", "portaria", "assembleias", "taxa condominial",
+]
+_CLAUSES = [
+    "é vedado ao condômino", "compete ao síndico", "fica permitido aos moradores",
+    "a assembleia poderá deliberar sobre", "será aplicada multa em caso de",
+    "os visitantes deverão observar", "o conselho fiscal acompanhará",
+]
+_DETAILS = [
+    "no período das 22h às 8h", "mediante reserva prévia na administração",
+    "desde que acompanhados por responsável", "sob pena de advertência por escrito",
+    "equivalente a uma taxa condominial", "respeitada a convenção do condomínio",
+    "com comunicação à portaria", "nos termos da legislação vigente",
+]
+
+
+def _sentence(rng: random.Random) -> str:
+    return f"{rng.choice(_CLAUSES).capitalize()} {rng.choice(_SUBJECTS)} {rng.choice(_DETAILS)}."
+
+
+def _article(number: int, rng: random.Random) -> str:
+    lines = [f"Art. {number}º " + " ".join(_sentence(rng) for _ in range(rng.randint(1, 3)))]
+    for item in range(rng.randint(0, 4)):
+        lines.append(f"{'abcdefgh'[item]}) {_sentence(rng)}")
+    if rng.random() < 0.3:
+        lines.append(f"Parágrafo único. {_sentence(rng)}")
+    return "\n".join(lines)
+
+
+def generate_corpus(directory: Path, files: int = 10, pages: int = 10, seed: int = 42) -> List[Path]:
+    """Gera `files` PDFs de `pages` páginas com artigos, incisos e parágrafos."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    paths = []
+    for file_number in range(files):
+        doc = fitz.open()
+        article = 1
+        for _ in range(pages):
+            page = doc.new_page()
+            text = []
+            for _ in range(5):
+                text.append(_article(article, rng))
+                article += 1
+            page.insert_textbox(fitz.Rect(40, 40, 560, 800), "\n\n".join(text), fontsize=9)
+        path = directory / f"regimento_{file_number:03d}.pdf"
+        doc.save(str(path))
+        doc.close()
+        paths.append(path)
+    return paths
+
+
+def sample_questions(count: int, seed: int = 7) -> List[str]:
+    """Perguntas variadas sobre os assuntos do corpus sintético."""
+    rng = random.Random(seed)
+    templates = [
+        "Quais são as regras sobre {subject}?",
+        "O que diz o art. {number} sobre {subject}?",
+        "Existe multa relacionada a {subject}?",
+        "Quem é responsável por {subject} no condomínio?",
+        "Posso usar {subject} {detail}?",
+    ]
+    return [
+        rng.choice(templates).format(
+            subject=rng.choice(_SUBJECTS), detail=rng.choice(_DETAILS), number=rng.randint(1, 200)
+        )
+        for _ in range(count)
+    ]
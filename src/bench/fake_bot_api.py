@@ -0,0 +1,96 @@
+"""Servidor HTTP local que imita a Bot API do Telegram.
+
+Responde aos métodos usados pelo bot (`getMe`, `setWebhook`, `sendMessage`,
+`editMessageText`, `sendChatAction`...) e registra cada chamada, para
+exercitar o modo webhook sem rede. Use `base_url` como `TELEGRAM_API_URL`.
+"""
+import itertools
+import json
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl
+
+
+@dataclass
+class ApiCall:
+    method: str
+    params: Dict[str, Any]
+    at: float
+
+
+class FakeBotAPI:
+    """Bot API falsa em `127.0.0.1:<port>`, com latência opcional por chamada."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0):
+        self.latency = latency
+        self.calls: List[ApiCall] = []
+        self._lock = threading.Lock()
+        self._message_ids = itertools.count(1)
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/bot"
+
+    def start(self) -> "FakeBotAPI":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-bot-api", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def calls_to(self, method: str) -> List[ApiCall]:
+        with self._lock:
+            return [call for call in self.calls if call.method == method]
+
+    def handle(self, method: str, params: Dict[str, Any]) -> Any:
+        """Resultado da chamada `method`, no formato da Bot API."""
+        if self.latency > 0:
+            time.sleep(self.latency)
+        with self._lock:
+            self.calls.append(ApiCall(method, params, time.perf_counter()))
+
+        if method == "getMe":
+            return {"id": 1, "is_bot": True, "first_name": "Bot", "username": "fake_bot",
+                    "can_join_groups": True, "can_read_all_group_messages": False,
+                    "supports_inline_queries": False}
+        if method in ("sendMessage", "editMessageText"):
+            chat_id = int(params.get("chat_id", 0))
+            message_id = params.get("message_id") or next(self._message_ids)
+            return {"message_id": int(message_id), "date": int(time.time()),
+                    "chat": {"id": chat_id, "type": "private"}, "text": params.get("text", "")}
+        if method == "getWebhookInfo":
+            return {"url": "", "has_custom_certificate": False, "pending_update_count": 0}
+        return True
+
+    def _handler_class(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length", 0))
+                raw = self.rfile.read(length).decode("utf-8") if length else ""
+                if self.headers.get("Content-Type", "").startswith("application/json"):
+                    params = json.loads(raw or "{}")
+                else:
+                    params = dict(parse_qsl(raw))
+                method = self.path.rstrip("/").rsplit("/", 1)[-1]
+                body = json.dumps({"ok": True, "result": api.handle(method, params)}).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args) -> None:
+                pass
+
+        return Handler
@@ -0,0 +1,99 @@
+"""Modelo de linguagem local e determinístico para benchmarks."""
+import asyncio
+import hashlib
+import random
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.messages.ai import UsageMetadata
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+_WORDS = (
+    "conforme o regimento interno o condômino deve respeitar o horário de silêncio "
+    "e as normas de uso da piscina do salão de festas e da garagem sob pena de multa "
+    "aplicada pelo síndico após deliberação da assembleia"
+).split()
+
+
+class FakeChatModel(BaseChatModel):
+    """Substitui o `ChatGoogleGenerativeAI` sem acesso à rede.
+
+    A resposta é derivada do hash do prompt (mesma entrada, mesma saída) e
+    tem `response_tokens` palavras. A primeira palavra sai após `latency`
+    segundos e cada uma das seguintes após `token_delay` segundos, tanto em
+    `invoke`/`ainvoke` quanto em streaming. O uso de tokens é estimado por
+    palavras e informado em `usage_metadata`, como no Gemini.
+    """
+
+    latency: float = 0.5
+    token_delay: float = 0.01
+    response_tokens: int = 120
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _response_words(self, messages: List[BaseMessage]) -> List[str]:
+        prompt = "\n".join(str(message.content) for message in messages)
+        rng = random.Random(hashlib.sha1(prompt.encode("utf-8")).hexdigest())
+        return [rng.choice(_WORDS) for _ in range(self.response_tokens)]
+
+    def _usage(self, messages: List[BaseMessage], words: List[str]) -> UsageMetadata:
+        input_tokens = sum(len(str(message.content).split()) for message in messages)
+        return UsageMetadata(
+            input_tokens=input_tokens,
+            output_tokens=len(words),
+            total_tokens=input_tokens + len(words),
+        )
+
+    def _total_delay(self) -> float:
+        return self.latency + self.token_delay * max(0, self.response_tokens - 1)
+
+    def _result(self, messages: List[BaseMessage], words: List[str]) -> ChatResult:
+        message = AIMessage(content=" ".join(words), usage_metadata=self._usage(messages, words))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        words = self._response_words(messages)
+        time.sleep(self._total_delay())
+        return self._result(messages, words)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+                         **kwargs: Any) -> ChatResult:
+        words = self._response_words(messages)
+        await asyncio.sleep(self._total_delay())
+        return self._result(messages, words)
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None,
+                **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        words = self._response_words(messages)
+        for i, word in enumerate(words):
+            time.sleep(self.latency if i == 0 else self.token_delay)
+            chunk = self._chunk(messages, words, i, word)
+            if run_manager is not None:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+                       **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        words = self._response_words(messages)
+        for i, word in enumerate(words):
+            await asyncio.sleep(self.latency if i == 0 else self.token_delay)
+            chunk = self._chunk(messages, words, i, word)
+            if run_manager is not None:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    def _chunk(self, messages: List[BaseMessage], words: List[str], i: int, word: str) -> ChatGenerationChunk:
+        text = word if i == 0 else " " + word
+        # O uso de tokens vai no último trecho, como no streaming do Gemini
+        usage = self._usage(messages, words) if i == len(words) - 1 else None
+        return ChatGenerationChunk(message=AIMessageChunk(content=text, usage_metadata=usage))
@@ -0,0 +1,89 @@
+"""Objetos do Telegram simulados para exercitar os handlers sem rede."""
+import asyncio
+import itertools
+import time
+from typing import List, Optional
+
+
+class FakeTelegramAPI:
+    """Registra as chamadas feitas ao Telegram, com latência de rede opcional."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.sent_messages = 0
+        self.edits = 0
+        self.chat_actions = 0
+        self._message_ids = itertools.count(1)
+
+    async def call(self) -> None:
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+
+    def next_message_id(self) -> int:
+        return next(self._message_ids)
+
+
+class FakeChat:
+    def __init__(self, chat_id: int):
+        self.id = chat_id
+
+
+class FakeMessage:
+    """Mensagem com `reply_text` e `edit_text`, que guarda o horário da primeira resposta."""
+
+    def __init__(self, api: FakeTelegramAPI, chat: FakeChat, text: str = ""):
+        self.api = api
+        self.chat = chat
+        self.text = text
+        self.message_id = api.next_message_id()
+        self.replies: List["FakeMessage"] = []
+        self.first_reply_at: Optional[float] = None
+
+    async def reply_text(self, text: str, **kwargs) -> "FakeMessage":
+        await self.api.call()
+        if self.first_reply_at is None:
+            self.first_reply_at = time.perf_counter()
+        self.api.sent_messages += 1
+        reply = FakeMessage(self.api, self.chat, text)
+        self.replies.append(reply)
+        return reply
+
+    async def edit_text(self, text: str, **kwargs) -> "FakeMessage":
+        await self.api.call()
+        self.api.edits += 1
+        self.text = text
+        return self
+
+
+class FakeBot:
+    def __init__(self, api: FakeTelegramAPI):
+        self.api = api
+
+    async def send_chat_action(self, chat_id: int, action: str, **kwargs) -> bool:
+        await self.api.call()
+        self.api.chat_actions += 1
+        return True
+
+
+class FakeContext:
+    """Substitui o `ContextTypes.DEFAULT_TYPE` passado aos handlers."""
+
+    def __init__(self, bot: FakeBot, args: Optional[List[str]] = None, error: Optional[Exception] = None):
+        self.bot = bot
+        self.args = args or []
+        self.error = error
+
+
+class FakeUpdate:
+    _update_ids = itertools.count(1)
+
+    def __init__(self, message: FakeMessage):
+        self.update_id = next(self._update_ids)
+        self.message = message
+        self.effective_message = message
+        self.effective_chat = message.chat
+
+
+def make_text_update(api: FakeTelegramAPI, chat_id: int, text: str) -> FakeUpdate:
+    """Cria o update de uma mensagem de texto enviada por um chat."""
+    return FakeUpdate(FakeMessage(api, FakeChat(chat_id), text))
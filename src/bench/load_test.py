@@ -0,0 +1,172 @@
+"""Teste de carga dos handlers do `TelegramBot` sem Telegram e sem Gemini.
+
+Simula `--chats` chats simultâneos, cada um enviando `--messages` perguntas
+em sequência (a próxima após a resposta da anterior), contra um modelo
+local com latência configurável e um Telegram falso. Reporta vazão e
+percentis de latência total e até a primeira resposta, além do resumo das
+métricas por etapa.
+
+Com `--max-errors` ou `--max-p95-ms`, serve de teste de fumaça: termina com
+código 1 se os erros ou o p95 da resposta completa passarem dos limites.
+
+Uso:
+    PYTHONPATH=src python -m bench.load_test [--chats 50] [--messages 5]
+        [--llm-latency 0.5] [--token-delay 0.01] [--no-stream] [--fake-embeddings]
+        [--max-errors 0] [--max-p95-ms 2000]
+"""
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from config import SEARCH_K, STREAM_RESPONSES
+from bench.corpus import generate_corpus, sample_questions
+from bench.fake_llm import FakeChatModel
+from bench.fake_telegram import FakeBot, FakeContext, FakeTelegramAPI, make_text_update
+from bench.micro import bench_embeddings
+from bench.stats import print_header, print_row, summarize
+from bot.handlers import TelegramBot
+from bot.rate_limit import ChatRateLimiter, TokenBucket
+from bot.utils import ChatbotUtils
+from db.faiss_db import FAISSManager
+from metrics import format_summary
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chats", type=int, default=50, help="chats simultâneos")
+    parser.add_argument("--messages", type=int, default=5, help="perguntas por chat")
+    parser.add_argument("--think-time", type=float, default=0.0, help="pausa entre perguntas de um chat (s)")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="tempo até o primeiro token (s)")
+    parser.add_argument("--token-delay", type=float, default=0.01, help="intervalo entre tokens (s)")
+    parser.add_argument("--response-tokens", type=int, default=120)
+    parser.add_argument("--telegram-latency", type=float, default=0.05, help="latência de cada chamada à API (s)")
+    parser.add_argument("--stream", action=argparse.BooleanOptionalAction, default=STREAM_RESPONSES)
+    parser.add_argument("--rate-limits", action="store_true", help="aplica os limites de taxa por chat e do modelo")
+    parser.add_argument("--pdf-dir", type=Path, help="usa estes PDFs em vez de gerar um corpus")
+    parser.add_argument("--files", type=int, default=10)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--fake-embeddings", action="store_true", help="embeddings determinísticos, sem modelo")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--max-errors", type=int, help="falha se houver mais erros que isso")
+    parser.add_argument("--max-p95-ms", type=float, help="falha se o p95 da resposta completa passar disso")
+    return parser.parse_args(argv)
+
+
+def disable_rate_limits(bot: TelegramBot) -> None:
+    """Remove os limites de taxa, para medir a capacidade do bot e não a configuração."""
+    bot.pipeline.chat_limiter = ChatRateLimiter(per_minute=0)
+    bot.chatbot_utils.llm_limiter = TokenBucket(rate=0, capacity=1)
+
+
+class LoadTest:
+    """Dispara as conversas simuladas e coleta as latências."""
+
+    def __init__(self, bot: TelegramBot, api: FakeTelegramAPI, questions: List[str], think_time: float):
+        self.bot = bot
+        self.api = api
+        self.questions = questions
+        self.think_time = think_time
+        self.latencies: List[float] = []
+        self.first_reply: List[float] = []
+        self.errors = 0
+
+    async def chat_session(self, chat_id: int, messages: int) -> None:
+        context = FakeContext(FakeBot(self.api))
+        for i in range(messages):
+            question = self.questions[(chat_id * messages + i) % len(self.questions)]
+            update = make_text_update(self.api, chat_id, question)
+            start = time.perf_counter()
+            try:
+                await self.bot.message_handler(update, context)
+            except Exception as e:
+                self.errors += 1
+                context.error = e
+                await self.bot.error_handler(update, context)
+                continue
+            self.latencies.append(time.perf_counter() - start)
+            if update.message.first_reply_at is not None:
+                self.first_reply.append(update.message.first_reply_at - start)
+            if self.think_time:
+                await asyncio.sleep(self.think_time)
+
+    async def run(self, chats: int, messages: int) -> float:
+        start = time.perf_counter()
+        await asyncio.gather(*(self.chat_session(chat_id, messages) for chat_id in range(1, chats + 1)))
+        return time.perf_counter() - start
+
+
+def check_thresholds(args: argparse.Namespace, load_test: LoadTest) -> List[str]:
+    """Limites de `--max-errors` e `--max-p95-ms` que o teste ultrapassou."""
+    failures = []
+    total = args.chats * args.messages
+    answered = len(load_test.latencies)
+    if args.max_errors is not None and total - answered > args.max_errors:
+        failures.append(f"{total - answered} perguntas sem resposta (máximo {args.max_errors})")
+    p95 = summarize(load_test.latencies)["p95"]
+    if args.max_p95_ms is not None and p95 > args.max_p95_ms:
+        failures.append(f"p95 da resposta completa de {p95:.0f} ms (máximo {args.max_p95_ms:.0f} ms)")
+    return failures
+
+
+def run(args: argparse.Namespace, workdir: Path) -> List[str]:
+    """Executa o teste de carga e retorna os limites ultrapassados."""
+    pdf_dir = args.pdf_dir
+    if pdf_dir is None:
+        pdf_dir = workdir / "pdfs"
+        generate_corpus(pdf_dir, files=args.files, pages=args.pages, seed=args.seed)
+
+    manager = FAISSManager(
+        embeddings=bench_embeddings(args.fake_embeddings),
+        index_path=workdir / "faiss_index", pdf_dir=pdf_dir,
+    )
+    manager.create_or_load_index()
+
+    llm = FakeChatModel(
+        latency=args.llm_latency, token_delay=args.token_delay, response_tokens=args.response_tokens
+    )
+    bot = TelegramBot(manager, ChatbotUtils(llm=llm), token="0:bench", stream_responses=args.stream)
+    if not args.rate_limits:
+        disable_rate_limits(bot)
+    api = FakeTelegramAPI(latency=args.telegram_latency)
+    questions = sample_questions(max(1, args.chats * args.messages), seed=args.seed)
+    load_test = LoadTest(bot, api, questions, args.think_time)
+
+    try:
+        elapsed = asyncio.run(load_test.run(args.chats, args.messages))
+    finally:
+        bot.pipeline.close()
+        bot.chatbot_utils.conversation_manager.close()
+        manager.close()
+
+    total = args.chats * args.messages
+    print(
+        f"\n{args.chats} chats x {args.messages} perguntas em {elapsed:.2f}s "
+        f"({len(load_test.latencies) / elapsed:.1f} respostas/s, {load_test.errors} erros); "
+        f"streaming {'ligado' if args.stream else 'desligado'}, k={SEARCH_K}\n"
+    )
+    print_header()
+    print_row("resposta completa", load_test.latencies, elapsed)
+    print_row("primeira resposta", load_test.first_reply, elapsed)
+    print(
+        f"\nTelegram: {api.sent_messages} mensagens, {api.edits} edições, "
+        f"{api.chat_actions} ações para {total} perguntas\n"
+    )
+    print(format_summary())
+    return check_thresholds(args, load_test)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory(prefix="bench-") as workdir:
+        failures = run(args, Path(workdir))
+    for failure in failures:
+        print(f"❌ {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""Micro-benchmarks da ingestão e da busca em um corpus de PDFs gerado.
+
+Mede `PDFProcessor.process_pdfs`, a construção e a abertura do índice e a
+latência de `FAISSManager.similarity_search`.
+
+Uso:
+    PYTHONPATH=src python -m bench.micro [--files 10] [--pages 10] [--queries 200]
+        [--fake-embeddings] [--index-type flat] [--no-hybrid]
+
+Com `--fake-embeddings` os vetores são determinísticos e o modelo de
+embeddings não é carregado (mede só o custo do índice e da ingestão).
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+
+from config import INDEX_TYPE, INGEST_WORKERS, SEARCH_K, HYBRID_SEARCH
+from bench.corpus import generate_corpus, sample_questions
+from bench.stats import print_header, print_row
+from db.faiss_db import FAISSManager, get_embeddings
+from db.pdf_pages import page_count
+from db.pdf_processor import PDFProcessor
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf-dir", type=Path, help="usa estes PDFs em vez de gerar um corpus")
+    parser.add_argument("--files", type=int, default=10, help="PDFs no corpus gerado")
+    parser.add_argument("--pages", type=int, default=10, help="páginas por PDF gerado")
+    parser.add_argument("--repeat", type=int, default=3, help="repetições da ingestão e do build")
+    parser.add_argument("--queries", type=int, default=200, help="consultas medidas")
+    parser.add_argument("--k", type=int, default=SEARCH_K)
+    parser.add_argument("--workers", type=int, default=INGEST_WORKERS, help="processos da ingestão")
+    parser.add_argument("--index-type", default=INDEX_TYPE)
+    parser.add_argument("--hybrid", action=argparse.BooleanOptionalAction, default=HYBRID_SEARCH)
+    parser.add_argument("--fake-embeddings", action="store_true", help="embeddings determinísticos, sem modelo")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args(argv)
+
+
+def bench_embeddings(fake: bool) -> Embeddings:
+    """Modelo configurado ou embeddings falsos com a mesma dimensão do MiniLM."""
+    return DeterministicFakeEmbedding(size=384) if fake else get_embeddings()
+
+
+def run(args: argparse.Namespace, workdir: Path) -> None:
+    pdf_dir = args.pdf_dir
+    if pdf_dir is None:
+        pdf_dir = workdir / "pdfs"
+        generate_corpus(pdf_dir, files=args.files, pages=args.pages, seed=args.seed)
+    embeddings = bench_embeddings(args.fake_embeddings)
+    index_path = workdir / "faiss_index"
+
+    # Sem cache de páginas, para medir a extração dos PDFs em todas as repetições
+    processor = PDFProcessor(pdf_dir, workers=args.workers, cache_dir=None)
+
+    def new_manager() -> FAISSManager:
+        manager = FAISSManager(
+            embeddings=embeddings, index_type=args.index_type, hybrid_search=args.hybrid,
+            index_path=index_path, pdf_dir=pdf_dir,
+        )
+        manager.pdf_processor = processor
+        return manager
+
+    ingest_times = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        chunks = processor.process_pdfs()
+        ingest_times.append(time.perf_counter() - start)
+
+    build_times = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        new_manager().create_or_load_index(force_reload=True)
+        build_times.append(time.perf_counter() - start)
+
+    load_times = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        manager = new_manager()
+        manager.create_or_load_index()
+        load_times.append(time.perf_counter() - start)
+
+    # Aquecimento, para não medir a primeira consulta (conexões, caches)
+    manager.similarity_search("regras do condomínio", k=args.k)
+    search_times = []
+    start_all = time.perf_counter()
+    for query in sample_questions(args.queries, seed=args.seed):
+        start = time.perf_counter()
+        manager.similarity_search(query, k=args.k)
+        search_times.append(time.perf_counter() - start)
+    search_elapsed = time.perf_counter() - start_all
+
+    pdf_files = processor.get_pdf_files()
+    pages = sum(page_count(str(path)) for path in pdf_files)
+    print(
+        f"\nCorpus: {len(pdf_files)} PDFs, {pages} páginas, {len(chunks)} chunks; "
+        f"índice {args.index_type}, busca {'híbrida' if args.hybrid else 'vetorial'}, k={args.k}\n"
+    )
+    print_header()
+    print_row("process_pdfs", ingest_times)
+    print_row("build do índice", build_times)
+    print_row("abertura do índice", load_times)
+    print_row("similarity_search", search_times, search_elapsed)
+    print(
+        f"\nIngestão: {pages / min(ingest_times):.0f} páginas/s; "
+        f"build: {len(chunks) / min(build_times):.0f} chunks/s"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory(prefix="bench-") as workdir:
+        run(args, Path(workdir))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""Estatísticas e formatação dos resultados dos benchmarks."""
+from typing import Dict, Sequence
+
+import numpy as np
+
+
+def summarize(latencies: Sequence[float]) -> Dict[str, float]:
+    """Percentis, média e máximo das latências, em milissegundos."""
+    if not latencies:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "mean": 0.0, "max": 0.0}
+    values = np.asarray(latencies) * 1000
+    return {
+        "p50": float(np.percentile(values, 50)),
+        "p95": float(np.percentile(values, 95)),
+        "p99": float(np.percentile(values, 99)),
+        "mean": float(values.mean()),
+        "max": float(values.max()),
+    }
+
+
+def print_header() -> None:
+    print(f"{'medida':<28}{'n':>7}{'p50 ms':>11}{'p95 ms':>11}{'p99 ms':>11}{'máx ms':>11}{'por s':>10}")
+
+
+def print_row(name: str, latencies: Sequence[float], elapsed: float = 0.0) -> None:
+    """Imprime uma linha com percentis e vazão (`len(latencies) / elapsed`)."""
+    result = summarize(latencies)
+    throughput = len(latencies) / elapsed if elapsed > 0 else 0.0
+    print(
+        f"{name:<28}{len(latencies):>7}{result['p50']:>11.1f}{result['p95']:>11.1f}"
+        f"{result['p99']:>11.1f}{result['max']:>11.1f}{throughput:>10.1f}"
+    )
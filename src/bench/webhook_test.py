@@ -0,0 +1,178 @@
+"""Teste do modo webhook contra uma Bot API falsa, sem Telegram e sem Gemini.
+
+Sobe a Bot API falsa (`bench.fake_bot_api`) e o bot em modo webhook em uma
+porta local, envia ao webhook (com o secret token) uma pergunta de cada um
+dos `--chats` chats ao mesmo tempo e depois encerra o bot, que só termina
+após responder a todos. Reporta a latência até a primeira resposta e até a
+resposta completa, e quanto tempo o encerramento esperou.
+
+Uso:
+    PYTHONPATH=src python -m bench.webhook_test [--chats 50] [--llm-latency 0.5]
+        [--api-latency 0.05] [--no-stream] [--fake-embeddings]
+"""
+import argparse
+import asyncio
+import socket
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from config import STREAM_RESPONSES
+from bench.corpus import generate_corpus, sample_questions
+from bench.fake_bot_api import FakeBotAPI
+from bench.fake_llm import FakeChatModel
+from bench.load_test import disable_rate_limits
+from bench.micro import bench_embeddings
+from bench.stats import print_header, print_row
+from bot.handlers import TelegramBot
+from bot.utils import ChatbotUtils
+from db.faiss_db import FAISSManager
+from metrics import format_summary
+
+
+SECRET_TOKEN = "bench-secret"
+URL_PATH = "telegram"
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chats", type=int, default=50, help="chats enviando uma pergunta ao mesmo tempo")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="tempo até o primeiro token (s)")
+    parser.add_argument("--token-delay", type=float, default=0.01, help="intervalo entre tokens (s)")
+    parser.add_argument("--response-tokens", type=int, default=120)
+    parser.add_argument("--api-latency", type=float, default=0.05, help="latência de cada chamada à Bot API (s)")
+    parser.add_argument("--stream", action=argparse.BooleanOptionalAction, default=STREAM_RESPONSES)
+    parser.add_argument("--rate-limits", action="store_true", help="aplica os limites de taxa por chat e do modelo")
+    parser.add_argument("--pdf-dir", type=Path, help="usa estes PDFs em vez de gerar um corpus")
+    parser.add_argument("--files", type=int, default=10)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--fake-embeddings", action="store_true", help="embeddings determinísticos, sem modelo")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args(argv)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def text_update(update_id: int, chat_id: int, text: str) -> Dict:
+    """Update de uma mensagem de texto, no formato enviado pelo Telegram ao webhook."""
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "Morador"},
+            "text": text,
+        },
+    }
+
+
+async def exercise(bot: TelegramBot, chats: int, questions: List[str]) -> Tuple[Dict[int, float], float, float]:
+    """Envia as perguntas ao webhook e encerra o bot.
+
+    Retorna o horário de envio de cada chat e os horários de início e fim
+    do encerramento.
+    """
+    port = free_port()
+    url = f"http://127.0.0.1:{port}/{URL_PATH}"
+    application = bot.application
+
+    await application.initialize()
+    await application.updater.start_webhook(**bot.webhook_options(
+        listen="127.0.0.1", port=port, url_path=URL_PATH, webhook_url=url,
+        secret_token=SECRET_TOKEN, cert=None, key=None,
+    ))
+    await application.start()
+
+    sent: Dict[int, float] = {}
+    async with httpx.AsyncClient(timeout=30) as client:
+        async def post(chat_id: int) -> None:
+            update = text_update(chat_id, chat_id, questions[chat_id % len(questions)])
+            sent[chat_id] = time.perf_counter()
+            response = await client.post(url, json=update, headers={"X-Telegram-Bot-Api-Secret-Token": SECRET_TOKEN})
+            response.raise_for_status()
+
+        rejected = await client.post(url, json=text_update(0, 0, "sem token"))
+        if rejected.status_code != 403:
+            print(f"Atenção: update sem secret token respondeu {rejected.status_code}, esperado 403")
+        await asyncio.gather(*(post(chat_id) for chat_id in range(1, chats + 1)))
+
+    # Encerramento gracioso: para de receber updates e espera os handlers em andamento
+    stop_started = time.perf_counter()
+    await application.updater.stop()
+    await application.stop()
+    stopped = time.perf_counter()
+    await application.shutdown()
+    return sent, stop_started, stopped
+
+
+def run(args: argparse.Namespace, workdir: Path) -> None:
+    pdf_dir = args.pdf_dir
+    if pdf_dir is None:
+        pdf_dir = workdir / "pdfs"
+        generate_corpus(pdf_dir, files=args.files, pages=args.pages, seed=args.seed)
+
+    manager = FAISSManager(
+        embeddings=bench_embeddings(args.fake_embeddings),
+        index_path=workdir / "faiss_index", pdf_dir=pdf_dir,
+    )
+    manager.create_or_load_index()
+
+    api = FakeBotAPI(latency=args.api_latency).start()
+    llm = FakeChatModel(
+        latency=args.llm_latency, token_delay=args.token_delay, response_tokens=args.response_tokens
+    )
+    bot = TelegramBot(manager, ChatbotUtils(llm=llm), token="0:bench", stream_responses=args.stream,
+                      api_url=api.base_url)
+    if not args.rate_limits:
+        disable_rate_limits(bot)
+    questions = sample_questions(max(1, args.chats), seed=args.seed)
+
+    try:
+        sent, stop_started, stopped = asyncio.run(exercise(bot, args.chats, questions))
+    finally:
+        bot.close()
+        api.stop()
+
+    replies: Dict[int, List[float]] = {}
+    for call in api.calls_to("sendMessage") + api.calls_to("editMessageText"):
+        replies.setdefault(int(call.params.get("chat_id", 0)), []).append(call.at)
+    first_reply, complete = [], []
+    for chat_id in range(1, args.chats + 1):
+        at = replies.get(chat_id)
+        if at:
+            first_reply.append(min(at) - sent[chat_id])
+            complete.append(max(at) - sent[chat_id])
+
+    elapsed = stopped - min(sent.values())
+    print(
+        f"\n{args.chats} chats via webhook em {elapsed:.2f}s; {len(complete)} respondidos antes do fim do "
+        f"encerramento, que esperou {stopped - stop_started:.2f}s; "
+        f"streaming {'ligado' if args.stream else 'desligado'}\n"
+    )
+    print_header()
+    print_row("resposta completa", complete, elapsed)
+    print_row("primeira resposta", first_reply, elapsed)
+    print(
+        f"\nBot API: {len(api.calls_to('sendMessage'))} mensagens, "
+        f"{len(api.calls_to('editMessageText'))} edições, "
+        f"{len(api.calls_to('sendChatAction'))} ações\n"
+    )
+    print(format_summary())
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory(prefix="bench-") as workdir:
+        run(args, Path(workdir))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Cache de respostas do chatbot."""
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from config import ANSWER_CACHE_SIZE, ANSWER_CACHE_TTL, ANSWER_CACHE_SIMILARITY
+from metrics import CACHE_LOOKUPS
+
+
+CacheKey = Tuple[str, FrozenSet[str]]
+
+
+@dataclass
+class _CacheEntry:
+    answer: str
+    created_at: float
+    embedding: Optional[np.ndarray] = None
+
+
+class AnswerCache:
+    """Cache LRU/TTL de respostas, chaveado pela pergunta normalizada e pelos chunks recuperados.
+
+    Além da busca exata, uma pergunta pode reaproveitar a resposta de outra
+    quase idêntica (similaridade de cosseno entre os embeddings das perguntas
+    acima de `similarity_threshold`), desde que ambas tenham recuperado
+    exatamente os mesmos chunks. Um limiar 0 desativa essa busca aproximada.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = ANSWER_CACHE_SIZE,
+        ttl: float = ANSWER_CACHE_TTL,
+        similarity_threshold: float = ANSWER_CACHE_SIMILARITY,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self._entries: "OrderedDict[CacheKey, _CacheEntry]" = OrderedDict()
+        self._by_context: Dict[FrozenSet[str], Set[CacheKey]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def normalize_question(question: str) -> str:
+        """Normaliza caixa, espaços e pontuação final da pergunta."""
+        question = unicodedata.normalize("NFKC", question).lower()
+        question = re.sub(r"\s+", " ", question)
+        return question.strip(" ?!.,;:")
+
+    @staticmethod
+    def context_key(docs: Sequence[Document]) -> FrozenSet[str]:
+        """Conjunto de ids dos chunks recuperados."""
+        return frozenset(
+            doc.id or hashlib.sha1(doc.page_content.encode("utf-8")).hexdigest()
+            for doc in docs
+        )
+
+    def get(self, question: str, docs: Sequence[Document],
+            embedding: Optional[List[float]] = None) -> Optional[str]:
+        """Retorna a resposta em cache para a pergunta, se houver."""
+        context = self.context_key(docs)
+        key = (self.normalize_question(question), context)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not self._expired(entry, now):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                CACHE_LOOKUPS.inc(cache="answer", result="hit")
+                return entry.answer
+            if entry is not None:
+                self._remove(key)
+
+            near_key = self._find_near_duplicate(context, embedding, now)
+            if near_key is not None:
+                self._entries.move_to_end(near_key)
+                self.near_hits += 1
+                CACHE_LOOKUPS.inc(cache="answer", result="near_hit")
+                return self._entries[near_key].answer
+
+            self.misses += 1
+            CACHE_LOOKUPS.inc(cache="answer", result="miss")
+            return None
+
+    def put(self, question: str, docs: Sequence[Document], answer: str,
+            embedding: Optional[List[float]] = None) -> None:
+        """Armazena a resposta, removendo as entradas menos usadas se necessário."""
+        context = self.context_key(docs)
+        key = (self.normalize_question(question), context)
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _CacheEntry(answer, time.monotonic(), self._unit_vector(embedding))
+            self._by_context.setdefault(context, set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Invalida todas as respostas (por exemplo, após o índice ser reconstruído)."""
+        with self._lock:
+            self._entries.clear()
+            self._by_context.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Contadores de uso do cache."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _find_near_duplicate(self, context: FrozenSet[str], embedding: Optional[List[float]],
+                             now: float) -> Optional[CacheKey]:
+        if self.similarity_threshold <= 0 or embedding is None:
+            return None
+
+        query = self._unit_vector(embedding)
+        best_key, best_score = None, self.similarity_threshold
+        for key in list(self._by_context.get(context, ())):
+            entry = self._entries[key]
+            if self._expired(entry, now):
+                self._remove(key)
+                continue
+            if entry.embedding is None:
+                continue
+            score = float(np.dot(query, entry.embedding))
+            if score >= best_score:
+                best_key, best_score = key, score
+        return best_key
+
+    def _expired(self, entry: _CacheEntry, now: float) -> bool:
+        return self.ttl > 0 and now - entry.created_at > self.ttl
+
+    def _remove(self, key: CacheKey) -> None:
+        del self._entries[key]
+        keys = self._by_context.get(key[1])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_context[key[1]]
+
+    @staticmethod
+    def _unit_vector(embedding: Optional[List[float]]) -> Optional[np.ndarray]:
+        if embedding is None:
+            return None
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
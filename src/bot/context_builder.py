@@ -0,0 +1,146 @@
+"""Montagem do contexto do prompt a partir dos chunks recuperados."""
+import math
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+from langchain_core.documents import Document
+
+from config import CONTEXT_TOKEN_BUDGET, CHARS_PER_TOKEN, CHUNK_OVERLAP
+
+# Sobreposição mínima para considerar que dois chunks sem `start_index` são vizinhos
+_MIN_TEXT_OVERLAP = 20
+
+# Distância máxima (espaços removidos pelo splitter) para considerar dois chunks adjacentes
+_MAX_ADJACENT_GAP = 2
+
+
+@dataclass
+class ContextBlock:
+    """Trecho contínuo de um documento, formado por um ou mais chunks."""
+    source: str
+    file_path: str
+    rank: int
+    text: str
+    start: Optional[int] = None
+    end: Optional[int] = None
+    page: Optional[int] = None
+
+
+class ContextBuilder:
+    """Junta chunks sobrepostos ou adjacentes e os encaixa em um orçamento de tokens.
+
+    Chunks do mesmo `file_path` que se sobrepõem (pelo `start_index` gravado
+    na indexação ou, em índices antigos, pela sobreposição do próprio texto)
+    viram um único bloco sem o trecho repetido. Os blocos entram no prompt
+    na ordem de relevância da busca, inteiros, enquanto couberem no
+    orçamento; o mais relevante sempre entra. Os tokens são estimados por
+    `chars_per_token`.
+    """
+
+    def __init__(self, token_budget: int = CONTEXT_TOKEN_BUDGET, chars_per_token: float = CHARS_PER_TOKEN,
+                 max_overlap: int = CHUNK_OVERLAP):
+        self.token_budget = token_budget
+        self.chars_per_token = chars_per_token
+        self.max_overlap = max_overlap
+
+    def estimate_tokens(self, text: str) -> int:
+        """Estimativa de tokens de um texto."""
+        return math.ceil(len(text) / self.chars_per_token)
+
+    def max_chars(self, tokens: int) -> int:
+        """Quantidade aproximada de caracteres que cabem em `tokens`."""
+        return int(tokens * self.chars_per_token)
+
+    def merge_chunks(self, docs: Sequence[Document]) -> List[ContextBlock]:
+        """Une chunks sobrepostos/adjacentes do mesmo arquivo e remove duplicados."""
+        by_file: Dict[str, List[ContextBlock]] = {}
+        for rank, doc in enumerate(docs):
+            source = doc.metadata.get("source", f"Documento {rank + 1}")
+            file_path = doc.metadata.get("file_path", source)
+            start = doc.metadata.get("start_index")
+            end = None if start is None else start + len(doc.page_content)
+            block = ContextBlock(source, file_path, rank, doc.page_content, start, end, doc.metadata.get("page"))
+            by_file.setdefault(file_path, []).append(block)
+
+        merged: List[ContextBlock] = []
+        for blocks in by_file.values():
+            positioned = sorted((b for b in blocks if b.start is not None), key=lambda b: b.start)
+            merged.extend(self._merge_positioned(positioned))
+            merged.extend(self._merge_by_text([b for b in blocks if b.start is None]))
+
+        return sorted(merged, key=lambda b: b.rank)
+
+    def build(self, docs: Sequence[Document], token_budget: Optional[int] = None) -> str:
+        """Formata os blocos mais relevantes que cabem no orçamento."""
+        budget = self.token_budget if token_budget is None else token_budget
+        formatted = []
+        used = 0
+        for block in self.merge_chunks(docs):
+            label = block.source if block.page is None else f"{block.source}, p. {block.page}"
+            text = f"[{label}]:\n{block.text}"
+            tokens = self.estimate_tokens(text)
+            if formatted and budget > 0 and used + tokens > budget:
+                continue
+            formatted.append(text)
+            used += tokens
+        return "\n\n".join(formatted)
+
+    @staticmethod
+    def _merge_positioned(blocks: List[ContextBlock]) -> List[ContextBlock]:
+        merged: List[ContextBlock] = []
+        for block in blocks:
+            last = merged[-1] if merged else None
+            if last is None or block.start > last.end + _MAX_ADJACENT_GAP:
+                merged.append(ContextBlock(
+                    block.source, block.file_path, block.rank, block.text, block.start, block.end, block.page
+                ))
+                continue
+
+            if block.start > last.end:
+                last.text += "\n" + block.text
+            elif block.end > last.end:
+                last.text += block.text[last.end - block.start:]
+            last.end = max(last.end, block.end)
+            last.rank = min(last.rank, block.rank)
+        return merged
+
+    def _merge_by_text(self, blocks: List[ContextBlock]) -> List[ContextBlock]:
+        merged: List[ContextBlock] = []
+        for block in blocks:
+            for existing in merged:
+                if self._absorb(existing, block):
+                    break
+            else:
+                merged.append(ContextBlock(block.source, block.file_path, block.rank, block.text, page=block.page))
+        return merged
+
+    def _absorb(self, existing: ContextBlock, block: ContextBlock) -> bool:
+        """Incorpora `block` em `existing` se um contém o outro ou se eles se sobrepõem."""
+        if block.text in existing.text:
+            combined = existing.text
+        elif existing.text in block.text:
+            combined = block.text
+        else:
+            overlap = self._overlap(existing.text, block.text)
+            if overlap:
+                combined = existing.text + block.text[overlap:]
+            else:
+                overlap = self._overlap(block.text, existing.text)
+                if not overlap:
+                    return False
+                combined = block.text + existing.text[overlap:]
+
+        existing.text = combined
+        existing.rank = min(existing.rank, block.rank)
+        # O bloco unido começa na primeira página dos dois
+        pages = [page for page in (existing.page, block.page) if page is not None]
+        existing.page = min(pages) if pages else None
+        return True
+
+    def _overlap(self, first: str, second: str) -> int:
+        """Tamanho do maior sufixo de `first` que é prefixo de `second`."""
+        longest = min(self.max_overlap, len(first), len(second))
+        for size in range(longest, _MIN_TEXT_OVERLAP - 1, -1):
+            if first.endswith(second[:size]):
+                return size
+        return 0
@@ -1,10 +1,21 @@
 """Gerenciador de conversas do chatbot."""
-from typing import List, Dict
+import asyncio
+import threading
+import time
+from collections import OrderedDict, deque
 from dataclasses import dataclass, field
 from datetime import datetime
+from pathlib import Path
+from typing import Deque, List, Optional, Tuple
 
+from config import (
+    CONVERSATION_MAX_HISTORY, CONVERSATION_TTL, CONVERSATION_MAX_CHATS,
+    CONVERSATION_MAX_CHARS, CONVERSATION_DB,
+)
+from bot.conversation_store import SQLiteConversationStore
 
-@dataclass
+
+@dataclass(slots=True)
 class Message:
     """Representa uma mensagem na conversa."""
     role: str
@@ -12,42 +23,216 @@ class Message:
     timestamp: datetime = field(default_factory=datetime.now)
 
 
+class _ChatState:
+    """Histórico de um chat, com o texto formatado para o prompt em cache."""
+    __slots__ = ("messages", "last_active", "chars", "formatted")
+
+    def __init__(self, max_history: int):
+        self.messages: Deque[Message] = deque(maxlen=max_history)
+        self.last_active = time.monotonic()
+        self.chars = 0
+        self.formatted: Optional[str] = None
+
+    def append(self, message: Message) -> None:
+        if len(self.messages) == self.messages.maxlen:
+            self.chars -= len(self.messages[0].content)
+        self.messages.append(message)
+        self.chars += len(message.content)
+        self.formatted = None
+
+
 class ConversationManager:
-    """Gerencia o histórico de conversas do chatbot."""
-    
-    def __init__(self, max_history: int = 5):
-        self.conversations: Dict[int, List[Message]] = {}
+    """Gerencia o histórico de conversas do chatbot.
+
+    Cada chat guarda no máximo `max_history` mensagens. Chats sem atividade
+    por mais de `ttl` segundos expiram, e os chats usados há mais tempo são
+    descartados da memória quando o total passa de `max_chats` chats ou
+    `max_chars` caracteres. Com `db_path`, o histórico também é gravado em
+    SQLite e recarregado sob demanda, sobrevivendo a reinícios; `preload`
+    faz essa leitura fora do event loop, e chats sem histórico gravado são
+    lembrados para não consultar o banco a cada pergunta.
+    """
+
+    def __init__(
+        self,
+        max_history: int = CONVERSATION_MAX_HISTORY,
+        ttl: float = CONVERSATION_TTL,
+        max_chats: int = CONVERSATION_MAX_CHATS,
+        max_chars: int = CONVERSATION_MAX_CHARS,
+        db_path: Optional[Path] = CONVERSATION_DB,
+    ):
+        self.conversations: "OrderedDict[int, _ChatState]" = OrderedDict()
         self.max_history = max_history
-    
+        self.ttl = ttl
+        self.max_chats = max_chats
+        self.max_chars = max_chars
+        self.store = SQLiteConversationStore(db_path, retention=ttl or None) if db_path else None
+        self._total_chars = 0
+        self._lock = threading.RLock()
+        # Chats sem mensagens gravadas, até a próxima mensagem (no máximo `max_chats`)
+        self._without_history: "OrderedDict[int, None]" = OrderedDict()
+
     def add_message(self, chat_id: int, role: str, content: str) -> None:
         """Adiciona uma mensagem ao histórico da conversa."""
-        if chat_id not in self.conversations:
-            self.conversations[chat_id] = []
-            
         message = Message(role=role, content=content)
-        self.conversations[chat_id].append(message)
-        
-        # Manter apenas as últimas max_history mensagens
-        if len(self.conversations[chat_id]) > self.max_history:
-            self.conversations[chat_id] = self.conversations[chat_id][-self.max_history:]
-    
+        with self._lock:
+            state = self._get_state(chat_id, create=True)
+            self._without_history.pop(chat_id, None)
+            previous_chars = state.chars
+            state.append(message)
+            self._total_chars += state.chars - previous_chars
+            if self.store is not None:
+                self.store.append(chat_id, role, content, message.timestamp)
+            self._evict()
+
     def get_conversation_history(self, chat_id: int) -> List[Message]:
         """Retorna o histórico da conversa para um chat específico."""
-        return self.conversations.get(chat_id, [])
-    
+        with self._lock:
+            state = self._get_state(chat_id)
+            return list(state.messages) if state else []
+
+    def seconds_since_last_message(self, chat_id: int) -> Optional[float]:
+        """Segundos desde a última mensagem do chat, ou None se não houver histórico."""
+        with self._lock:
+            state = self._get_state(chat_id)
+            if state is None or not state.messages:
+                return None
+            return (datetime.now() - state.messages[-1].timestamp).total_seconds()
+
     def clear_conversation(self, chat_id: int) -> None:
         """Limpa o histórico de conversa para um chat específico."""
-        if chat_id in self.conversations:
-            del self.conversations[chat_id]
-    
-    def format_history_for_prompt(self, chat_id: int) -> str:
-        """Formata o histórico da conversa para uso no prompt."""
-        history = self.get_conversation_history(chat_id)
-        if not history:
-            return ""
-            
-        formatted = "\nHistórico da conversa:\n"
-        for msg in history:
+        with self._lock:
+            self._drop(chat_id)
+            if self.store is not None:
+                self.store.clear(chat_id)
+                self._remember_without_history(chat_id)
+
+    async def preload(self, chat_id: Optional[int]) -> None:
+        """Carrega do SQLite, em uma thread, o histórico de um chat que não está em memória.
+
+        Evita que a leitura aconteça no event loop, dentro de `add_message`
+        ou `get_conversation_history`.
+        """
+        if chat_id is None or self.store is None:
+            return
+        with self._lock:
+            state = self.conversations.get(chat_id)
+            if state is not None and self._expired(state, time.monotonic()):
+                self._drop(chat_id)
+            if not self._needs_load(chat_id):
+                return
+        await asyncio.to_thread(self._load, chat_id)
+
+    def _load(self, chat_id: int) -> None:
+        """Lê o histórico do chat do SQLite sem segurar o lock do gerenciador durante a consulta."""
+        rows = self._query_store(chat_id)
+        with self._lock:
+            if self._needs_load(chat_id):
+                self._install(chat_id, rows)
+
+    def format_history_for_prompt(self, chat_id: int, max_chars: Optional[int] = None) -> str:
+        """Formata o histórico da conversa para uso no prompt.
+
+        Com `max_chars`, as mensagens mais antigas são omitidas até o texto
+        caber no limite (a mensagem mais recente sempre entra).
+        """
+        with self._lock:
+            state = self._get_state(chat_id)
+            if state is None or not state.messages:
+                return ""
+
+            if state.formatted is None:
+                state.formatted = self._format(state.messages)
+            if max_chars is None or len(state.formatted) <= max_chars:
+                return state.formatted
+
+            messages = list(state.messages)
+            while len(messages) > 1:
+                messages.pop(0)
+                formatted = self._format(messages)
+                if len(formatted) <= max_chars:
+                    return formatted
+            return self._format(messages)
+
+    @staticmethod
+    def _format(messages) -> str:
+        lines = ["\nHistórico da conversa:\n"]
+        for msg in messages:
             role = "Usuário" if msg.role == "user" else "Assistente"
-            formatted += f"{role}: {msg.content}\n"
-        return formatted
+            lines.append(f"{role}: {msg.content}\n")
+        return "".join(lines)
+
+    def close(self) -> None:
+        """Grava o histórico pendente e fecha a persistência."""
+        if self.store is not None:
+            self.store.close()
+
+    def _get_state(self, chat_id: int, create: bool = False) -> Optional[_ChatState]:
+        """Retorna o estado do chat, carregando-o do SQLite se necessário."""
+        now = time.monotonic()
+        state = self.conversations.get(chat_id)
+        loaded = False
+
+        if state is not None and self._expired(state, now):
+            self._drop(chat_id)
+            state = None
+
+        if state is None and self._needs_load(chat_id):
+            state = self._install(chat_id, self._query_store(chat_id))
+            loaded = state is not None
+
+        if state is None and create:
+            state = _ChatState(self.max_history)
+            self.conversations[chat_id] = state
+
+        if state is not None:
+            state.last_active = now
+            self.conversations.move_to_end(chat_id)
+            if loaded:
+                self._evict()
+        return state
+
+    def _needs_load(self, chat_id: int) -> bool:
+        """Indica se o histórico do chat pode estar no SQLite e ainda não foi lido."""
+        return (self.store is not None and chat_id not in self.conversations
+                and chat_id not in self._without_history)
+
+    def _query_store(self, chat_id: int) -> List[Tuple[str, str, datetime]]:
+        since = time.time() - self.ttl if self.ttl else None
+        return self.store.load(chat_id, self.max_history, since)
+
+    def _install(self, chat_id: int, rows: List[Tuple[str, str, datetime]]) -> Optional[_ChatState]:
+        """Coloca em memória o histórico lido do SQLite, ou lembra que o chat não tem histórico."""
+        if not rows:
+            self._remember_without_history(chat_id)
+            return None
+        state = _ChatState(self.max_history)
+        for role, content, timestamp in rows:
+            state.append(Message(role=role, content=content, timestamp=timestamp))
+        self.conversations[chat_id] = state
+        self._total_chars += state.chars
+        return state
+
+    def _remember_without_history(self, chat_id: int) -> None:
+        self._without_history[chat_id] = None
+        self._without_history.move_to_end(chat_id)
+        while len(self._without_history) > self.max_chats:
+            self._without_history.popitem(last=False)
+
+    def _expired(self, state: _ChatState, now: float) -> bool:
+        return self.ttl > 0 and now - state.last_active > self.ttl
+
+    def _drop(self, chat_id: int) -> None:
+        state = self.conversations.pop(chat_id, None)
+        if state is not None:
+            self._total_chars -= state.chars
+
+    def _evict(self) -> None:
+        """Descarta chats expirados e, se preciso, os menos recentes (o mais novo é sempre mantido)."""
+        now = time.monotonic()
+        while len(self.conversations) > 1:
+            chat_id, state = next(iter(self.conversations.items()))
+            over_limit = len(self.conversations) > self.max_chats or self._total_chars > self.max_chars
+            if not (over_limit or self._expired(state, now)):
+                break
+            self._drop(chat_id)
@@ -0,0 +1,135 @@
+"""Persistência do histórico de conversas em SQLite."""
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from config import CONVERSATION_FLUSH_INTERVAL
+
+
+class SQLiteConversationStore:
+    """Guarda as mensagens em SQLite com escrita adiada (write-behind).
+
+    Inserções e limpezas entram em uma fila e são gravadas em lote, em uma
+    única transação, por uma thread de fundo a cada `flush_interval`
+    segundos (ou antes, quando a fila atinge `max_pending`). Leituras
+    combinam o banco com as operações ainda na fila, sem forçar a gravação.
+    """
+
+    def __init__(self, path: Path, flush_interval: float = CONVERSATION_FLUSH_INTERVAL,
+                 max_pending: int = 500, retention: Optional[float] = None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.retention = retention
+        self._pending: List[Tuple] = []
+        self._pending_lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS messages ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " chat_id INTEGER NOT NULL,"
+                " role TEXT NOT NULL,"
+                " content TEXT NOT NULL,"
+                " timestamp REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS messages_chat ON messages (chat_id, id)"
+            )
+
+        self._thread = threading.Thread(target=self._run, name="conversation-store", daemon=True)
+        self._thread.start()
+
+    def append(self, chat_id: int, role: str, content: str, timestamp: datetime) -> None:
+        """Enfileira uma mensagem para gravação."""
+        self._enqueue(("add", chat_id, role, content, timestamp.timestamp()))
+
+    def clear(self, chat_id: int) -> None:
+        """Enfileira a remoção do histórico de um chat."""
+        self._enqueue(("clear", chat_id))
+
+    def load(self, chat_id: int, limit: int, since: Optional[float] = None) -> List[Tuple[str, str, datetime]]:
+        """Retorna as últimas `limit` mensagens do chat (role, conteúdo, horário), da mais antiga à mais nova."""
+        # Com o banco travado, a fila não é gravada entre a consulta e a cópia
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT role, content, timestamp FROM messages"
+                " WHERE chat_id = ? AND timestamp >= ?"
+                " ORDER BY id DESC LIMIT ?",
+                (chat_id, since or 0, limit),
+            ).fetchall()
+            with self._pending_lock:
+                pending = [operation for operation in self._pending if operation[1] == chat_id]
+
+        rows.reverse()
+        for operation in pending:
+            if operation[0] == "add":
+                if operation[4] >= (since or 0):
+                    rows.append(operation[2:])
+            else:
+                rows = []
+        return [(role, content, datetime.fromtimestamp(ts)) for role, content, ts in rows[-limit:]]
+
+    def flush(self) -> None:
+        """Grava as operações pendentes em uma única transação."""
+        with self._db_lock:
+            with self._pending_lock:
+                operations, self._pending = self._pending, []
+            if not operations:
+                return
+
+            with self._conn:
+                for operation in operations:
+                    if operation[0] == "add":
+                        self._conn.execute(
+                            "INSERT INTO messages (chat_id, role, content, timestamp) VALUES (?, ?, ?, ?)",
+                            operation[1:],
+                        )
+                    else:
+                        self._conn.execute("DELETE FROM messages WHERE chat_id = ?", (operation[1],))
+
+    def prune(self) -> None:
+        """Remove mensagens mais antigas que o período de retenção."""
+        if not self.retention:
+            return
+        with self._db_lock, self._conn:
+            self._conn.execute(
+                "DELETE FROM messages WHERE timestamp < ?", (time.time() - self.retention,)
+            )
+
+    def close(self) -> None:
+        """Para a thread de gravação, grava o que estiver pendente e fecha o banco."""
+        self._stopped.set()
+        self._wakeup.set()
+        self._thread.join()
+        self.flush()
+        with self._db_lock:
+            self._conn.close()
+
+    def _enqueue(self, operation: Tuple) -> None:
+        with self._pending_lock:
+            self._pending.append(operation)
+            full = len(self._pending) >= self.max_pending
+        if full:
+            self._wakeup.set()
+
+    def _run(self) -> None:
+        last_prune = time.monotonic()
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+                if time.monotonic() - last_prune > 3600:
+                    self.prune()
+                    last_prune = time.monotonic()
+            except sqlite3.Error as e:
+                print(f"Erro ao gravar histórico de conversas: {e}")
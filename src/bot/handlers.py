@@ -1,28 +1,76 @@
+import asyncio
+import logging
 import os
+from contextlib import aclosing
 from pathlib import Path
+from typing import Any, Dict, List, Optional
 
 from telegram import Update
 from telegram.ext import ContextTypes, Application, CommandHandler, MessageHandler, filters
 
-from db.faiss_db import FAISSManager
-from db.pdf_processor import PDFProcessor
+from db.faiss_db import FAISSManager, get_faiss_manager
+from db.pdf_watcher import PDFWatcher
+from db.tenants import TenantRouter, UnknownTenantError
+from db.warmup import RetrievalWarmup
 from bot.utils import ChatbotUtils
-from config import TELEGRAM_BOT_TOKEN
+from bot.pipeline import PipelineBusyError, QuestionPipeline
+from bot.rate_limit import LLMOverloadedError, RateLimitedError
+from bot.retry import LLMUnavailableError
+from bot.streaming import TelegramStreamWriter, split_message
+from config import (
+    TELEGRAM_BOT_TOKEN, TELEGRAM_API_URL, MAX_CONCURRENT_UPDATES, STREAM_RESPONSES, ADMIN_CHAT_IDS,
+    WEBHOOK_URL, WEBHOOK_LISTEN, WEBHOOK_PORT, WEBHOOK_PATH, WEBHOOK_SECRET_TOKEN, WEBHOOK_CERT, WEBHOOK_KEY,
+)
+from metrics import ERRORS, REQUESTS, format_summary, set_ready, set_serving, span
+
+logger = logging.getLogger(__name__)
 
 
 class TelegramBot:
     """Implementação do bot do Telegram."""
     
-    def __init__(self):
-        self.faiss_manager = FAISSManager()
-        self.pdf_processor = PDFProcessor()
-        self.chatbot_utils = ChatbotUtils()
+    def __init__(self, faiss_manager: Optional[FAISSManager] = None,
+                 chatbot_utils: Optional[ChatbotUtils] = None, token: str = TELEGRAM_BOT_TOKEN,
+                 stream_responses: bool = STREAM_RESPONSES, tenants: Optional[TenantRouter] = None,
+                 api_url: str = TELEGRAM_API_URL, webhook_url: str = WEBHOOK_URL,
+                 max_concurrent_updates: int = MAX_CONCURRENT_UPDATES,
+                 warmup: Optional[RetrievalWarmup] = None, watchers: Optional[List[PDFWatcher]] = None):
+        # Com vários condomínios, cada chat usa o índice do seu; sem eles,
+        # todos os chats usam `faiss_manager`
+        self.tenants = tenants or TenantRouter.single(faiss_manager or get_faiss_manager())
+        self.warmup = warmup
+        self.watchers = list(watchers or [])
+        self.chatbot_utils = chatbot_utils or ChatbotUtils()
+        self.stream_responses = stream_responses
+        self.webhook_url = webhook_url
+        
+        # Carregar o índice FAISS (já carregado se a inicialização usou o mesmo
+        # FAISSManager); com vários condomínios, cada índice é carregado na
+        # primeira pergunta. Com `warmup`, o carregamento é feito em segundo
+        # plano e o bot já começa a receber updates
+        if warmup is None and not self.tenants.is_multi_tenant:
+            self.tenants.manager_for(None).create_or_load_index()
+        if warmup is None:
+            set_ready(True)
+        
+        # Respostas em cache ficam inválidas sempre que um índice muda
+        self.tenants.add_change_listener(self.chatbot_utils.answer_cache.clear)
         
-        # Carregar o índice FAISS
-        self.faiss_manager.create_or_load_index()
+        # Pipeline assíncrono de perguntas
+        self.pipeline = QuestionPipeline(self.tenants, self.chatbot_utils)
         
-        # Configurar o bot do Telegram
-        self.application = Application.builder().token(TELEGRAM_BOT_TOKEN).build()
+        # Configurar o bot do Telegram (updates processados em paralelo;
+        # a ordem por chat é garantida pelo pipeline)
+        builder = (
+            Application.builder()
+            .token(token)
+            .concurrent_updates(max_concurrent_updates)
+            .post_init(self._post_init)
+            .post_stop(self._post_stop)
+        )
+        if api_url:
+            builder = builder.base_url(api_url)
+        self.application = builder.build()
         self._setup_handlers()
     
     def _setup_handlers(self) -> None:
@@ -32,7 +80,7 @@ class TelegramBot:
         self.application.add_handler(CommandHandler("help", self.help_command))
         self.application.add_handler(CommandHandler("reload", self._reload_command))
         self.application.add_handler(CommandHandler("clear", self.clear_command))
-        self.application.add_handler(CommandHandler("stopApplication", self.stop_command))
+        self.application.add_handler(CommandHandler("stats", self.stats_command))
         
         # Mensagens de texto (perguntas)
         self.application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self.message_handler))
@@ -59,7 +107,8 @@ class TelegramBot:
             "📚 Comandos disponíveis:\n\n"
             "/start - Inicia uma nova conversa\n"
             "/help - Mostra esta mensagem de ajuda\n"
-            "/reload - Recarrega a base de conhecimento\n"
+            "/reload - Atualiza a base de conhecimento com PDFs novos ou alterados\n"
+            "/reload completo - Recria a base de conhecimento do zero\n"
             "/clear - Limpa o histórico da conversa atual\n"
             "🔍 Como usar:\n"
             "1. Faça perguntas sobre o seu condomínio\n"
@@ -68,16 +117,39 @@ class TelegramBot:
         )
     
     async def _reload_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-        """Recarrega a base de dados de PDFs."""
+        """Recarrega a base de dados de PDFs.
+
+        Por padrão só os PDFs adicionados, alterados ou removidos são
+        reprocessados; `/reload completo` recria o índice do zero. A
+        atualização roda em segundo plano (pedidos simultâneos viram uma só)
+        e as perguntas continuam sendo respondidas com o índice atual.
+        """
+        full_reload = bool(context.args) and context.args[0].lower() in ("completo", "full")
+        try:
+            faiss_manager = self.tenants.manager_for(update.effective_chat.id)
+        except UnknownTenantError:
+            await self._reply_unknown_tenant(update)
+            return
         await update.message.reply_text("🔄 Recarregando base de dados de PDFs...")
         
-        # Recriar o índice
+        # Atualizar o índice do condomínio do chat
         try:
-            self.faiss_manager.create_or_load_index(force_reload=True)
+            diff = await asyncio.wrap_future(faiss_manager.request_update(full=full_reload))
+            if full_reload:
+                summary = "Índice recriado a partir de todos os PDFs."
+            else:
+                if diff.has_changes:
+                    summary = (
+                        f"📄 {len(diff.added)} novos, {len(diff.changed)} alterados, "
+                        f"{len(diff.removed)} removidos."
+                    )
+                else:
+                    summary = "Nenhum PDF novo ou alterado."
             # Limpar histórico de conversa ao recarregar a base
             self.chatbot_utils.conversation_manager.clear_conversation(update.effective_chat.id)
             await update.message.reply_text(
                 "✅ Base de dados recarregada com sucesso!\n"
+                f"{summary}\n"
                 "💬 Histórico da conversa foi limpo para começar uma nova interação."
             )
         except Exception as e:
@@ -91,44 +163,160 @@ class TelegramBot:
             "Você pode começar uma nova conversa agora."
         )
     
-    async def stop_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-        """Para o bot."""
-        await update.message.reply_text("🛑 Parando o bot...")
-        await self.application.stop()
-        # await self.application.shutdown()
-    
+    async def stats_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Mostra as métricas de latência, cache, erros e tokens (apenas administradores)."""
+        if update.effective_chat.id not in ADMIN_CHAT_IDS:
+            await update.message.reply_text("⛔ Comando disponível apenas para administradores.")
+            return
+        for part in split_message(format_summary()):
+            await update.message.reply_text(part)
     
     async def message_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Responde a mensagens de texto (perguntas)."""
         query = update.message.text
         chat_id = update.effective_chat.id
         
+        try:
+            self.tenants.tenant_for(chat_id)
+        except UnknownTenantError:
+            REQUESTS.inc(outcome="unknown_tenant")
+            await self._reply_unknown_tenant(update)
+            return
+        
+        if self.warmup is not None and not self.warmup.ready:
+            await self._reply_warming_up(update)
+            return
+        
         # Mostrar que o bot está digitando
         await context.bot.send_chat_action(
             chat_id=chat_id, 
             action="typing"
         )
         
-        # Buscar documentos relevantes
-        docs = self.faiss_manager.similarity_search(query)
-        
-        # Gerar resposta considerando o histórico
-        response = self.chatbot_utils.generate_response(query, docs, chat_id)
-        
-        # Enviar resposta
-        await update.message.reply_text(response)
+        # Buscar documentos e gerar resposta sem bloquear os demais chats
+        try:
+            with span("total"):
+                if self.stream_responses:
+                    # Editar a resposta à medida que o modelo gera o texto
+                    writer = TelegramStreamWriter(update.message)
+                    # Fecha o gerador mesmo se o envio falhar, liberando na hora
+                    # a vaga do pipeline e a chamada compartilhada com outros chats
+                    async with aclosing(self.pipeline.stream(chat_id, query)) as chunks:
+                        async for chunk in chunks:
+                            await writer.write(chunk)
+                    await writer.finish()
+                else:
+                    response = await self.pipeline.answer(chat_id, query)
+                    for part in split_message(response):
+                        await update.message.reply_text(part)
+            REQUESTS.inc(outcome="ok")
+        except PipelineBusyError:
+            REQUESTS.inc(outcome="busy")
+            await update.message.reply_text(
+                "⏳ Estou recebendo muitas perguntas no momento. "
+                "Por favor, tente novamente em instantes."
+            )
+        except LLMOverloadedError as e:
+            # Limite global do modelo, não do chat: a espera na fila passaria de LLM_MAX_WAIT
+            REQUESTS.inc(outcome="overloaded")
+            await update.message.reply_text(
+                "⏳ O serviço de respostas está sobrecarregado no momento. "
+                f"Por favor, tente novamente em {max(1, round(e.retry_after))} segundos."
+            )
+        except RateLimitedError as e:
+            REQUESTS.inc(outcome="rate_limited")
+            await update.message.reply_text(
+                "⏳ Muitas perguntas em pouco tempo. "
+                f"Por favor, tente novamente em {max(1, round(e.retry_after))} segundos."
+            )
+    
+    @staticmethod
+    async def _reply_unknown_tenant(update: Update) -> None:
+        await update.message.reply_text(
+            "🏢 Este chat ainda não está vinculado a nenhum condomínio. "
+            f"Peça ao administrador para cadastrá-lo (chat {update.effective_chat.id})."
+        )
+    
+    async def _reply_warming_up(self, update: Update) -> None:
+        """Responde enquanto o modelo e o índice ainda estão sendo carregados."""
+        if self.warmup.failed:
+            REQUESTS.inc(outcome="unavailable")
+            await update.message.reply_text(
+                "❌ A base de conhecimento não pôde ser carregada. "
+                "Por favor, avise o administrador."
+            )
+            return
+        REQUESTS.inc(outcome="warming_up")
+        await update.message.reply_text(
+            "⏳ Estou iniciando e carregando a base de conhecimento. "
+            "Por favor, envie sua pergunta novamente em alguns instantes."
+        )
     
     async def error_handler(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Trata erros no bot."""
-        print(f"Erro: {context.error}")
+        # Fora de um bloco `except`: o traceback vem da própria exceção
+        logger.exception("Erro ao processar update", exc_info=context.error)
+        ERRORS.inc(stage="handler", error=type(context.error).__name__)
+        if update and update.message and update.message.text and not update.message.text.startswith("/"):
+            REQUESTS.inc(outcome="error")
         
         # Informar o usuário sobre o erro
         if update:
+            # Só erros da chamada ao modelo; timeouts do próprio Telegram caem na mensagem genérica
+            if isinstance(context.error, LLMUnavailableError):
+                # Cota ou sobrecarga do modelo que persistiu após as novas tentativas
+                await update.message.reply_text(
+                    "⏳ O serviço de respostas está sobrecarregado no momento. "
+                    "Por favor, tente novamente em alguns minutos."
+                )
+                return
             await update.message.reply_text(
                 "❌ Ocorreu um erro ao processar sua solicitação. Por favor, tente novamente."
             )
     
+    async def _post_init(self, application: Application) -> None:
+        set_serving(True)
+    
+    async def _post_stop(self, application: Application) -> None:
+        # Chamado depois que os updates em andamento terminaram
+        set_serving(False)
+        print("Updates em andamento concluídos; encerrando o bot.")
+    
+    def webhook_options(self, **overrides: Any) -> Dict[str, Any]:
+        """Parâmetros de `run_webhook`/`Updater.start_webhook`, com `overrides` aplicados."""
+        options = {
+            "listen": WEBHOOK_LISTEN,
+            "port": WEBHOOK_PORT,
+            "url_path": WEBHOOK_PATH,
+            "webhook_url": self.webhook_url or None,
+            "secret_token": WEBHOOK_SECRET_TOKEN,
+            "cert": WEBHOOK_CERT,
+            "key": WEBHOOK_KEY,
+            "allowed_updates": Update.ALL_TYPES,
+        }
+        options.update(overrides)
+        return options
+    
     def start(self) -> None:
-        """Inicia o bot."""
-        print("Iniciando bot do Telegram...")
-        self.application.run_polling(allowed_updates=Update.ALL_TYPES)
\ No newline at end of file
+        """Inicia o bot por webhook (com `WEBHOOK_URL`) ou por polling.
+
+        Com SIGINT ou SIGTERM, o bot deixa de receber updates, espera as
+        perguntas em andamento terminarem e só então encerra.
+        """
+        try:
+            if self.webhook_url:
+                print(f"Iniciando bot do Telegram (webhook {self.webhook_url})...")
+                self.application.run_webhook(**self.webhook_options())
+            else:
+                print("Iniciando bot do Telegram (polling)...")
+                self.application.run_polling(allowed_updates=Update.ALL_TYPES)
+        finally:
+            self.close()
+    
+    def close(self) -> None:
+        """Para os watchers e libera o pipeline, os índices e o histórico de conversas."""
+        for watcher in self.watchers:
+            watcher.stop()
+        self.pipeline.close()
+        self.tenants.close()
+        self.chatbot_utils.conversation_manager.close()
@@ -0,0 +1,125 @@
+"""Pipeline assíncrono de perguntas do chatbot."""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import aclosing, asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from bot.rate_limit import ChatRateLimiter
+from bot.utils import ChatbotUtils
+from config import MAX_CONCURRENT_REQUESTS, MAX_PENDING_REQUESTS, RETRIEVAL_WORKERS
+from db.tenants import TenantRouter
+from metrics import REQUESTS_IN_FLIGHT, STAGE_SECONDS, span
+
+
+class PipelineBusyError(RuntimeError):
+    """Indica que a fila de perguntas pendentes está cheia."""
+
+
+class QuestionPipeline:
+    """Responde perguntas sem bloquear o event loop do bot.
+
+    A busca no índice do condomínio do chat roda em um pool de threads limitado e a geração usa o
+    caminho assíncrono da cadeia (`ainvoke`). Um semáforo limita quantas
+    perguntas são processadas ao mesmo tempo; as demais aguardam na fila até
+    `max_pending`. Perguntas de um mesmo chat são respondidas na ordem de
+    chegada, o que mantém o histórico da conversa consistente. Um chat que
+    passa do seu limite de taxa tem a pergunta recusada com
+    `RateLimitedError`, antes de entrar na fila.
+    """
+
+    def __init__(
+        self,
+        tenants: TenantRouter,
+        chatbot_utils: ChatbotUtils,
+        max_concurrent: int = MAX_CONCURRENT_REQUESTS,
+        max_pending: int = MAX_PENDING_REQUESTS,
+        retrieval_workers: int = RETRIEVAL_WORKERS,
+        chat_limiter: Optional[ChatRateLimiter] = None,
+    ):
+        self.tenants = tenants
+        self.chatbot_utils = chatbot_utils
+        self.chat_limiter = chat_limiter or ChatRateLimiter()
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(
+            max_workers=retrieval_workers,
+            thread_name_prefix="retrieval",
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._chat_locks: Dict[int, asyncio.Lock] = {}
+        self._chat_waiting: Dict[int, int] = {}
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        """Número de perguntas em processamento ou aguardando na fila."""
+        return self._pending
+
+    async def retrieve(self, query: str, chat_id: Optional[int] = None) -> Tuple[List[Document], List[float]]:
+        """Busca documentos relevantes no pool de threads, junto com o embedding da consulta."""
+        loop = asyncio.get_running_loop()
+        with span("retrieval"):
+            return await loop.run_in_executor(self._executor, self.tenants.search, chat_id, query)
+
+    @asynccontextmanager
+    async def _slot(self, chat_id: int) -> AsyncIterator[None]:
+        """Aguarda a vez do chat e uma vaga no limite de concorrência."""
+        if self._pending >= self.max_pending:
+            raise PipelineBusyError("Fila de perguntas cheia")
+        self.chat_limiter.check(chat_id)
+
+        self._pending += 1
+        REQUESTS_IN_FLIGHT.inc()
+        lock = self._acquire_chat_lock(chat_id)
+        start = time.perf_counter()
+        try:
+            async with lock:
+                async with self._semaphore:
+                    STAGE_SECONDS.observe(time.perf_counter() - start, stage="queue")
+                    yield
+        finally:
+            self._pending -= 1
+            REQUESTS_IN_FLIGHT.dec()
+            self._release_chat_lock(chat_id)
+
+    async def answer(self, chat_id: int, query: str) -> str:
+        """Responde a uma pergunta respeitando a ordem do chat e o limite de concorrência."""
+        async with self._slot(chat_id):
+            docs, embedding = await self.retrieve(query, chat_id)
+            return await self.chatbot_utils.agenerate_response(
+                query, docs, chat_id, query_embedding=embedding
+            )
+
+    async def stream(self, chat_id: int, query: str) -> AsyncIterator[str]:
+        """Como `answer`, mas entrega a resposta em trechos à medida que é gerada."""
+        async with self._slot(chat_id):
+            docs, embedding = await self.retrieve(query, chat_id)
+            # Fechado junto com este gerador, ainda dentro da vaga do pipeline
+            async with aclosing(self.chatbot_utils.astream_response(
+                query, docs, chat_id, query_embedding=embedding
+            )) as chunks:
+                async for chunk in chunks:
+                    yield chunk
+
+    def _acquire_chat_lock(self, chat_id: int) -> asyncio.Lock:
+        """Retorna o lock do chat, registrando mais uma pergunta aguardando."""
+        lock = self._chat_locks.get(chat_id)
+        if lock is None:
+            lock = self._chat_locks[chat_id] = asyncio.Lock()
+        self._chat_waiting[chat_id] = self._chat_waiting.get(chat_id, 0) + 1
+        return lock
+
+    def _release_chat_lock(self, chat_id: int) -> None:
+        """Descarta o lock do chat quando não há mais perguntas dele na fila."""
+        remaining = self._chat_waiting[chat_id] - 1
+        if remaining:
+            self._chat_waiting[chat_id] = remaining
+        else:
+            del self._chat_waiting[chat_id]
+            del self._chat_locks[chat_id]
+
+    def close(self) -> None:
+        """Encerra o pool de threads de busca."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
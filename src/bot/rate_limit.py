@@ -0,0 +1,102 @@
+"""Limites de taxa das perguntas (por chat) e das chamadas ao modelo (global)."""
+import asyncio
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Type
+
+from config import CHAT_RATE_PER_MINUTE, CHAT_BURST, CONVERSATION_MAX_CHATS
+
+
+class RateLimitedError(RuntimeError):
+    """Indica que o limite de taxa foi atingido; `retry_after` é a espera sugerida em segundos."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMOverloadedError(RateLimitedError):
+    """Indica que a fila de chamadas ao modelo de todo o processo passou de `LLM_MAX_WAIT`.
+
+    Não depende do chat: o limite atingido é o global (`LLM_RATE_PER_MINUTE`).
+    """
+
+
+class TokenBucket:
+    """Token bucket: `rate` tokens por segundo, acumulando no máximo `capacity`.
+
+    Uma reserva que não encontra token disponível deixa o saldo negativo e
+    recebe o tempo de espera até a sua vez, de modo que quem espera é
+    atendido na ordem de chegada. `rate` 0 desativa o limite. `error` é a
+    exceção lançada quando a espera passa do máximo.
+    """
+
+    def __init__(self, rate: float, capacity: float, error: Type[RateLimitedError] = RateLimitedError):
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self.error = error
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait: float = math.inf) -> float:
+        """Reserva um token e retorna quanto esperar por ele (0 se já disponível).
+
+        Se a espera passar de `max_wait`, nada é reservado e `self.error`
+        (por padrão, `RateLimitedError`) é lançado.
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = max(0.0, (1 - self._tokens) / self.rate)
+            if wait > max_wait:
+                raise self.error("Limite de taxa atingido", wait)
+            self._tokens -= 1
+            return wait
+
+    async def acquire(self, max_wait: float = math.inf) -> None:
+        """Aguarda (sem bloquear o event loop) até obter um token."""
+        wait = self.reserve(max_wait)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def acquire_blocking(self, max_wait: float = math.inf) -> None:
+        """Como `acquire`, bloqueando a thread."""
+        wait = self.reserve(max_wait)
+        if wait > 0:
+            time.sleep(wait)
+
+
+class ChatRateLimiter:
+    """Um token bucket por chat, para que um chat não monopolize o bot.
+
+    Perguntas acima do limite são recusadas de imediato. Apenas os
+    `max_chats` chats usados mais recentemente mantêm um bucket; um chat
+    esquecido volta com o bucket cheio, como se estivesse inativo.
+    """
+
+    def __init__(self, per_minute: float = CHAT_RATE_PER_MINUTE, burst: int = CHAT_BURST,
+                 max_chats: int = CONVERSATION_MAX_CHATS):
+        self.rate = per_minute / 60
+        self.burst = burst
+        self.max_chats = max_chats
+        self._buckets: "OrderedDict[int, TokenBucket]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check(self, chat_id: Optional[int]) -> None:
+        """Consome uma pergunta do chat ou lança `RateLimitedError`."""
+        if self.rate <= 0 or chat_id is None:
+            return
+        with self._lock:
+            bucket = self._buckets.get(chat_id)
+            if bucket is None:
+                bucket = self._buckets[chat_id] = TokenBucket(self.rate, self.burst)
+            self._buckets.move_to_end(chat_id)
+            while len(self._buckets) > self.max_chats:
+                self._buckets.popitem(last=False)
+        bucket.reserve(max_wait=0)
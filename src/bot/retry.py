@@ -0,0 +1,40 @@
+"""Novas tentativas com backoff exponencial para erros transitórios do modelo."""
+import asyncio
+import random
+
+from config import LLM_RETRY_BASE_DELAY, LLM_RETRY_MAX_DELAY
+
+# Erros de cota, sobrecarga ou tempo esgotado (google.api_core, httpx, openai)
+_RETRYABLE_NAMES = {
+    "ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "DeadlineExceeded",
+    "InternalServerError", "GatewayTimeout", "RateLimitError", "APITimeoutError",
+    "APIConnectionError", "ConnectError", "ReadTimeout", "RemoteProtocolError",
+}
+_RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+class LLMUnavailableError(RuntimeError):
+    """Indica que a chamada ao modelo falhou com erro transitório mesmo após as novas tentativas.
+
+    O erro original fica em `__cause__`.
+    """
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Indica se vale a pena repetir a chamada que falhou com `error`."""
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    for cause in (error, error.__cause__):
+        if cause is None:
+            continue
+        if type(cause).__name__ in _RETRYABLE_NAMES:
+            return True
+        status = getattr(cause, "code", None) or getattr(cause, "status_code", None)
+        if isinstance(status, int) and status in _RETRYABLE_STATUS:
+            return True
+    return False
+
+
+def backoff_delay(attempt: int, base: float = LLM_RETRY_BASE_DELAY, maximum: float = LLM_RETRY_MAX_DELAY) -> float:
+    """Espera antes da tentativa `attempt + 1`: exponencial com jitter completo."""
+    return random.uniform(0, min(maximum, base * 2 ** attempt))
@@ -0,0 +1,82 @@
+"""Coalescência de chamadas simultâneas idênticas ao modelo."""
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from metrics import CACHE_LOOKUPS
+
+
+class SingleFlight:
+    """Faz chamadas simultâneas com a mesma chave compartilharem um só resultado.
+
+    A primeira chamada de uma chave (a líder) executa o trabalho; as que
+    chegam enquanto ela está em andamento esperam e recebem o mesmo
+    resultado, ou a mesma exceção. Se a líder for cancelada, cada uma das
+    que esperavam passa a fazer o trabalho por conta própria.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    def pending(self, key: Hashable) -> Optional[asyncio.Future]:
+        """Resultado futuro da chamada em andamento com essa chave, se houver."""
+        return self._calls.get(key)
+
+    def begin(self, key: Hashable) -> asyncio.Future:
+        """Registra o início da chamada líder da chave."""
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        return future
+
+    def finish(self, key: Hashable, future: asyncio.Future, result: str) -> None:
+        """Entrega o resultado da líder a quem espera."""
+        self._forget(key, future)
+        if not future.done():
+            future.set_result(result)
+
+    def fail(self, key: Hashable, future: asyncio.Future, error: BaseException) -> None:
+        """Repassa a exceção da líder; um cancelamento libera quem espera para tentar sozinho."""
+        self._forget(key, future)
+        if future.done():
+            return
+        if isinstance(error, Exception):
+            future.set_exception(error)
+            # Evita o aviso de exceção não lida quando ninguém estava esperando
+            future.exception()
+        else:
+            future.cancel()
+
+    @staticmethod
+    async def wait(future: asyncio.Future) -> Optional[str]:
+        """Espera o resultado da líder; None se ela foi cancelada."""
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if future.cancelled():
+                return None
+            raise
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[str]]) -> Tuple[str, bool]:
+        """Executa `call` ou aproveita a chamada em andamento com a mesma chave.
+
+        Retorna o resultado e se ele veio de outra chamada.
+        """
+        future = self.pending(key)
+        if future is not None:
+            result = await self.wait(future)
+            if result is not None:
+                CACHE_LOOKUPS.inc(cache="single_flight", result="hit")
+                return result, True
+
+        CACHE_LOOKUPS.inc(cache="single_flight", result="miss")
+        future = self.begin(key)
+        try:
+            result = await call()
+        except BaseException as e:
+            self.fail(key, future, e)
+            raise
+        self.finish(key, future, result)
+        return result, False
+
+    def _forget(self, key: Hashable, future: asyncio.Future) -> None:
+        if self._calls.get(key) is future:
+            del self._calls[key]
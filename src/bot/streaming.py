@@ -0,0 +1,98 @@
+"""Envio de respostas longas e em streaming pelo Telegram."""
+import asyncio
+import time
+from datetime import timedelta
+from typing import List, Union
+
+from telegram import Message
+from telegram.error import BadRequest, RetryAfter
+
+from config import STREAM_EDIT_INTERVAL
+
+
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+
+def split_message(text: str, limit: int = TELEGRAM_MESSAGE_LIMIT) -> List[str]:
+    """Divide o texto em partes de até `limit` caracteres.
+
+    Prefere quebrar em fim de linha e, na falta dele, em espaço, para não
+    cortar itens de listas no meio. O corte de cada parte depende apenas do
+    texto até ela, então partes já completas não mudam quando o texto cresce.
+    """
+    parts = []
+    while len(text) > limit:
+        cut = text.rfind("\n", 0, limit + 1)
+        if cut <= 0:
+            cut = text.rfind(" ", 0, limit + 1)
+        if cut <= 0:
+            cut = limit
+        parts.append(text[:cut])
+        text = text[cut:].lstrip("\n")
+    if text:
+        parts.append(text)
+    return parts
+
+
+def _seconds(value: Union[int, float, timedelta]) -> float:
+    return value.total_seconds() if isinstance(value, timedelta) else float(value)
+
+
+class TelegramStreamWriter:
+    """Renderiza uma resposta em streaming editando a mensagem de resposta.
+
+    O texto acumulado é publicado no máximo a cada `edit_interval` segundos
+    (a primeira parte sai assim que chega), respeitando os limites de edição
+    do Telegram. Quando o texto passa de 4096 caracteres, a parte completa é
+    finalizada e uma nova mensagem é iniciada.
+    """
+
+    def __init__(self, reply_to: Message, edit_interval: float = STREAM_EDIT_INTERVAL):
+        self.reply_to = reply_to
+        self.edit_interval = edit_interval
+        self._text = ""
+        self._messages: List[Message] = []
+        self._sent: List[str] = []
+        self._next_update = 0.0
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+    async def write(self, delta: str) -> None:
+        """Acrescenta um trecho e publica se o intervalo mínimo já passou."""
+        self._text += delta
+        if self._text.strip() and time.monotonic() >= self._next_update:
+            await self._flush(final=False)
+
+    async def finish(self) -> None:
+        """Publica o texto completo."""
+        if self._text.strip():
+            await self._flush(final=True)
+
+    async def _flush(self, final: bool) -> None:
+        try:
+            await self._publish()
+        except RetryAfter as e:
+            delay = _seconds(e.retry_after)
+            if not final:
+                self._next_update = time.monotonic() + delay
+                return
+            await asyncio.sleep(delay)
+            await self._publish()
+        self._next_update = time.monotonic() + self.edit_interval
+
+    async def _publish(self) -> None:
+        for i, part in enumerate(split_message(self._text)):
+            if i < len(self._messages):
+                if self._sent[i] == part:
+                    continue
+                try:
+                    await self._messages[i].edit_text(part)
+                except BadRequest as e:
+                    if "not modified" not in str(e).lower():
+                        raise
+            else:
+                self._messages.append(await self.reply_to.reply_text(part))
+                self._sent.append("")
+            self._sent[i] = part
@@ -1,26 +1,61 @@
-from typing import List, Optional
+import asyncio
+import threading
+import time
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Dict, Hashable, List, NoReturn, Optional
+from langchain_core.language_models import BaseChatModel
+from langchain_core.callbacks import BaseCallbackHandler
 from langchain_core.documents import Document
-from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_core.outputs import LLMResult
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 
-from config import GOOGLE_API_KEY
+from config import (
+    GOOGLE_API_KEY, HISTORY_TOKEN_SHARE, LLM_RATE_PER_MINUTE, LLM_BURST, LLM_MAX_WAIT, LLM_MAX_RETRIES,
+    ANSWER_CACHE_FOLLOWUP_WINDOW,
+)
 from bot.conversation import ConversationManager
+from bot.answer_cache import AnswerCache
+from bot.context_builder import ContextBuilder
+from bot.rate_limit import LLMOverloadedError, TokenBucket
+from bot.retry import LLMUnavailableError, backoff_delay, is_retryable
+from bot.single_flight import SingleFlight
+from metrics import CACHE_LOOKUPS, ERRORS, LLM_TOKENS, STAGE_SECONDS, span
+
+
+NO_DOCUMENTS_RESPONSE = "Não encontrei informações relevantes sobre essa consulta nos documentos disponíveis."
+
+
+class TokenUsageCallback(BaseCallbackHandler):
+    """Registra os tokens de entrada e saída de cada chamada ao modelo."""
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    LLM_TOKENS.observe(usage.get("input_tokens", 0), kind="input")
+                    LLM_TOKENS.observe(usage.get("output_tokens", 0), kind="output")
 
 
 class ChatbotUtils:
     """Utilitários para o chatbot."""
 
-    def __init__(self):
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-2.0-flash",
-            google_api_key=GOOGLE_API_KEY,
-            temperature=0.7,
-            convert_system_message_to_human=True,
-            max_output_tokens=2048
-        )
+    def __init__(self, llm: Optional[BaseChatModel] = None, max_retries: int = LLM_MAX_RETRIES,
+                 followup_window: float = ANSWER_CACHE_FOLLOWUP_WINDOW):
+        # Sem `llm`, o cliente do Gemini só é criado no primeiro uso (ou por
+        # `load_llm`, durante o aquecimento): sua importação é lenta
+        self._llm = llm
+        self._chain = None
+        self._llm_lock = threading.Lock()
 
-        self.conversation_manager = ConversationManager(max_history=5)
+        self.conversation_manager = ConversationManager()
+        self.answer_cache = AnswerCache()
+        self.followup_window = followup_window
+        self.context_builder = ContextBuilder()
+        self.llm_limiter = TokenBucket(LLM_RATE_PER_MINUTE / 60, LLM_BURST, error=LLMOverloadedError)
+        self.max_retries = max_retries
+        self.single_flight = SingleFlight()
 
         # Inicializar o prompt template
         self.prompt = ChatPromptTemplate.from_messages([
@@ -54,41 +89,289 @@ class ChatbotUtils:
             """)
         ])
 
-        # Definir a cadeia de processamento
-        self.chain = self.prompt | self.llm | StrOutputParser()
+    @property
+    def llm(self) -> BaseChatModel:
+        """Modelo de linguagem, criado na primeira chamada se não foi fornecido."""
+        if self._llm is None:
+            with self._llm_lock:
+                if self._llm is None:
+                    self._llm = self._create_llm()
+        return self._llm
 
-    def format_documents(self, docs: List[Document]) -> str:
-        """Formata uma lista de documentos em texto para contexto."""
-        formatted_docs = []
-        for i, doc in enumerate(docs):
-            source = doc.metadata.get('source', f'Documento {i+1}')
-            formatted_docs.append(f"[{source}]:\n{doc.page_content}")
-        return "\n\n".join(formatted_docs)
+    @property
+    def chain(self):
+        """Cadeia prompt -> modelo -> texto, montada no primeiro uso."""
+        if self._chain is None:
+            self._chain = (self.prompt | self.llm | StrOutputParser()).with_config(
+                callbacks=[TokenUsageCallback()]
+            )
+        return self._chain
 
-    def generate_response(self, query: str, docs: List[Document], chat_id: Optional[int] = None) -> str:
-        """Gera uma resposta para a consulta com base nos documentos recuperados e histórico."""
-        if not docs:
-            return "Não encontrei informações relevantes sobre essa consulta nos documentos disponíveis."
+    def load_llm(self) -> None:
+        """Cria o cliente do modelo e a cadeia antes da primeira pergunta."""
+        self.chain
 
-        contexts = self.format_documents(docs)
+    @staticmethod
+    def _create_llm() -> BaseChatModel:
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
+        # As novas tentativas ficam a cargo de `_ainvoke`, que respeita o limite global
+        return ChatGoogleGenerativeAI(
+            model="gemini-2.0-flash",
+            google_api_key=GOOGLE_API_KEY,
+            temperature=0.7,
+            convert_system_message_to_human=True,
+            max_output_tokens=2048,
+            max_retries=0,
+        )
+
+    def format_documents(self, docs: List[Document], token_budget: Optional[int] = None) -> str:
+        """Formata os documentos em texto para contexto, unindo trechos sobrepostos
+        e respeitando o orçamento de tokens."""
+        return self.context_builder.build(docs, token_budget)
+
+    def _build_inputs(self, query: str, docs: List[Document], chat_id: Optional[int]) -> Dict[str, str]:
+        """Monta as entradas da cadeia e registra a pergunta no histórico.
+
+        O histórico usa no máximo `HISTORY_TOKEN_SHARE` do orçamento de
+        contexto; os documentos ficam com o restante.
+        """
+        budget = self.context_builder.token_budget
 
         # Adicionar a pergunta ao histórico
         if chat_id is not None:
             self.conversation_manager.add_message(chat_id, "user", query)
+            max_chars = self.context_builder.max_chars(budget * HISTORY_TOKEN_SHARE) if budget > 0 else None
             conversation_history = self.conversation_manager.format_history_for_prompt(
-                chat_id)
+                chat_id, max_chars=max_chars)
         else:
             conversation_history = ""
 
-        response = self.chain.invoke({
+        if budget > 0:
+            budget = max(1, budget - self.context_builder.estimate_tokens(conversation_history))
+        contexts = self.format_documents(docs, budget)
+
+        return {
             "contexts": contexts,
             "question": query,
             "conversation_history": conversation_history
-        })
+        }
 
-        # Adicionar a resposta ao histórico
+    def _record_response(self, chat_id: Optional[int], response: str) -> None:
+        """Adiciona a resposta ao histórico."""
         if chat_id is not None:
             self.conversation_manager.add_message(
                 chat_id, "assistant", response)
 
+    def _record_exchange(self, chat_id: Optional[int], query: str, response: str) -> None:
+        """Registra pergunta e resposta obtidas sem chamar o modelo (cache ou chamada compartilhada)."""
+        if chat_id is not None:
+            self.conversation_manager.add_message(chat_id, "user", query)
+            self._record_response(chat_id, response)
+
+    def _is_standalone_question(self, chat_id: Optional[int]) -> bool:
+        """Indica se a pergunta não depende do histórico e, portanto, pode usar o cache.
+
+        Só é tratada como continuação da conversa a pergunta feita até
+        `followup_window` segundos depois da última mensagem do chat; essas
+        consultas não usam o cache e são contadas à parte em CACHE_LOOKUPS
+        (`result="history"`).
+        """
+        if chat_id is None or self.followup_window <= 0:
+            return True
+        elapsed = self.conversation_manager.seconds_since_last_message(chat_id)
+        if elapsed is None or elapsed >= self.followup_window:
+            return True
+        CACHE_LOOKUPS.inc(cache="answer", result="history")
+        return False
+
+    def _cached_response(self, query: str, docs: List[Document], chat_id: Optional[int],
+                         query_embedding: Optional[List[float]]) -> Optional[str]:
+        """Retorna a resposta em cache, registrando a troca no histórico."""
+        response = self.answer_cache.get(query, docs, query_embedding)
+        if response is not None:
+            self._record_exchange(chat_id, query, response)
         return response
+
+    def _flight_key(self, query: str, docs: List[Document]) -> Hashable:
+        """Chave das chamadas equivalentes: mesma pergunta normalizada e mesmos chunks."""
+        return self.answer_cache.normalize_question(query), self.answer_cache.context_key(docs)
+
+    def _retry_delay(self, attempt: int, error: Exception) -> Optional[float]:
+        """Espera antes de repetir a chamada que falhou, ou None se não deve repetir."""
+        if attempt >= self.max_retries or not is_retryable(error):
+            return None
+        ERRORS.inc(stage="llm_retry", error=type(error).__name__)
+        return backoff_delay(attempt)
+
+    @staticmethod
+    def _give_up(error: Exception) -> NoReturn:
+        """Relança o erro da chamada ao modelo; erros transitórios viram `LLMUnavailableError`."""
+        if is_retryable(error):
+            raise LLMUnavailableError("Modelo indisponível após as novas tentativas") from error
+        raise error
+
+    def _invoke(self, inputs: Dict[str, str]) -> str:
+        """Chama a cadeia respeitando o limite global e repetindo erros transitórios."""
+        attempt = 0
+        while True:
+            self.llm_limiter.acquire_blocking(LLM_MAX_WAIT)
+            try:
+                with span("llm"):
+                    return self.chain.invoke(inputs)
+            except Exception as e:
+                delay = self._retry_delay(attempt, e)
+                if delay is None:
+                    self._give_up(e)
+            time.sleep(delay)
+            attempt += 1
+
+    async def _ainvoke(self, inputs: Dict[str, str]) -> str:
+        """Versão assíncrona de `_invoke`."""
+        attempt = 0
+        while True:
+            await self.llm_limiter.acquire(LLM_MAX_WAIT)
+            try:
+                with span("llm"):
+                    return await self.chain.ainvoke(inputs)
+            except Exception as e:
+                delay = self._retry_delay(attempt, e)
+                if delay is None:
+                    self._give_up(e)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def generate_response(self, query: str, docs: List[Document], chat_id: Optional[int] = None,
+                          query_embedding: Optional[List[float]] = None) -> str:
+        """Gera uma resposta para a consulta com base nos documentos recuperados e histórico.
+
+        Perguntas que não continuam uma conversa recente são respondidas
+        pelo cache quando possível; `query_embedding` habilita a busca por perguntas quase
+        idênticas.
+        """
+        if not docs:
+            return NO_DOCUMENTS_RESPONSE
+
+        use_cache = self._is_standalone_question(chat_id)
+        if use_cache:
+            cached = self._cached_response(query, docs, chat_id, query_embedding)
+            if cached is not None:
+                return cached
+
+        with span("prompt"):
+            inputs = self._build_inputs(query, docs, chat_id)
+        response = self._invoke(inputs)
+        self._record_response(chat_id, response)
+
+        if use_cache:
+            self.answer_cache.put(query, docs, response, query_embedding)
+        return response
+
+    async def agenerate_response(self, query: str, docs: List[Document], chat_id: Optional[int] = None,
+                                 query_embedding: Optional[List[float]] = None) -> str:
+        """Versão assíncrona de `generate_response`, usando `ainvoke` da cadeia.
+
+        Perguntas idênticas fora de uma conversa recente (mesma pergunta
+        normalizada e mesmos chunks) feitas ao mesmo tempo compartilham uma só chamada ao
+        modelo.
+        """
+        if not docs:
+            return NO_DOCUMENTS_RESPONSE
+
+        await self.conversation_manager.preload(chat_id)
+        use_cache = self._is_standalone_question(chat_id)
+        if not use_cache:
+            return await self._agenerate(query, docs, chat_id, query_embedding, use_cache=False)
+
+        cached = self._cached_response(query, docs, chat_id, query_embedding)
+        if cached is not None:
+            return cached
+
+        response, shared = await self.single_flight.do(
+            self._flight_key(query, docs),
+            lambda: self._agenerate(query, docs, chat_id, query_embedding, use_cache=True),
+        )
+        if shared:
+            self._record_exchange(chat_id, query, response)
+        return response
+
+    async def _agenerate(self, query: str, docs: List[Document], chat_id: Optional[int],
+                         query_embedding: Optional[List[float]], use_cache: bool) -> str:
+        with span("prompt"):
+            inputs = self._build_inputs(query, docs, chat_id)
+        response = await self._ainvoke(inputs)
+        self._record_response(chat_id, response)
+
+        if use_cache:
+            self.answer_cache.put(query, docs, response, query_embedding)
+        return response
+
+    async def astream_response(self, query: str, docs: List[Document], chat_id: Optional[int] = None,
+                               query_embedding: Optional[List[float]] = None) -> AsyncIterator[str]:
+        """Gera a resposta em trechos, usando `astream` da cadeia.
+
+        O histórico e o cache só são atualizados quando a resposta termina.
+        A etapa "llm" inclui o tempo de quem consome os trechos; o tempo até
+        o primeiro trecho é medido à parte ("llm_first_token"). Uma pergunta
+        idêntica a outra em andamento recebe a resposta dela, inteira, ao
+        final. Erros transitórios antes do primeiro trecho são repetidos.
+        """
+        if not docs:
+            yield NO_DOCUMENTS_RESPONSE
+            return
+
+        await self.conversation_manager.preload(chat_id)
+        use_cache = self._is_standalone_question(chat_id)
+        flight = None
+        if use_cache:
+            cached = self._cached_response(query, docs, chat_id, query_embedding)
+            if cached is not None:
+                yield cached
+                return
+
+            key = self._flight_key(query, docs)
+            pending = self.single_flight.pending(key)
+            if pending is not None:
+                shared = await self.single_flight.wait(pending)
+                if shared is not None:
+                    self._record_exchange(chat_id, query, shared)
+                    yield shared
+                    return
+            flight = (key, self.single_flight.begin(key))
+
+        try:
+            with span("prompt"):
+                inputs = self._build_inputs(query, docs, chat_id)
+            parts = []
+            attempt = 0
+            while True:
+                await self.llm_limiter.acquire(LLM_MAX_WAIT)
+                start = time.perf_counter()
+                try:
+                    with span("llm"):
+                        async with aclosing(self.chain.astream(inputs)) as chunks:
+                            async for chunk in chunks:
+                                if not parts:
+                                    STAGE_SECONDS.observe(time.perf_counter() - start, stage="llm_first_token")
+                                parts.append(chunk)
+                                yield chunk
+                    break
+                except Exception as e:
+                    # Depois do primeiro trecho a resposta já foi exibida; não há como repetir
+                    delay = None if parts else self._retry_delay(attempt, e)
+                    if delay is None:
+                        self._give_up(e)
+                await asyncio.sleep(delay)
+                attempt += 1
+        except BaseException as e:
+            if flight is not None:
+                self.single_flight.fail(*flight, e)
+            raise
+
+        response = "".join(parts)
+        self._record_response(chat_id, response)
+        if flight is not None:
+            self.single_flight.finish(*flight, response)
+
+        if use_cache:
+            self.answer_cache.put(query, docs, response, query_embedding)
@@ -7,6 +7,21 @@ load_dotenv()
 
 # Configurações do Telegram
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
+# Servidor da Bot API (vazio usa o oficial; útil para um servidor local ou falso)
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "")
+# Updates processados ao mesmo tempo (a ordem por chat é garantida pelo pipeline)
+MAX_CONCURRENT_UPDATES = int(os.getenv("MAX_CONCURRENT_UPDATES", 256))
+
+# Webhook (WEBHOOK_URL vazio usa polling). O servidor escuta em
+# WEBHOOK_LISTEN:WEBHOOK_PORT/WEBHOOK_PATH; com WEBHOOK_CERT e WEBHOOK_KEY, o
+# TLS termina no próprio bot. WEBHOOK_SECRET_TOKEN é conferido em cada update.
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", 8443))
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "telegram")
+WEBHOOK_SECRET_TOKEN = os.getenv("WEBHOOK_SECRET_TOKEN") or None
+WEBHOOK_CERT = os.getenv("WEBHOOK_CERT") or None
+WEBHOOK_KEY = os.getenv("WEBHOOK_KEY") or None
 
 # Configurações de API
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
@@ -18,4 +33,109 @@ CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", 1000))
 CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", 200))
 
 # Caminhos
-PDF_DIR = Path(os.getenv("PDF_DIR", "./data/pdfs"))
\ No newline at end of file
+PDF_DIR = Path(os.getenv("PDF_DIR", "./data/pdfs"))
+
+# Texto extraído dos PDFs: cache por hash do arquivo (PAGE_CACHE_DIR vazio
+# desativa) e idioma do OCR de páginas digitalizadas (OCR_LANGUAGE vazio
+# desativa; requer o Tesseract)
+PAGE_CACHE_DIR = os.getenv("PAGE_CACHE_DIR", "./data/page_cache")
+PAGE_CACHE_DIR = Path(PAGE_CACHE_DIR) if PAGE_CACHE_DIR else None
+OCR_LANGUAGE = os.getenv("OCR_LANGUAGE", "por")
+
+# Vários condomínios no mesmo processo: TENANTS_FILE (JSON) associa chats a
+# condomínios, cada um com PDFs e índice próprios em TENANTS_DIR/<nome>; os
+# índices usados há mais tempo são descarregados acima de
+# INDEX_MEMORY_BUDGET_MB (0 desativa o limite)
+TENANTS_FILE = Path(os.environ["TENANTS_FILE"]) if os.getenv("TENANTS_FILE") else None
+TENANTS_DIR = Path(os.getenv("TENANTS_DIR", "./data/condominios"))
+INDEX_MEMORY_BUDGET_MB = int(os.getenv("INDEX_MEMORY_BUDGET_MB", 1024))
+
+# Observação do diretório de PDFs (PDF_WATCH ativa a atualização automática
+# do índice; intervalos em segundos)
+PDF_WATCH = os.getenv("PDF_WATCH", "false").lower() in ("1", "true", "yes")
+PDF_WATCH_INTERVAL = float(os.getenv("PDF_WATCH_INTERVAL", 2.0))
+PDF_WATCH_DEBOUNCE = float(os.getenv("PDF_WATCH_DEBOUNCE", 5.0))
+# Atualizações incrementais são gravadas em disco juntas, no máximo uma vez a
+# cada INDEX_SAVE_DELAY segundos (0 grava a cada atualização)
+INDEX_SAVE_DELAY = float(os.getenv("INDEX_SAVE_DELAY", 30.0))
+
+# Pipeline de perguntas
+MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", 8))
+MAX_PENDING_REQUESTS = int(os.getenv("MAX_PENDING_REQUESTS", 64))
+RETRIEVAL_WORKERS = int(os.getenv("RETRIEVAL_WORKERS", 4))
+
+# Limites de taxa: perguntas por chat (recusadas acima do limite) e chamadas
+# ao modelo no processo (aguardam até LLM_MAX_WAIT segundos); 0 desativa.
+# Erros transitórios do modelo são repetidos até LLM_MAX_RETRIES vezes,
+# com backoff exponencial e jitter (atrasos em segundos)
+CHAT_RATE_PER_MINUTE = float(os.getenv("CHAT_RATE_PER_MINUTE", 10))
+CHAT_BURST = int(os.getenv("CHAT_BURST", 3))
+LLM_RATE_PER_MINUTE = float(os.getenv("LLM_RATE_PER_MINUTE", 60))
+LLM_BURST = int(os.getenv("LLM_BURST", 10))
+LLM_MAX_WAIT = float(os.getenv("LLM_MAX_WAIT", 30))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 4))
+LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", 1.0))
+LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", 20.0))
+
+# Ingestão de PDFs
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", os.cpu_count() or 1))
+INGEST_PAGES_PER_TASK = int(os.getenv("INGEST_PAGES_PER_TASK", 8))
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", 256))
+
+# Cache de respostas (ANSWER_CACHE_TTL em segundos; ANSWER_CACHE_SIMILARITY=0
+# desativa a busca por perguntas quase idênticas). Perguntas feitas até
+# ANSWER_CACHE_FOLLOWUP_WINDOW segundos após a última mensagem do chat são
+# tratadas como continuação da conversa e não usam o cache (0 usa sempre)
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", 1024))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", 24 * 60 * 60))
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", 0.95))
+ANSWER_CACHE_FOLLOWUP_WINDOW = float(os.getenv("ANSWER_CACHE_FOLLOWUP_WINDOW", 10 * 60))
+
+# Embeddings de consultas (EMBED_BATCH_WINDOW_MS=0 desativa os micro-lotes)
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", 2048))
+EMBED_BATCH_WINDOW_MS = float(os.getenv("EMBED_BATCH_WINDOW_MS", 5))
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", 32))
+
+# Índice FAISS
+INDEX_MMAP = os.getenv("INDEX_MMAP", "true").lower() in ("1", "true", "yes")
+INDEX_TYPE = os.getenv("INDEX_TYPE", "flat").lower()
+HNSW_M = int(os.getenv("HNSW_M", 32))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", 80))
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", 64))
+IVF_NLIST = int(os.getenv("IVF_NLIST", 256))
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", 16))
+PQ_M = int(os.getenv("PQ_M", 48))
+PQ_NBITS = int(os.getenv("PQ_NBITS", 8))
+
+# Respostas em streaming (STREAM_EDIT_INTERVAL em segundos entre edições)
+STREAM_RESPONSES = os.getenv("STREAM_RESPONSES", "true").lower() in ("1", "true", "yes")
+STREAM_EDIT_INTERVAL = float(os.getenv("STREAM_EDIT_INTERVAL", 1.5))
+
+# Histórico de conversas (CONVERSATION_TTL em segundos de inatividade;
+# CONVERSATION_DB vazio mantém o histórico apenas em memória)
+CONVERSATION_MAX_HISTORY = int(os.getenv("CONVERSATION_MAX_HISTORY", 5))
+CONVERSATION_TTL = float(os.getenv("CONVERSATION_TTL", 24 * 60 * 60))
+CONVERSATION_MAX_CHATS = int(os.getenv("CONVERSATION_MAX_CHATS", 10000))
+CONVERSATION_MAX_CHARS = int(os.getenv("CONVERSATION_MAX_CHARS", 20_000_000))
+CONVERSATION_DB = Path(os.environ["CONVERSATION_DB"]) if os.getenv("CONVERSATION_DB") else None
+CONVERSATION_FLUSH_INTERVAL = float(os.getenv("CONVERSATION_FLUSH_INTERVAL", 2.0))
+
+# Contexto do prompt (CONTEXT_TOKEN_BUDGET=0 desativa o limite; tokens são
+# estimados por CHARS_PER_TOKEN caracteres)
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 3000))
+CHARS_PER_TOKEN = float(os.getenv("CHARS_PER_TOKEN", 4))
+HISTORY_TOKEN_SHARE = float(os.getenv("HISTORY_TOKEN_SHARE", 0.25))
+
+# Busca: número de chunks recuperados e busca híbrida (vetorial + BM25 via
+# SQLite FTS5), combinada por reciprocal rank fusion
+SEARCH_K = int(os.getenv("SEARCH_K", 4))
+HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "true").lower() in ("1", "true", "yes")
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", 20))
+RRF_K = int(os.getenv("RRF_K", 60))
+
+# Métricas: endpoint Prometheus local (METRICS_PORT=0 desativa), amostras
+# recentes usadas nos percentis do /stats e chats autorizados a usar /stats
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", 9464))
+METRICS_SAMPLE_SIZE = int(os.getenv("METRICS_SAMPLE_SIZE", 1024))
+ADMIN_CHAT_IDS = {int(chat_id) for chat_id in os.getenv("ADMIN_CHAT_IDS", "").split(",") if chat_id.strip()}
@@ -0,0 +1,132 @@
+"""Compara os tipos de índice FAISS no corpus de PDFs configurado.
+
+Mede recall@k em relação ao índice flat (exato), latência p50/p99 por
+consulta, tempo de construção e memória de cada índice.
+
+Uso:
+    PYTHONPATH=src python -m db.benchmark_index [--k 6] [--queries perguntas.txt]
+        [--types flat,hnsw,ivf_flat,ivf_pq] [--nprobe 4,16,64] [--ef-search 32,64,128]
+
+Sem `--queries`, as consultas são trechos iniciais de chunks sorteados do
+próprio corpus.
+"""
+import argparse
+import random
+import time
+from typing import Dict, List, Optional
+
+import faiss
+import numpy as np
+
+from config import (
+    PDF_DIR, INGEST_BATCH_SIZE, HNSW_M, HNSW_EF_CONSTRUCTION, HNSW_EF_SEARCH,
+    IVF_NLIST, IVF_NPROBE, PQ_M, PQ_NBITS,
+)
+from db.faiss_db import get_embeddings
+from db.index_factory import INDEX_TYPES, apply_search_params, build_index, validate_index_type
+from db.pdf_processor import PDFProcessor
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(",") if item]
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, default=6, help="número de resultados por consulta")
+    parser.add_argument("--queries", help="arquivo com uma pergunta por linha")
+    parser.add_argument("--num-queries", type=int, default=200, help="consultas sorteadas do corpus")
+    parser.add_argument("--types", default=",".join(INDEX_TYPES), help="tipos de índice a comparar")
+    parser.add_argument("--nprobe", type=_int_list, default=[IVF_NPROBE], help="valores de nprobe (IVF)")
+    parser.add_argument("--ef-search", type=_int_list, default=[HNSW_EF_SEARCH], help="valores de efSearch (HNSW)")
+    parser.add_argument("--nlist", type=int, default=IVF_NLIST)
+    parser.add_argument("--hnsw-m", type=int, default=HNSW_M)
+    parser.add_argument("--pq-m", type=int, default=PQ_M)
+    parser.add_argument("--pq-nbits", type=int, default=PQ_NBITS)
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args(argv)
+
+
+def embed_corpus(texts: List[str]) -> np.ndarray:
+    """Embute os textos em lotes com o modelo configurado."""
+    embeddings = get_embeddings()
+    vectors = []
+    for start in range(0, len(texts), INGEST_BATCH_SIZE):
+        vectors.extend(embeddings.embed_documents(texts[start:start + INGEST_BATCH_SIZE]))
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def measure(index: faiss.Index, queries: np.ndarray, ground_truth: np.ndarray, k: int) -> Dict[str, float]:
+    """Executa as consultas uma a uma, como no bot, e calcula recall e latências."""
+    latencies = []
+    hits = 0
+    for query, expected in zip(queries, ground_truth):
+        start = time.perf_counter()
+        _, found = index.search(query.reshape(1, -1), k)
+        latencies.append(time.perf_counter() - start)
+        hits += len(set(found[0]) & set(expected))
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "recall": hits / (len(queries) * k),
+        "p50": float(np.percentile(latencies_ms, 50)),
+        "p99": float(np.percentile(latencies_ms, 99)),
+        "memory_mb": len(faiss.serialize_index(index)) / (1024 * 1024),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    index_types = [validate_index_type(name) for name in args.types.split(",") if name]
+
+    chunks = list(PDFProcessor().iter_chunks())
+    if not chunks:
+        print(f"Nenhum chunk encontrado em {PDF_DIR}.")
+        return
+    texts = [chunk.page_content for chunk in chunks]
+
+    if args.queries:
+        with open(args.queries, encoding="utf-8") as f:
+            query_texts = [line.strip() for line in f if line.strip()]
+    else:
+        rng = random.Random(args.seed)
+        sample = rng.sample(texts, min(args.num_queries, len(texts)))
+        query_texts = [text[:200] for text in sample]
+
+    print(f"Embutindo {len(texts)} chunks e {len(query_texts)} consultas...")
+    vectors = embed_corpus(texts)
+    queries = embed_corpus(query_texts)
+    k = min(args.k, len(texts))
+
+    flat = build_index(vectors, "flat")
+    _, ground_truth = flat.search(queries, k)
+
+    print(f"\n{'índice':<28}{'recall@' + str(k):>10}{'p50 ms':>10}{'p99 ms':>10}{'memória MB':>12}{'build s':>10}")
+    for index_type in index_types:
+        start = time.perf_counter()
+        index = build_index(
+            vectors, index_type,
+            hnsw_m=args.hnsw_m, ef_construction=HNSW_EF_CONSTRUCTION,
+            nlist=args.nlist, pq_m=args.pq_m, pq_nbits=args.pq_nbits,
+        )
+        build_time = time.perf_counter() - start
+
+        if index_type == "hnsw":
+            settings = [(f"efSearch={ef}", {"ef_search": ef}) for ef in args.ef_search]
+        elif index_type in ("ivf_flat", "ivf_pq"):
+            settings = [(f"nprobe={nprobe}", {"nprobe": nprobe}) for nprobe in args.nprobe]
+        else:
+            settings = [("", {})]
+
+        for label, params in settings:
+            apply_search_params(index, **params)
+            result = measure(index, queries, ground_truth, k)
+            name = f"{index_type} {label}".strip()
+            print(
+                f"{name:<28}{result['recall']:>10.3f}{result['p50']:>10.3f}"
+                f"{result['p99']:>10.3f}{result['memory_mb']:>12.2f}{build_time:>10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,86 +1,789 @@
+import copy
 import os
+import shutil
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Optional
+from typing import TYPE_CHECKING, Callable, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
 
-from langchain_community.vectorstores import FAISS
+import numpy as np
 from langchain_core.documents import Document
-from langchain_core.vectorstores import VectorStore
-from langchain_huggingface import HuggingFaceEmbeddings
+from langchain_core.embeddings import Embeddings
 
-from config import EMBEDDING_MODEL
+from config import (
+    PDF_DIR, EMBEDDING_MODEL, INGEST_BATCH_SIZE, INDEX_MMAP, INDEX_TYPE, INDEX_SAVE_DELAY,
+    SEARCH_K, HYBRID_SEARCH, HYBRID_CANDIDATES, RRF_K,
+)
+from db.index_factory import (
+    apply_search_params, build_index, create_empty_index, reconstruct_vectors,
+    requires_training, supports_removal, validate_index_type,
+)
+from db.index_manifest import IndexManifest, ManifestDiff
 from db.pdf_processor import PDFProcessor
+from db.query_embedder import QueryEmbedder
+from db.sqlite_docstore import DOCSTORE_FILENAME, SQLiteDocstore
+from metrics import span
+
+if TYPE_CHECKING:
+    import faiss
+    from langchain_community.vectorstores import FAISS
+
+
+INDEX_FILENAME = "index.faiss"
+LEGACY_DOCSTORE_FILENAME = "index.pkl"
+
+
+_embeddings_lock = threading.Lock()
+_shared_embeddings: Dict[str, Embeddings] = {}
+
+_shared_query_embedders: Dict[str, QueryEmbedder] = {}
+
+_manager_lock = threading.Lock()
+_shared_manager: Optional["FAISSManager"] = None
+
+
+def get_embeddings(model_name: str = EMBEDDING_MODEL) -> Embeddings:
+    """Retorna o modelo de embeddings do processo, carregando-o na primeira chamada."""
+    with _embeddings_lock:
+        embeddings = _shared_embeddings.get(model_name)
+        if embeddings is None:
+            # Importado só aqui: carrega sentence-transformers/torch, a parte mais
+            # lenta da inicialização
+            from langchain_huggingface import HuggingFaceEmbeddings
+            embeddings = HuggingFaceEmbeddings(model_name=model_name)
+            _shared_embeddings[model_name] = embeddings
+        return embeddings
+
+
+def get_query_embedder(model_name: str = EMBEDDING_MODEL) -> QueryEmbedder:
+    """Retorna o QueryEmbedder (cache + micro-lotes) do modelo compartilhado."""
+    embeddings = get_embeddings(model_name)
+    with _embeddings_lock:
+        query_embedder = _shared_query_embedders.get(model_name)
+        if query_embedder is None:
+            query_embedder = QueryEmbedder(embeddings)
+            _shared_query_embedders[model_name] = query_embedder
+        return query_embedder
+
+
+def read_index(path: Path, mmap: bool = INDEX_MMAP) -> Tuple["faiss.Index", bool]:
+    """Lê um índice FAISS do disco, via mmap somente leitura quando possível.
+
+    Retorna o índice e se ele foi mapeado em memória. Um índice mapeado é
+    compartilhado pelo page cache entre processos, mas não pode ser
+    modificado.
+    """
+    import faiss
+    if mmap:
+        for flag_name in ("IO_FLAG_MMAP_IFC", "IO_FLAG_MMAP"):
+            flag = getattr(faiss, flag_name, None)
+            if flag is None:
+                continue
+            try:
+                return faiss.read_index(str(path), flag | faiss.IO_FLAG_READ_ONLY), True
+            except RuntimeError:
+                continue
+    return faiss.read_index(str(path)), False
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = RRF_K) -> List[str]:
+    """Funde listas de ids ordenadas por relevância pela soma de 1 / (k + posição)."""
+    scores: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] += 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+def get_faiss_manager() -> "FAISSManager":
+    """Retorna o FAISSManager compartilhado pelo processo (inicialização, bot e comandos)."""
+    global _shared_manager
+    with _manager_lock:
+        if _shared_manager is None:
+            _shared_manager = FAISSManager()
+        return _shared_manager
 
 
 class FAISSManager:
     """Gerencia o banco de dados vetorial FAISS."""
-    
-    def __init__(self, embedding_model: str = EMBEDDING_MODEL):
-        self.embeddings = HuggingFaceEmbeddings(model_name=embedding_model)
-        self.pdf_processor = PDFProcessor()
-        self.index_path = Path("./data/faiss_index")
-        self.db: Optional[VectorStore] = None
-        
-    def create_or_load_index(self, force_reload: bool = False) -> VectorStore:
-        """Cria um novo índice ou carrega um existente."""
+
+    def __init__(self, embedding_model: str = EMBEDDING_MODEL, embeddings: Optional[Embeddings] = None,
+                 index_type: str = INDEX_TYPE, hybrid_search: bool = HYBRID_SEARCH,
+                 index_path: Path = Path("./data/faiss_index"), pdf_dir: Path = PDF_DIR,
+                 save_delay: float = INDEX_SAVE_DELAY):
+        self.embedding_model = embedding_model
+        self.index_type = validate_index_type(index_type)
+        self.hybrid_search = hybrid_search
+        self._embeddings = embeddings
+        self._query_embedder: Optional[QueryEmbedder] = None
+        self.pdf_processor = PDFProcessor(pdf_dir)
+        self.index_path = Path(index_path)
+        self.db: Optional["FAISS"] = None
+        self.manifest: Optional[IndexManifest] = None
+        self._index_mmapped = False
+        self._lock = threading.RLock()
+        self._change_listeners: List[Callable[[], None]] = []
+        self._update_listeners: List[Callable[[], None]] = []
+        self._schedule_lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._scheduled: Optional[Future] = None
+        self._scheduled_full = False
+        self._scheduled_documents: List[Document] = []
+        # Versão substituída na última troca: buscas em andamento ainda podem
+        # usá-la, então só é fechada e apagada na troca seguinte
+        self._retired: Optional[Tuple["FAISS", Optional[Path]]] = None
+        # Mudanças incrementais ainda não gravadas e chunks removidos do índice
+        # que só saem do docstore na gravação
+        self.save_delay = save_delay
+        self._dirty = False
+        self._stale_ids: FrozenSet[str] = frozenset()
+        self._save_timer: Optional[threading.Timer] = None
+        # Ids presentes no índice em uso, para filtrar a busca lexical
+        self._indexed_ids: Optional[Tuple["FAISS", FrozenSet[str]]] = None
+
+    @property
+    def embeddings(self) -> Embeddings:
+        """Modelo de embeddings, carregado sob demanda e compartilhado entre instâncias."""
+        if self._embeddings is None:
+            self._embeddings = get_embeddings(self.embedding_model)
+        return self._embeddings
+
+    @property
+    def query_embedder(self) -> QueryEmbedder:
+        """Embedder de consultas com cache LRU e micro-lotes."""
+        if self._query_embedder is None:
+            if self._embeddings is None:
+                self._query_embedder = get_query_embedder(self.embedding_model)
+            else:
+                self._query_embedder = QueryEmbedder(self._embeddings)
+        return self._query_embedder
+
+    def add_change_listener(self, listener: Callable[[], None]) -> None:
+        """Registra uma função chamada sempre que o conteúdo do índice muda."""
+        self._change_listeners.append(listener)
+
+    def _notify_index_changed(self) -> None:
+        for listener in self._change_listeners:
+            listener()
+
+    def add_update_listener(self, listener: Callable[[], None]) -> None:
+        """Registra uma função chamada, fora do lock, ao fim de cada atualização
+        em segundo plano (com ou sem mudanças) e de cada gravação agrupada.
+        """
+        self._update_listeners.append(listener)
+
+    def _notify_updated(self) -> None:
+        for listener in self._update_listeners:
+            try:
+                listener()
+            except Exception as e:
+                print(f"Erro ao notificar o fim da atualização do índice: {e}")
+
+    @property
+    def memory_bytes(self) -> int:
+        """Tamanho aproximado do índice carregado (0 se não estiver carregado)."""
+        if self.db is None:
+            return 0
+        try:
+            return (self.index_path / INDEX_FILENAME).stat().st_size
+        except OSError:
+            return 0
+
+    def unload(self) -> bool:
+        """Tira o índice da memória; a próxima busca o carrega de novo do disco.
+
+        Buscas em andamento terminam com o índice que já tinham em mãos. Não
+        faz nada (e retorna False) durante uma atualização do índice ou com
+        mudanças ainda não gravadas.
+        """
+        if not self._lock.acquire(blocking=False):
+            return False
+        try:
+            if self._dirty:
+                return False
+            self.db = None
+            self.manifest = None
+            self._index_mmapped = False
+        finally:
+            self._lock.release()
+        return True
+
+    def create_or_load_index(self, force_reload: bool = False) -> "FAISS":
+        """Carrega o índice existente ou o cria; com `force_reload`, recria-o a partir dos PDFs.
+
+        A recriação é feita em um diretório novo, e o índice anterior continua
+        atendendo às buscas até a troca.
+        """
+        with self._lock:
+            return self._create_or_load_index(force_reload)
+
+    def _create_or_load_index(self, force_reload: bool) -> "FAISS":
         if self.db is not None and not force_reload:
             return self.db
-        
-        # Se force_reload é True ou o índice não existe, remover diretório do índice
-        if force_reload and self.index_path.exists():
-            import shutil
-            print("Removendo índice FAISS existente...")
-            shutil.rmtree(self.index_path)
-        
+
         if self.index_path.exists() and not force_reload:
             print("Carregando índice FAISS existente...")
             try:
-                self.db = FAISS.load_local(str(self.index_path), self.embeddings)
+                self.db = self._load_store()
+                self.manifest = IndexManifest.load(self.index_path)
                 print(f"Índice FAISS carregado com sucesso.")
                 return self.db
             except Exception as e:
                 print(f"Erro ao carregar índice FAISS: {e}")
                 print("Criando novo índice...")
-        
-        # Processar PDFs e criar novo índice
-        documents = self.pdf_processor.process_pdfs()
-        
-        if not documents:
+
+        self._build_version()
+        return self.db
+
+    def request_update(self, full: bool = False) -> "Future[ManifestDiff]":
+        """Agenda a atualização do índice em segundo plano.
+
+        Pedidos feitos antes de a atualização agendada começar são reunidos em
+        uma só (completa, se algum deles pediu `full`). As buscas continuam
+        usando o índice atual até a nova versão ficar pronta.
+        """
+        return self._schedule(full=full)
+
+    def add_documents(self, documents: List[Document]) -> "Future[ManifestDiff]":
+        """Agenda a inclusão de documentos avulsos no índice, sem bloquear.
+
+        Documentos enviados antes de a próxima atualização começar entram
+        juntos no índice. Eles ficam registrados no manifesto e são mantidos
+        quando o índice é recriado a partir dos PDFs.
+        """
+        return self._schedule(documents=documents)
+
+    def _schedule(self, full: bool = False, documents: Optional[List[Document]] = None) -> "Future[ManifestDiff]":
+        with self._schedule_lock:
+            if documents:
+                self._scheduled_documents.extend(documents)
+            if self._scheduled is not None:
+                self._scheduled_full = self._scheduled_full or full
+                return self._scheduled
+
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="index-update")
+            self._scheduled = Future()
+            self._scheduled_full = full
+            future = self._scheduled
+            self._executor.submit(self._run_scheduled_update)
+            return future
+
+    def _run_scheduled_update(self) -> None:
+        with self._schedule_lock:
+            future, full, documents = self._scheduled, self._scheduled_full, self._scheduled_documents
+            self._scheduled = None
+            self._scheduled_documents = []
+        if not future.set_running_or_notify_cancel():
+            return
+
+        result: Optional[ManifestDiff] = None
+        error: Optional[BaseException] = None
+        try:
+            with self._lock:
+                if full:
+                    result = self._build_version(documents)
+                else:
+                    if self.db is None:
+                        self._create_or_load_index(force_reload=False)
+                    result = self._update_index(documents)
+        except BaseException as e:
+            error = e
+        # Mesmo sem mudanças, a atualização pode ter carregado o índice; avisa
+        # antes de entregar o resultado a quem espera
+        self._notify_updated()
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def close(self) -> None:
+        """Encerra o worker de atualização, cancelando pedidos que ainda não começaram.
+
+        Mudanças incrementais ainda não gravadas são gravadas agora.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._save_timer is not None:
+            self._save_timer.cancel()
+        if self._dirty:
+            self._save_pending()
+        # Sem esperar uma atualização em andamento, que ainda usa o lock
+        if self._lock.acquire(blocking=False):
+            try:
+                self._release_retired()
+            finally:
+                self._lock.release()
+
+    @property
+    def _versions_path(self) -> Path:
+        return self.index_path.with_name(self.index_path.name + ".versions")
+
+    def _build_version(self, documents: Optional[List[Document]] = None) -> ManifestDiff:
+        """Recria o índice a partir de todos os PDFs em outro diretório e o coloca em uso.
+
+        A versão nova também recebe os `documents` avulsos, além dos que já
+        estavam no índice atual. Enquanto isso, `self.db` continua sendo a
+        versão atual.
+        """
+        documents = self._loose_documents() + list(documents or [])
+        self._remove_stale_versions()
+        version_path = self._versions_path / f"{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        builder = FAISSManager(
+            self.embedding_model, self.embeddings, self.index_type, self.hybrid_search,
+            index_path=version_path, pdf_dir=self.pdf_processor.pdf_dir,
+        )
+        builder.pdf_processor = self.pdf_processor
+
+        try:
+            builder._build_in_place()
+            if documents:
+                builder._add_loose_documents(documents)
+                print(f"Adicionados {len(documents)} documentos ao índice FAISS.")
+            builder._save_index()
+        except BaseException:
+            builder._close_store()
+            shutil.rmtree(version_path, ignore_errors=True)
+            raise
+
+        self._activate_version(builder, version_path)
+        self._notify_index_changed()
+        return ManifestDiff(added=self.pdf_processor.get_pdf_files())
+
+    def _activate_version(self, builder: "FAISSManager", version_path: Path) -> None:
+        """Aponta `index_path` para a nova versão (troca atômica de symlink) e passa a usá-la."""
+        previous: Optional[Path] = None
+        if self.index_path.is_symlink():
+            previous = self.index_path.resolve()
+        elif self.index_path.exists():
+            # Layout antigo, com o índice direto em `index_path`
+            previous = self._versions_path / f"anterior-{uuid.uuid4().hex[:8]}"
+            os.rename(self.index_path, previous)
+
+        link = self.index_path.with_name(f".{self.index_path.name}-{uuid.uuid4().hex[:8]}.tmp")
+        os.symlink(os.path.relpath(version_path, self.index_path.parent), link)
+        os.replace(link, self.index_path)
+
+        # Buscas em andamento terminam com a versão anterior, que o docstore
+        # pode ainda precisar abrir (uma conexão por thread); ela só é fechada e
+        # apagada na próxima troca
+        self._release_retired()
+        if previous is not None:
+            previous = previous.resolve()
+            if previous == version_path.resolve():
+                previous = None
+        if self.db is not None or previous is not None:
+            self._retired = (self.db, previous)
+        self.db = builder.db
+        self.manifest = builder.manifest
+        self._index_mmapped = builder._index_mmapped
+        # Mudanças pendentes eram da versão anterior, que a nova já inclui
+        self._dirty = False
+        self._stale_ids = frozenset()
+        print(f"Índice FAISS em uso: {version_path.name}")
+
+    def _release_retired(self) -> None:
+        """Fecha e apaga a versão substituída na troca anterior."""
+        if self._retired is None:
+            return
+        db, path = self._retired
+        self._retired = None
+        if db is not None and isinstance(db.docstore, SQLiteDocstore):
+            db.docstore.close()
+        if path is not None:
+            shutil.rmtree(path, ignore_errors=True)
+
+    def _remove_stale_versions(self) -> None:
+        """Remove versões e links temporários deixados por atualizações interrompidas."""
+        current = self.index_path.resolve() if self.index_path.is_symlink() else None
+        retired = self._retired[1] if self._retired is not None else None
+        if self._versions_path.exists():
+            for path in self._versions_path.iterdir():
+                if path.resolve() not in (current, retired):
+                    shutil.rmtree(path, ignore_errors=True)
+        for link in self.index_path.parent.glob(f".{self.index_path.name}-*.tmp"):
+            link.unlink(missing_ok=True)
+
+    def _build_in_place(self) -> None:
+        """Cria o índice a partir de todos os PDFs diretamente em `index_path`."""
+        self._close_store()
+        if self.index_path.exists():
+            print("Removendo índice FAISS existente...")
+            shutil.rmtree(self.index_path)
+
+        # Processar PDFs e criar novo índice, embutindo os chunks em lotes
+        pdf_files = self.pdf_processor.get_pdf_files()
+        self.manifest = IndexManifest(index_type=self.index_type)
+        print(f"Criando índice FAISS ({self.index_type})...")
+        self.db = self._new_store()
+        ids_by_file = self._embed_in_batches(self.pdf_processor.iter_chunks(pdf_files), self.db)
+
+        if not ids_by_file:
             print("Nenhum documento para indexar.")
             # Criar um índice vazio
-            self.db = FAISS.from_documents(
-                [Document(page_content="Índice vazio. Nenhum PDF carregado.")], 
-                self.embeddings
-            )
+            self._add_placeholder(self.db)
         else:
-            print(f"Criando índice FAISS com {len(documents)} documentos...")
-            self.db = FAISS.from_documents(documents, self.embeddings)
-            
+            if requires_training(self.index_type):
+                print(f"Treinando índice {self.index_type}...")
+                self.db.index = build_index(reconstruct_vectors(self.db.index), self.index_type)
+            print(f"Índice FAISS criado com {self.db.index.ntotal} documentos.")
+        apply_search_params(self.db.index)
+
+        for pdf_path in pdf_files:
+            self.manifest.set_file(pdf_path, ids_by_file.get(str(pdf_path), []))
+
+    def _new_store(self, dim: Optional[int] = None) -> "FAISS":
+        """Cria um índice vazio com docstore SQLite no diretório do índice."""
+        from langchain_community.vectorstores import FAISS
+        os.makedirs(self.index_path, exist_ok=True)
+        if dim is None:
+            dim = len(self.embeddings.embed_query("dimensão"))
+        docstore = SQLiteDocstore(self.index_path / DOCSTORE_FILENAME)
+        self._index_mmapped = False
+        return FAISS(self.embeddings, create_empty_index(dim, self.index_type), docstore, {})
+
+    def _load_store(self) -> "FAISS":
+        """Abre o índice salvo: vetores via mmap e chunks lidos sob demanda do SQLite.
+
+        Chunks do docstore que não estão no índice salvo (de uma atualização
+        interrompida antes da gravação) são apagados.
+        """
+        from langchain_community.vectorstores import FAISS
+        docstore_path = self.index_path / DOCSTORE_FILENAME
+        if not docstore_path.exists() and (self.index_path / LEGACY_DOCSTORE_FILENAME).exists():
+            return self._convert_legacy_index()
+
+        index, self._index_mmapped = read_index(self.index_path / INDEX_FILENAME)
+        apply_search_params(index)
+        docstore = SQLiteDocstore(docstore_path)
+        orphans = docstore.delete_unmapped()
+        if orphans:
+            print(f"Removidos {orphans} chunks do docstore que não estavam no índice salvo.")
+        return FAISS(self.embeddings, index, docstore, docstore.load_index_map())
+
+    def _convert_legacy_index(self) -> "FAISS":
+        """Converte um índice salvo com `save_local` (docstore em pickle) para o formato atual."""
+        from langchain_community.vectorstores import FAISS
+        print("Convertendo índice FAISS do formato antigo...")
+        legacy = FAISS.load_local(
+            str(self.index_path),
+            self.embeddings,
+            allow_dangerous_deserialization=True,
+        )
+        db = self._new_store(dim=legacy.index.d)
+        db.docstore.add({
+            doc_id: legacy.docstore.search(doc_id)
+            for doc_id in legacy.index_to_docstore_id.values()
+        })
+        db.index = legacy.index
+        db.index_to_docstore_id = dict(legacy.index_to_docstore_id)
+
+        self.db = db
         self._save_index()
-        return self.db
-    
+        os.remove(self.index_path / LEGACY_DOCSTORE_FILENAME)
+        return db
+
+    def _ensure_writable(self) -> None:
+        """Troca um índice mapeado em memória (somente leitura) por uma cópia modificável."""
+        import faiss
+        if self.db is not None and self._index_mmapped:
+            self.db.index = faiss.read_index(str(self.index_path / INDEX_FILENAME))
+            apply_search_params(self.db.index)
+            self._index_mmapped = False
+
+    def _close_store(self) -> None:
+        """Fecha o docstore do índice atual."""
+        if self.db is not None and isinstance(self.db.docstore, SQLiteDocstore):
+            self.db.docstore.close()
+        self.db = None
+
+    def update_index(self) -> ManifestDiff:
+        """Atualiza o índice apenas com os PDFs adicionados, alterados ou removidos.
+
+        Os vetores antigos dos PDFs alterados ou removidos são apagados pelo id
+        do docstore e somente os chunks novos são embutidos. Sem manifesto
+        (por exemplo, um índice criado por uma versão anterior), o índice é
+        recriado. Bloqueia até a atualização, feita pelo mesmo worker de
+        `request_update`.
+        """
+        return self.request_update().result()
+
+    def _update_index(self, documents: Optional[List[Document]] = None) -> ManifestDiff:
+        if self.manifest is None or self.manifest.index_type != self.index_type:
+            print("Manifesto ausente ou tipo de índice alterado. Recriando índice completo...")
+            return self._build_version(documents)
+
+        diff = self.manifest.diff(self.pdf_processor.get_pdf_files())
+        if not diff.has_changes and not documents:
+            # Pode haver mtimes atualizados de arquivos apenas "tocados"; com
+            # mudanças não gravadas, o manifesto só é salvo junto com o índice
+            if self._dirty:
+                self._schedule_save()
+            else:
+                self.manifest.save(self.index_path)
+            print("Índice FAISS já está atualizado.")
+            return diff
+
+        needs_removal = diff.changed or diff.removed or (diff.added and self.manifest.placeholder_ids)
+        if needs_removal and not supports_removal(self.index_type):
+            print(f"O índice {self.index_type} não suporta remoção de vetores. Recriando índice completo...")
+            return self._build_version(documents)
+
+        self._apply_incremental(diff, documents or [])
+        return diff
+
+    def _apply_incremental(self, diff: ManifestDiff, documents: List[Document]) -> None:
+        """Aplica `diff` e os `documents` avulsos ao índice em uso, sem copiar a versão em disco.
+
+        Os vetores (e o manifesto) são alterados em uma cópia em memória, que
+        substitui `self.db` ao final, enquanto as buscas continuam na versão
+        atual; os chunks novos vão direto para o docstore compartilhado, e a
+        busca lexical ignora os que não estão no índice em uso. Os chunks
+        removidos só saem do docstore na gravação, agrupada por
+        `_schedule_save`; os novos que não chegarem a ser gravados são
+        apagados quando o índice for carregado de novo.
+        """
+        import faiss
+        from langchain_community.vectorstores import FAISS
+        if diff.has_changes:
+            print(
+                f"Atualizando índice FAISS: {len(diff.added)} novos, "
+                f"{len(diff.changed)} alterados, {len(diff.removed)} removidos."
+            )
+
+        current = self.db
+        if self._index_mmapped:
+            # Índice mapeado é somente leitura: a cópia é lida do disco
+            index = faiss.read_index(str(self.index_path / INDEX_FILENAME))
+        else:
+            index = faiss.clone_index(current.index)
+        apply_search_params(index)
+        staged = FAISS(self.embeddings, index, current.docstore, dict(current.index_to_docstore_id))
+        manifest = copy.deepcopy(self.manifest)
+
+        stale_ids = []
+        for pdf_path in diff.changed:
+            stale_ids.extend(manifest.remove_file(str(pdf_path)))
+        for key in diff.removed:
+            stale_ids.extend(manifest.remove_file(key))
+
+        to_process = diff.added + diff.changed
+        ids_by_file: Dict[str, List[str]] = {}
+        if to_process:
+            ids_by_file = self._embed_in_batches(self.pdf_processor.iter_chunks(to_process), staged)
+        if documents:
+            manifest.loose_ids.extend(staged.add_documents(documents))
+            print(f"Adicionados {len(documents)} documentos ao índice FAISS.")
+
+        if (ids_by_file or documents) and manifest.placeholder_ids and supports_removal(self.index_type):
+            stale_ids.extend(manifest.placeholder_ids)
+            manifest.placeholder_ids = []
+        self._remove_vectors(staged, stale_ids)
+
+        for pdf_path in to_process:
+            key = str(pdf_path)
+            manifest.set_file(pdf_path, ids_by_file.get(key, []), diff.hashes.get(key))
+
+        if staged.index.ntotal == 0:
+            self._add_placeholder(staged, manifest)
+
+        self.db = staged
+        self.manifest = manifest
+        self._index_mmapped = False
+        self._stale_ids = self._stale_ids | frozenset(stale_ids)
+        self._schedule_save()
+        self._notify_index_changed()
+
+    @staticmethod
+    def _remove_vectors(db: "FAISS", ids: List[str]) -> None:
+        """Remove vetores pelo id do docstore, mantendo os chunks no docstore."""
+        if not ids:
+            return
+        ids = set(ids)
+        positions = [position for position, doc_id in db.index_to_docstore_id.items() if doc_id in ids]
+        db.index.remove_ids(np.array(positions, dtype=np.int64))
+        remaining = [doc_id for _, doc_id in sorted(db.index_to_docstore_id.items()) if doc_id not in ids]
+        db.index_to_docstore_id = dict(enumerate(remaining))
+
+    def _schedule_save(self) -> None:
+        """Agenda a gravação das mudanças incrementais, agrupando as feitas até lá."""
+        self._dirty = True
+        if self.save_delay <= 0:
+            self._save_pending()
+        elif self._save_timer is None or not self._save_timer.is_alive():
+            self._save_timer = threading.Timer(self.save_delay, self._save_pending)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def _save_pending(self) -> None:
+        """Grava as mudanças incrementais e apaga do docstore os chunks removidos.
+
+        Os chunks só são apagados depois da gravação: até lá, buscas que
+        começaram na versão anterior ainda podem lê-los.
+        """
+        with self._lock:
+            if not self._dirty or self.db is None:
+                return
+            self._save_index()
+            if self._stale_ids:
+                self.db.docstore.delete(list(self._stale_ids))
+                self._stale_ids = frozenset()
+            self._dirty = False
+        # Sem mudanças pendentes, o índice já pode ser descarregado
+        self._notify_updated()
+
+    def _add_loose_documents(self, documents: List[Document]) -> None:
+        """Adiciona ao índice documentos que não vieram de um PDF do diretório."""
+        self._ensure_writable()
+        ids = self.db.add_documents(documents)
+        if self.manifest is not None:
+            self.manifest.loose_ids.extend(ids)
+        if self.manifest is not None and self.manifest.placeholder_ids and supports_removal(self.index_type):
+            self.db.delete(self.manifest.placeholder_ids)
+            self.manifest.placeholder_ids = []
+
+    def _loose_documents(self) -> List[Document]:
+        """Documentos avulsos do índice atual, lidos do docstore para uma recriação."""
+        if self.db is not None and self.manifest is not None:
+            return self._fetch_documents(self.db.docstore, self.manifest.loose_ids)
+
+        # Índice não carregado (ou que não pôde ser carregado): lê do disco
+        manifest = IndexManifest.load(self.index_path) if self.index_path.exists() else None
+        docstore_path = self.index_path / DOCSTORE_FILENAME
+        if manifest is None or not manifest.loose_ids or not docstore_path.exists():
+            return []
+        try:
+            docstore = SQLiteDocstore(docstore_path)
+        except Exception as e:
+            print(f"Documentos avulsos do índice anterior não puderam ser lidos: {e}")
+            return []
+        try:
+            return self._fetch_documents(docstore, manifest.loose_ids)
+        finally:
+            docstore.close()
+
+    @staticmethod
+    def _fetch_documents(docstore: SQLiteDocstore, ids: List[str]) -> List[Document]:
+        documents = [docstore.search(doc_id) for doc_id in ids]
+        return [doc for doc in documents if isinstance(doc, Document)]
+
+    def _add_placeholder(self, db: "FAISS", manifest: Optional[IndexManifest] = None) -> None:
+        """Adiciona ao índice vazio um documento de aviso, registrado no manifesto."""
+        placeholder_id = str(uuid.uuid4())
+        if manifest is None:
+            manifest = self.manifest
+        if manifest is not None:
+            manifest.placeholder_ids = [placeholder_id]
+        db.add_documents(
+            [Document(page_content="Índice vazio. Nenhum PDF carregado.")],
+            ids=[placeholder_id],
+        )
+
+    @staticmethod
+    def _assign_ids(documents: List[Document]) -> List[str]:
+        """Gera ids de docstore para os documentos."""
+        ids = [str(uuid.uuid4()) for _ in documents]
+        for doc, doc_id in zip(documents, ids):
+            doc.id = doc_id
+        return ids
+
+    def _embed_in_batches(
+        self,
+        chunks: Iterable[Document],
+        db: "FAISS",
+        batch_size: int = INGEST_BATCH_SIZE,
+    ) -> Dict[str, List[str]]:
+        """Embute os chunks em lotes de tamanho fixo, adicionando-os ao índice.
+
+        Apenas um lote de chunks fica pendente de embedding por vez; os textos
+        vão direto para o docstore SQLite. Retorna os ids gerados agrupados
+        pelo arquivo de origem.
+        """
+        ids_by_file: Dict[str, List[str]] = defaultdict(list)
+        batch: List[Document] = []
+
+        def flush() -> None:
+            ids = self._assign_ids(batch)
+            db.add_documents(batch, ids=ids)
+            for doc in batch:
+                ids_by_file[doc.metadata["file_path"]].append(doc.id)
+            batch.clear()
+
+        for chunk in chunks:
+            batch.append(chunk)
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+
+        return dict(ids_by_file)
+
     def _save_index(self) -> None:
-        """Salva o índice FAISS no disco."""
+        """Salva os vetores, o mapeamento de ids e o manifesto no disco.
+
+        Os textos dos chunks já estão no docstore SQLite. O arquivo do índice
+        é substituído de forma atômica, sem afetar leitores que o mapearam.
+        """
+        import faiss
         if self.db is not None:
             os.makedirs(self.index_path, exist_ok=True)
-            self.db.save_local(str(self.index_path))
+            index_file = self.index_path / INDEX_FILENAME
+            tmp_file = index_file.with_suffix(".tmp")
+            faiss.write_index(self.db.index, str(tmp_file))
+            os.replace(tmp_file, index_file)
+            self.db.docstore.save_index_map(self.db.index_to_docstore_id)
+            if self.manifest is not None:
+                self.manifest.save(self.index_path)
             print(f"Índice FAISS salvo em {self.index_path}")
-    
-    def add_documents(self, documents: List[Document]) -> None:
-        """Adiciona novos documentos ao índice."""
-        if not documents:
-            return
-            
-        if self.db is None:
-            self.create_or_load_index()
-            
-        self.db.add_documents(documents)
-        self._save_index()
-        print(f"Adicionados {len(documents)} documentos ao índice FAISS.")
-    
-    def similarity_search(self, query: str, k: int = 6) -> List[Document]:
+
+    def similarity_search(self, query: str, k: int = SEARCH_K) -> List[Document]:
         """Realiza uma busca de similaridade."""
-        if self.db is None:
-            self.create_or_load_index()
-            
-        results = self.db.similarity_search(query, k=k)
-        return results
\ No newline at end of file
+        results, _ = self.similarity_search_with_embedding(query, k=k)
+        return results
+
+    def similarity_search_with_embedding(self, query: str, k: int = SEARCH_K) -> Tuple[List[Document], List[float]]:
+        """Realiza uma busca de similaridade e retorna também o embedding da consulta.
+
+        Com a busca híbrida ativa, os melhores candidatos da busca vetorial e
+        da busca lexical (BM25) são combinados por reciprocal rank fusion.
+        """
+        db = self.db
+        if db is None:
+            db = self.create_or_load_index()
+        with span("embedding"):
+            embedding = self.query_embedder.embed_query(query)
+        if not (self.hybrid_search and isinstance(db.docstore, SQLiteDocstore)):
+            with span("vector_search"):
+                return db.similarity_search_by_vector(embedding, k=k), embedding
+
+        candidates = max(k, HYBRID_CANDIDATES)
+        with span("vector_search"):
+            vector_results = db.similarity_search_by_vector(embedding, k=candidates)
+        with span("lexical_search"):
+            lexical_ids = db.docstore.lexical_search(query, candidates)
+        # O docstore é compartilhado entre versões: pode ter chunks já removidos
+        # do índice (até a gravação) ou que nunca chegaram a um índice salvo
+        indexed_ids = self._ids_in(db)
+        lexical_ids = [doc_id for doc_id in lexical_ids if doc_id in indexed_ids]
+        if not lexical_ids:
+            return vector_results[:k], embedding
+
+        docs_by_id = {doc.id: doc for doc in vector_results}
+        fused_ids = reciprocal_rank_fusion([list(docs_by_id), lexical_ids])
+        results = []
+        for doc_id in fused_ids[:k]:
+            doc = docs_by_id.get(doc_id) or db.docstore.search(doc_id)
+            if isinstance(doc, Document):
+                results.append(doc)
+        return results, embedding
+
+    def _ids_in(self, db: "FAISS") -> FrozenSet[str]:
+        """Ids do docstore presentes no índice `db`, calculados uma vez por versão."""
+        cached = self._indexed_ids
+        if cached is None or cached[0] is not db:
+            cached = (db, frozenset(db.index_to_docstore_id.values()))
+            self._indexed_ids = cached
+        return cached[1]
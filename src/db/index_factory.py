@@ -0,0 +1,132 @@
+"""Criação dos tipos de índice FAISS suportados (flat, HNSW, IVF-Flat e IVF-PQ)."""
+from typing import TYPE_CHECKING, Optional
+
+import numpy as np
+
+from config import (
+    INDEX_TYPE, HNSW_M, HNSW_EF_CONSTRUCTION, HNSW_EF_SEARCH,
+    IVF_NLIST, IVF_NPROBE, PQ_M, PQ_NBITS,
+)
+
+if TYPE_CHECKING:
+    import faiss
+
+
+INDEX_TYPES = ("flat", "hnsw", "ivf_flat", "ivf_pq")
+
+# Número mínimo de vetores de treino por centróide recomendado pelo FAISS
+_MIN_POINTS_PER_CENTROID = 39
+
+
+def validate_index_type(index_type: str) -> str:
+    """Normaliza e valida o nome do tipo de índice."""
+    index_type = index_type.lower()
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Tipo de índice inválido: {index_type}. Use um de {', '.join(INDEX_TYPES)}")
+    return index_type
+
+
+def requires_training(index_type: str) -> bool:
+    """Indica se o índice precisa ser treinado antes de receber vetores."""
+    return index_type in ("ivf_flat", "ivf_pq")
+
+
+def supports_removal(index_type: str) -> bool:
+    """Indica se vetores podem ser removidos mantendo as posições compactas.
+
+    O LangChain renumera as posições após `remove_ids`, o que só corresponde
+    ao comportamento do índice flat: o HNSW não suporta remoção e o IVF
+    remove sem renumerar os vetores restantes.
+    """
+    return index_type == "flat"
+
+
+def create_empty_index(dim: int, index_type: str = INDEX_TYPE, hnsw_m: int = HNSW_M,
+                       ef_construction: int = HNSW_EF_CONSTRUCTION) -> "faiss.Index":
+    """Cria um índice que aceita vetores sem treino (flat ou HNSW).
+
+    Tipos IVF são criados como flat e convertidos com `build_index` ao final
+    da indexação, quando há vetores para treinar os centróides.
+    """
+    import faiss
+    if index_type == "hnsw":
+        index = faiss.index_factory(dim, f"HNSW{hnsw_m},Flat")
+        index.hnsw.efConstruction = ef_construction
+        return index
+    return faiss.IndexFlatL2(dim)
+
+
+def build_index(
+    vectors: np.ndarray,
+    index_type: str = INDEX_TYPE,
+    hnsw_m: int = HNSW_M,
+    ef_construction: int = HNSW_EF_CONSTRUCTION,
+    nlist: int = IVF_NLIST,
+    pq_m: int = PQ_M,
+    pq_nbits: int = PQ_NBITS,
+) -> "faiss.Index":
+    """Cria, treina (se necessário) e preenche um índice com os vetores na ordem dada.
+
+    `nlist` é reduzido quando não há vetores suficientes para treiná-lo, e
+    IVF-PQ recai em IVF-Flat se o corpus for pequeno demais para treinar os
+    codebooks.
+    """
+    import faiss
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    ntotal, dim = vectors.shape
+
+    if index_type == "ivf_pq" and ntotal < _MIN_POINTS_PER_CENTROID * (1 << pq_nbits):
+        print(f"Poucos vetores ({ntotal}) para treinar IVF-PQ com {pq_nbits} bits. Usando IVF-Flat.")
+        index_type = "ivf_flat"
+
+    if requires_training(index_type):
+        nlist = max(1, min(nlist, ntotal // _MIN_POINTS_PER_CENTROID))
+        if index_type == "ivf_pq":
+            description = f"IVF{nlist},PQ{_pq_subquantizers(dim, pq_m)}x{pq_nbits}"
+        else:
+            description = f"IVF{nlist},Flat"
+        index = faiss.index_factory(dim, description)
+        index.train(vectors)
+    else:
+        index = create_empty_index(dim, index_type, hnsw_m, ef_construction)
+
+    if ntotal:
+        index.add(vectors)
+    return index
+
+
+def apply_search_params(index: "faiss.Index", nprobe: int = IVF_NPROBE,
+                        ef_search: int = HNSW_EF_SEARCH) -> None:
+    """Ajusta `nprobe` (IVF) ou `efSearch` (HNSW) de um índice carregado ou recém-criado."""
+    import faiss
+    ivf = _ivf_or_none(index)
+    if ivf is not None:
+        ivf.nprobe = min(nprobe, ivf.nlist)
+        return
+
+    hnsw_index = faiss.downcast_index(index)
+    if hasattr(hnsw_index, "hnsw"):
+        hnsw_index.hnsw.efSearch = ef_search
+
+
+def reconstruct_vectors(index: "faiss.Index") -> np.ndarray:
+    """Recupera todos os vetores de um índice flat, na ordem das posições."""
+    if index.ntotal == 0:
+        return np.zeros((0, index.d), dtype=np.float32)
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def _ivf_or_none(index: "faiss.Index") -> Optional["faiss.IndexIVF"]:
+    import faiss
+    try:
+        return faiss.extract_index_ivf(index)
+    except RuntimeError:
+        return None
+
+
+def _pq_subquantizers(dim: int, pq_m: int) -> int:
+    """Maior número de subquantizadores que divide a dimensão e não excede `pq_m`."""
+    for m in range(min(pq_m, dim), 0, -1):
+        if dim % m == 0:
+            return m
+    return 1
@@ -0,0 +1,143 @@
+"""Manifesto dos PDFs indexados no FAISS."""
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+MANIFEST_FILENAME = "manifest.json"
+
+
+def file_sha256(path: Path, block_size: int = 1 << 20) -> str:
+    """Calcula o hash SHA-256 do conteúdo de um arquivo."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@dataclass
+class FileEntry:
+    """Estado de um PDF no momento em que foi indexado."""
+    sha256: str
+    mtime: float
+    size: int
+    ids: List[str] = field(default_factory=list)
+
+
+@dataclass
+class ManifestDiff:
+    """Diferença entre o manifesto e os PDFs presentes no diretório."""
+    added: List[Path] = field(default_factory=list)
+    changed: List[Path] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    hashes: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+
+class IndexManifest:
+    """Registra hash, mtime e ids do docstore de cada PDF indexado.
+
+    Também guarda os ids dos documentos avulsos (`FAISSManager.add_documents`),
+    que não vêm de um PDF do diretório e são copiados do índice anterior
+    quando ele é recriado.
+
+    O arquivo fica dentro do diretório do índice, de modo que manifesto e
+    vetores sempre são salvos e removidos juntos.
+    """
+
+    def __init__(self, files: Optional[Dict[str, FileEntry]] = None,
+                 placeholder_ids: Optional[List[str]] = None, index_type: str = "flat",
+                 loose_ids: Optional[List[str]] = None):
+        self.files: Dict[str, FileEntry] = files or {}
+        self.placeholder_ids: List[str] = placeholder_ids or []
+        self.index_type = index_type
+        self.loose_ids: List[str] = loose_ids or []
+
+    @classmethod
+    def load(cls, index_path: Path) -> Optional["IndexManifest"]:
+        """Carrega o manifesto do diretório do índice, se existir."""
+        manifest_path = index_path / MANIFEST_FILENAME
+        if not manifest_path.exists():
+            return None
+
+        try:
+            with open(manifest_path, encoding="utf-8") as f:
+                data = json.load(f)
+            files = {key: FileEntry(**entry) for key, entry in data.get("files", {}).items()}
+            return cls(
+                files, data.get("placeholder_ids", []), data.get("index_type", "flat"), data.get("loose_ids", [])
+            )
+        except (OSError, ValueError, TypeError) as e:
+            print(f"Erro ao carregar manifesto do índice: {e}")
+            return None
+
+    def save(self, index_path: Path) -> None:
+        """Salva o manifesto de forma atômica."""
+        os.makedirs(index_path, exist_ok=True)
+        manifest_path = index_path / MANIFEST_FILENAME
+        tmp_path = manifest_path.with_suffix(".tmp")
+        data = {
+            "files": {key: asdict(entry) for key, entry in self.files.items()},
+            "placeholder_ids": self.placeholder_ids,
+            "index_type": self.index_type,
+            "loose_ids": self.loose_ids,
+        }
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, manifest_path)
+
+    def set_file(self, pdf_path: Path, ids: List[str], sha256: Optional[str] = None) -> None:
+        """Registra (ou substitui) a entrada de um PDF."""
+        stat = pdf_path.stat()
+        self.files[str(pdf_path)] = FileEntry(
+            sha256=sha256 or file_sha256(pdf_path),
+            mtime=stat.st_mtime,
+            size=stat.st_size,
+            ids=ids,
+        )
+
+    def remove_file(self, key: str) -> List[str]:
+        """Remove a entrada de um PDF e retorna os ids que ele ocupava."""
+        entry = self.files.pop(key, None)
+        return entry.ids if entry else []
+
+    def diff(self, pdf_files: List[Path]) -> ManifestDiff:
+        """Compara o manifesto com os PDFs atuais.
+
+        O hash só é recalculado quando mtime ou tamanho mudaram; arquivos
+        apenas "tocados" (mesmo conteúdo) têm o mtime atualizado e não
+        entram na diferença.
+        """
+        diff = ManifestDiff()
+        current = set()
+
+        for pdf_path in pdf_files:
+            key = str(pdf_path)
+            current.add(key)
+            stat = pdf_path.stat()
+            entry = self.files.get(key)
+
+            if entry and entry.mtime == stat.st_mtime and entry.size == stat.st_size:
+                continue
+
+            sha256 = file_sha256(pdf_path)
+            if entry and entry.sha256 == sha256:
+                entry.mtime = stat.st_mtime
+                entry.size = stat.st_size
+                continue
+
+            diff.hashes[key] = sha256
+            if entry:
+                diff.changed.append(pdf_path)
+            else:
+                diff.added.append(pdf_path)
+
+        diff.removed = [key for key in self.files if key not in current]
+        return diff
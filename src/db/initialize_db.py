@@ -1,21 +1,61 @@
-"""Script para inicialização do banco de dados FAISS e processamento dos PDFs."""
+"""Script para inicialização do banco de dados FAISS e processamento dos PDFs.
+
+Executado diretamente, prepara os artefatos embutidos na imagem Docker: baixa
+o modelo de embeddings para o cache do Hugging Face e cria o índice de cada
+condomínio a partir dos PDFs já presentes, para que o contêiner não precise
+fazer nada disso ao iniciar.
+
+Uso:
+    PYTHONPATH=src python -m db.initialize_db
+"""
 import logging
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from db.faiss_db import FAISSManager
 
-from db.faiss_db import FAISSManager
+# Os módulos de indexação são importados dentro das funções: os processos de
+# ingestão ("spawn") reimportam este módulo quando ele é o programa principal
 
 
-def initialize_database(force_reload: bool = False) -> None:
+def initialize_database(force_reload: bool = False) -> "FAISSManager":
     """Inicializa o banco de dados FAISS com os PDFs existentes."""
+    from db.faiss_db import get_faiss_manager
+
     logging.info("Iniciando inicialização do banco de dados...")
     
-    # Instância do FAISSManager
-    faiss_manager = FAISSManager()
+    # FAISSManager compartilhado com o bot
+    faiss_manager = get_faiss_manager()
     
     try:
         # Forçar recriação do índice
         faiss_manager.create_or_load_index(force_reload=force_reload)
         logging.info("Banco de dados inicializado com sucesso!")
+        return faiss_manager
         
     except Exception as e:
         logging.error(f"Erro ao inicializar banco de dados: {e}")
         raise
+
+
+def build_bundle() -> None:
+    """Baixa o modelo de embeddings e cria (ou atualiza) o índice de todos os condomínios."""
+    from db.faiss_db import get_embeddings
+    from db.tenants import get_tenant_router
+
+    print("Baixando o modelo de embeddings...")
+    get_embeddings()
+    tenants = get_tenant_router()
+    try:
+        for name in tenants.tenants:
+            manager = tenants.manager(name)
+            manager.create_or_load_index()
+            # Inclui os PDFs adicionados desde a última criação do índice
+            manager.request_update().result()
+            print(f"Índice do condomínio {name} pronto em {manager.index_path}.")
+    finally:
+        tenants.close()
+
+
+if __name__ == "__main__":
+    build_bundle()
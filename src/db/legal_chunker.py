@@ -0,0 +1,153 @@
+"""Divisão de regimentos e convenções em chunks pela estrutura do texto."""
+import re
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from config import CHUNK_SIZE, CHUNK_OVERLAP
+
+
+Span = Tuple[int, int]
+
+# Títulos, capítulos e seções: ficam no mesmo chunk do artigo que os segue
+_HEADING = re.compile(r"^[ \t]*(?:T[ÍI]TULO|CAP[ÍI]TULO|SE[ÇC][ÃA]O|SUBSE[ÇC][ÃA]O)\b", re.MULTILINE)
+_ARTICLE = re.compile(r"^[ \t]*Art(?:igo)?\.?[ \t]*(\d+)(?:[ \t]*[º°o])?(-[A-Z])?", re.MULTILINE)
+
+# Níveis abaixo do artigo, do mais externo ao mais interno: parágrafos,
+# incisos (I -, II -), alíneas (a), b)) e, em textos sem essa estrutura,
+# blocos separados por linha em branco
+_LEVELS = [
+    re.compile(r"^[ \t]*(?:§+[ \t]*\d+|Par[áa]grafo[ \t]+[úu]nico)", re.MULTILINE | re.IGNORECASE),
+    re.compile(r"^[ \t]*[IVXLC]+[ \t]*[-–—.)]", re.MULTILINE),
+    re.compile(r"^[ \t]*[a-z][ \t]*\)", re.MULTILINE),
+    re.compile(r"^[ \t]*\n", re.MULTILINE),
+]
+
+
+class LegalChunker:
+    """Divide o texto de um PDF em chunks alinhados a artigos, parágrafos e incisos.
+
+    Artigos inteiros (com os títulos e capítulos que os precedem) são
+    agrupados enquanto couberem em `chunk_size` caracteres. Um artigo maior
+    é dividido nos seus parágrafos, depois nos incisos e por fim nas
+    alíneas, de modo que uma lista só é quebrada quando não cabe inteira em
+    um chunk. Só um trecho sem estrutura maior que `chunk_size` é dividido
+    por tamanho, com `chunk_overlap`.
+
+    Cada chunk é um trecho exato do texto do PDF e registra nos metadados a
+    posição (`start_index`), as páginas (`page`, `page_end`) e os artigos
+    (`articles`) que abrange.
+    """
+
+    def __init__(self, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP):
+        self.chunk_size = chunk_size
+        self.splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            length_function=len,
+            add_start_index=True,
+        )
+
+    def split_pages(self, pages: Sequence[str], metadata: Optional[Dict[str, Any]] = None) -> List[Document]:
+        """Divide o texto das páginas de um documento em chunks."""
+        text = "".join(pages)
+        page_starts = list(accumulate((len(page) for page in pages[:-1]), initial=0))
+        articles = _articles(text)
+        article_starts = [position for position, _ in articles]
+
+        chunks = []
+        for start, end in self._split(text, 0, len(text), 0):
+            start, end = _strip(text, start, end)
+            if start >= end:
+                continue
+
+            chunk_metadata = dict(metadata or {})
+            chunk_metadata["start_index"] = start
+            chunk_metadata["page"] = bisect_right(page_starts, start)
+            chunk_metadata["page_end"] = bisect_right(page_starts, end - 1)
+            first = max(bisect_right(article_starts, start) - 1, 0)
+            labels = [label for position, label in articles[first:] if position < end]
+            if labels:
+                chunk_metadata["articles"] = labels
+            chunks.append(Document(page_content=text[start:end], metadata=chunk_metadata))
+        return chunks
+
+    def _split(self, text: str, start: int, end: int, level: int) -> List[Span]:
+        """Divide `text[start:end]` a partir do nível `level` da estrutura."""
+        if end - start <= self.chunk_size:
+            return [(start, end)]
+
+        for current in range(level, len(_LEVELS) + 1):
+            cuts = self._boundaries(text, start, end, current)
+            if cuts:
+                break
+        else:
+            return self._split_by_size(text, start, end)
+
+        # Unidades inteiras se juntam ao chunk anterior enquanto couberem; as
+        # partes de uma unidade dividida nunca começam no chunk anterior
+        spans: List[Span] = []
+        edges = [start, *cuts, end]
+        for unit_start, unit_end in zip(edges, edges[1:]):
+            pieces = self._split(text, unit_start, unit_end, current + 1)
+            if len(pieces) == 1 and spans and unit_end - spans[-1][0] <= self.chunk_size:
+                spans[-1] = (spans[-1][0], unit_end)
+            else:
+                spans.extend(pieces)
+        return spans
+
+    @staticmethod
+    def _boundaries(text: str, start: int, end: int, level: int) -> List[int]:
+        """Inícios das unidades do nível `level` dentro de `text[start:end]`."""
+        if level > 0:
+            return [m.start() for m in _LEVELS[level - 1].finditer(text, start, end) if m.start() > start]
+
+        marks = sorted(
+            [(m.start(), True) for m in _HEADING.finditer(text, start, end)]
+            + [(m.start(), False) for m in _ARTICLE.finditer(text, start, end)]
+        )
+        cuts = []
+        after_heading = False
+        for position, is_heading in marks:
+            if position > start and not after_heading:
+                cuts.append(position)
+            after_heading = is_heading
+        return cuts
+
+    def _split_by_size(self, text: str, start: int, end: int) -> List[Span]:
+        spans = []
+        for chunk in self.splitter.create_documents([text[start:end]]):
+            offset = chunk.metadata.get("start_index", -1)
+            if offset >= 0:
+                spans.append((start + offset, start + offset + len(chunk.page_content)))
+        return spans
+
+
+def _articles(text: str) -> List[Tuple[int, str]]:
+    """Rótulo de cada artigo e onde sua unidade começa (incluindo os títulos que o precedem)."""
+    marks = sorted(
+        [(m.start(), None) for m in _HEADING.finditer(text)]
+        + [(m.start(), f"Art. {m.group(1)}{m.group(2) or ''}") for m in _ARTICLE.finditer(text)]
+    )
+    articles = []
+    heading_start: Optional[int] = None
+    for position, label in marks:
+        if label is None:
+            if heading_start is None:
+                heading_start = position
+            continue
+        articles.append((position if heading_start is None else heading_start, label))
+        heading_start = None
+    return articles
+
+
+def _strip(text: str, start: int, end: int) -> Span:
+    """Remove os espaços em branco das pontas do trecho."""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
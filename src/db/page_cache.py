@@ -0,0 +1,46 @@
+"""Cache em disco do texto extraído das páginas de cada PDF."""
+import json
+import os
+import uuid
+from pathlib import Path
+from typing import List, Optional
+
+
+class PageTextCache:
+    """Guarda o texto das páginas de um PDF pelo hash SHA-256 do arquivo.
+
+    Cada PDF vira um arquivo JSON em `cache_dir`, de modo que reindexar um
+    PDF já visto (após `/reload completo`, uma mudança de `INDEX_TYPE` ou um
+    arquivo apenas renomeado) não precisa abri-lo nem repetir o OCR.
+    """
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = Path(cache_dir)
+
+    def _path(self, digest: str) -> Path:
+        return self.cache_dir / f"{digest}.json"
+
+    def get(self, digest: str) -> Optional[List[str]]:
+        """Retorna as páginas em cache do PDF com esse hash, se houver."""
+        try:
+            with open(self._path(digest), encoding="utf-8") as f:
+                pages = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"Erro ao ler cache de páginas {digest}: {e}")
+            return None
+        return pages if isinstance(pages, list) else None
+
+    def put(self, digest: str, pages: List[str]) -> None:
+        """Salva as páginas do PDF com esse hash de forma atômica."""
+        path = self._path(digest)
+        tmp_path = path.with_name(f".{path.name}-{uuid.uuid4().hex[:8]}.tmp")
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(pages, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Erro ao gravar cache de páginas {digest}: {e}")
+            tmp_path.unlink(missing_ok=True)
@@ -0,0 +1,61 @@
+"""Extração de páginas de PDF, usada pelos processos de ingestão paralela.
+
+Este módulo importa apenas o PyMuPDF para que os processos do pool
+inicializem rapidamente. Com "spawn", cada processo também reimporta o
+módulo principal do programa; por isso `main.py` e `db.initialize_db` só
+importam o bot e a indexação dentro das funções que os usam.
+"""
+from pathlib import Path
+from typing import List, Optional, Union
+
+import fitz  # PyMuPDF
+
+
+def page_count(pdf_path: Union[str, Path]) -> int:
+    """Retorna o número de páginas de um PDF (0 se não puder ser aberto)."""
+    try:
+        with fitz.open(pdf_path) as doc:
+            return len(doc)
+    except Exception as e:
+        print(f"Erro ao abrir PDF {pdf_path}: {e}")
+        return 0
+
+
+# Desligado no processo após a primeira falha (por exemplo, Tesseract ausente)
+_ocr_available = True
+
+
+def extract_pages(pdf_path: Union[str, Path], start: int, stop: int,
+                  ocr_language: Optional[str] = None) -> List[str]:
+    """Extrai o texto das páginas [start, stop) de um PDF.
+
+    Com `ocr_language`, páginas sem texto (digitalizadas) passam pelo OCR
+    do Tesseract, se ele estiver instalado.
+    """
+    try:
+        with fitz.open(pdf_path) as doc:
+            pages = []
+            for page_num in range(start, stop):
+                page = doc.load_page(page_num)
+                text = page.get_text()
+                if ocr_language and not text.strip():
+                    text = _ocr_page(page, ocr_language)
+                pages.append(text)
+            return pages
+    except Exception as e:
+        print(f"Erro ao processar páginas {start}-{stop} do PDF {pdf_path}: {e}")
+        return []
+
+
+def _ocr_page(page: "fitz.Page", language: str) -> str:
+    """Extrai por OCR o texto de uma página digitalizada."""
+    global _ocr_available
+    if not _ocr_available:
+        return ""
+    try:
+        textpage = page.get_textpage_ocr(language=language, dpi=300, full=True)
+        return page.get_text(textpage=textpage)
+    except Exception as e:
+        _ocr_available = False
+        print(f"OCR indisponível, páginas digitalizadas ficarão sem texto: {e}")
+        return ""
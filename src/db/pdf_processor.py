@@ -1,82 +1,173 @@
 import os
-import fitz  # PyMuPDF
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from pathlib import Path
-from typing import List
+from typing import Deque, Iterator, List, Optional, Tuple
 
 from langchain_core.documents import Document
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 
-from config import CHUNK_SIZE, CHUNK_OVERLAP, PDF_DIR
+from config import PDF_DIR, INGEST_WORKERS, INGEST_PAGES_PER_TASK, PAGE_CACHE_DIR, OCR_LANGUAGE
+from db.index_manifest import file_sha256
+from db.legal_chunker import LegalChunker
+from db.page_cache import PageTextCache
+from db.pdf_pages import extract_pages, page_count
 
 
 class PDFProcessor:
     """Processa arquivos PDF para extração de texto e criação de chunks."""
 
-    def __init__(self, pdf_dir: Path = PDF_DIR):
+    def __init__(self, pdf_dir: Path = PDF_DIR, workers: int = INGEST_WORKERS,
+                 pages_per_task: int = INGEST_PAGES_PER_TASK, cache_dir: Optional[Path] = PAGE_CACHE_DIR,
+                 ocr_language: Optional[str] = OCR_LANGUAGE):
         self.pdf_dir = pdf_dir
+        self.workers = workers
+        self.pages_per_task = pages_per_task
+        self.page_cache = PageTextCache(cache_dir) if cache_dir is not None else None
+        self.ocr_language = ocr_language or None
+        self.chunker = LegalChunker()
 
     def get_pdf_files(self) -> List[Path]:
         """Retorna a lista de arquivos PDF no diretório configurado."""
         if not self.pdf_dir.exists():
             os.makedirs(self.pdf_dir, exist_ok=True)
             return []
-        
+
         return list(self.pdf_dir.glob("*.pdf"))
 
+    def extract_pages_from_pdf(self, pdf_path: Path) -> List[str]:
+        """Extrai o texto de cada página de um PDF, usando o cache quando possível."""
+        digest, pages = self._cached_pages(pdf_path)
+        if pages is not None:
+            return pages
+
+        num_pages = page_count(pdf_path)
+        pages = extract_pages(pdf_path, 0, num_pages, self.ocr_language)
+        self._store_pages(digest, pages, num_pages)
+        return pages
+
     def extract_text_from_pdf(self, pdf_path: Path) -> str:
         """Extrai texto de um arquivo PDF."""
-        text = ""
-        
+        return "".join(self.extract_pages_from_pdf(pdf_path))
+
+    def create_chunks(self, pages: List[str], pdf_path: Path) -> List[Document]:
+        """Divide as páginas em chunks alinhados à estrutura do documento (artigos, parágrafos, incisos)."""
+        return self.chunker.split_pages(pages, {
+            "source": str(pdf_path.name),
+            "file_path": str(pdf_path),
+        })
+
+    def _cached_pages(self, pdf_path: Path) -> Tuple[Optional[str], Optional[List[str]]]:
+        """Hash do PDF e as páginas já extraídas dele, se estiverem no cache."""
+        if self.page_cache is None:
+            return None, None
         try:
-            doc = fitz.open(pdf_path)
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                text += page.get_text()
-            doc.close()
-        except Exception as e:
-            print(f"Erro ao processar PDF {pdf_path}: {e}")
-            
-        return text
-
-    def create_chunks(self, text: str, pdf_path: Path) -> List[Document]:
-        """Divide o texto em chunks para processamento."""
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=CHUNK_SIZE,
-            chunk_overlap=CHUNK_OVERLAP,
-            length_function=len,
-        )
-        
-        chunks = splitter.create_documents([text])
-        
-        # Adiciona metadados sobre a origem do chunk
-        for chunk in chunks:
-            chunk.metadata = {
-                "source": str(pdf_path.name),
-                "file_path": str(pdf_path),
-            }
-            
-        return chunks
-
-    def process_pdfs(self) -> List[Document]:
-        """Processa todos os PDFs e retorna os documentos."""
-        documents = []
-        pdf_files = self.get_pdf_files()
-        
+            digest = file_sha256(pdf_path)
+        except OSError as e:
+            print(f"Erro ao ler PDF {pdf_path}: {e}")
+            return None, None
+        return digest, self.page_cache.get(digest)
+
+    def _store_pages(self, digest: Optional[str], pages: List[str], num_pages: int) -> None:
+        # Extrações com falha (menos páginas que o PDF) não vão para o cache
+        if self.page_cache is not None and digest is not None and num_pages and len(pages) == num_pages:
+            self.page_cache.put(digest, pages)
+
+    def iter_chunks(self, pdf_files: Optional[List[Path]] = None) -> Iterator[Document]:
+        """Gera os chunks dos PDFs, arquivo por arquivo, na ordem da lista.
+
+        Com mais de um worker, as páginas são extraídas em um pool de
+        processos, em blocos de `pages_per_task` páginas. Apenas uma janela
+        limitada de blocos fica em andamento, de modo que a memória não
+        cresce com o tamanho da pasta: cada arquivo é dividido em chunks assim
+        que todas as suas páginas chegam, e os chunks são entregues a quem
+        consome o gerador (por exemplo, o embedder, em lotes).
+        """
+        if pdf_files is None:
+            pdf_files = self.get_pdf_files()
+
         if not pdf_files:
             print(f"Nenhum arquivo PDF encontrado em {self.pdf_dir}")
-            return documents
-            
-        print(f"Processando {len(pdf_files)} arquivos PDF...")
-        
-        for pdf_path in pdf_files:
-            print(f"Processando {pdf_path.name}...")
-            text = self.extract_text_from_pdf(pdf_path)
-            if text:
-                chunks = self.create_chunks(text, pdf_path)
-                documents.extend(chunks)
+            return
+
+        workers = max(self.workers, 1)
+        print(f"Processando {len(pdf_files)} arquivos PDF ({workers} processos)...")
+
+        if workers == 1:
+            extracted = ((pdf_path, self.extract_pages_from_pdf(pdf_path)) for pdf_path in pdf_files)
+        else:
+            extracted = self._extract_pages_parallel(pdf_files, workers)
+
+        total = 0
+        for pdf_path, pages in extracted:
+            if any(page.strip() for page in pages):
+                chunks = self.create_chunks(pages, pdf_path)
+                total += len(chunks)
                 print(f"  - Extraídos {len(chunks)} chunks de {pdf_path.name}")
+                yield from chunks
             else:
                 print(f"  - Nenhum texto extraído de {pdf_path.name}")
-                
-        print(f"Total de {len(documents)} chunks extraídos de todos os PDFs.")
-        return documents
\ No newline at end of file
+
+        print(f"Total de {total} chunks extraídos de todos os PDFs.")
+
+    def _extract_pages_parallel(self, pdf_files: List[Path], workers: int) -> Iterator[Tuple[Path, List[str]]]:
+        """Extrai as páginas dos PDFs em um pool de processos, preservando a ordem.
+
+        PDFs que já estão no cache de páginas não são abertos.
+        """
+        tasks = self._page_tasks(pdf_files)
+        max_in_flight = workers * 2
+        # "spawn" evita herdar threads (pool de busca, modelo de embeddings) do processo do bot
+        context = multiprocessing.get_context("spawn")
+
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            in_flight: Deque[Tuple[Path, int, int, Optional[str], Future]] = deque()
+            pages: List[str] = []
+
+            def submit_next() -> bool:
+                task = next(tasks, None)
+                if task is None:
+                    return False
+                pdf_path, start, stop, num_pages, digest, cached = task
+                if cached is not None:
+                    future = Future()
+                    future.set_result(cached)
+                    digest = None
+                else:
+                    future = executor.submit(extract_pages, str(pdf_path), start, stop, self.ocr_language)
+                in_flight.append((pdf_path, stop, num_pages, digest, future))
+                return True
+
+            while len(in_flight) < max_in_flight and submit_next():
+                pass
+
+            while in_flight:
+                pdf_path, stop, num_pages, digest, future = in_flight.popleft()
+                submit_next()
+                pages.extend(future.result())
+
+                if stop >= num_pages:
+                    self._store_pages(digest, pages, num_pages)
+                    yield pdf_path, pages
+                    pages = []
+
+    def _page_tasks(self, pdf_files: List[Path]) -> Iterator[Tuple[Path, int, int, int, Optional[str], Optional[List[str]]]]:
+        """Divide cada PDF em blocos (arquivo, início, fim, total de páginas, hash, páginas em cache).
+
+        Um PDF em cache vira um único bloco, já com as páginas.
+        """
+        for pdf_path in pdf_files:
+            digest, cached = self._cached_pages(pdf_path)
+            if cached is not None:
+                yield pdf_path, 0, len(cached), len(cached), digest, cached
+                continue
+            num_pages = page_count(pdf_path)
+            if not num_pages:
+                yield pdf_path, 0, 0, 0, digest, None
+                continue
+            for start in range(0, num_pages, self.pages_per_task):
+                yield pdf_path, start, min(start + self.pages_per_task, num_pages), num_pages, digest, None
+
+    def process_pdfs(self, pdf_files: Optional[List[Path]] = None) -> List[Document]:
+        """Processa os PDFs informados (ou todos do diretório) e retorna os documentos."""
+        return list(self.iter_chunks(pdf_files))
@@ -0,0 +1,135 @@
+"""Observa o diretório de PDFs e atualiza o índice automaticamente."""
+import os
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from config import PDF_DIR, PDF_WATCH_INTERVAL, PDF_WATCH_DEBOUNCE
+from db.faiss_db import FAISSManager
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # watchdog é opcional; sem ele o diretório é verificado periodicamente
+    FileSystemEventHandler = object
+    Observer = None
+
+
+Snapshot = Dict[str, Tuple[int, int]]
+
+
+class _WakeupHandler(FileSystemEventHandler):
+    """Acorda o watcher a cada evento do sistema de arquivos envolvendo PDFs."""
+
+    def __init__(self, wakeup: threading.Event):
+        self.wakeup = wakeup
+
+    def on_any_event(self, event) -> None:
+        paths = (getattr(event, "src_path", ""), getattr(event, "dest_path", ""))
+        if any(str(path).endswith(".pdf") for path in paths):
+            self.wakeup.set()
+
+
+class PDFWatcher:
+    """Detecta PDFs adicionados, alterados ou removidos e atualiza o índice.
+
+    O diretório é comparado a cada `interval` segundos pelo nome, mtime e
+    tamanho dos PDFs (com o pacote opcional `watchdog`, eventos do inotify
+    antecipam a verificação). Uma rajada de mudanças só dispara a
+    atualização depois de `debounce` segundos sem novas mudanças, o que
+    também espera cópias em andamento terminarem. A atualização é a
+    incremental do `FAISSManager`: apenas os PDFs afetados são processados.
+    """
+
+    def __init__(self, faiss_manager: FAISSManager, pdf_dir: Path = PDF_DIR,
+                 interval: float = PDF_WATCH_INTERVAL, debounce: float = PDF_WATCH_DEBOUNCE):
+        self.faiss_manager = faiss_manager
+        self.pdf_dir = Path(pdf_dir)
+        self.interval = interval
+        self.debounce = debounce
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._observer = None
+
+    def start(self) -> None:
+        """Inicia a observação em uma thread de fundo, já verificando mudanças feitas com o bot parado."""
+        if self._stopped.is_set():
+            return
+        os.makedirs(self.pdf_dir, exist_ok=True)
+        if Observer is not None:
+            self._observer = Observer()
+            self._observer.schedule(_WakeupHandler(self._wakeup), str(self.pdf_dir), recursive=False)
+            self._observer.daemon = True
+            self._observer.start()
+
+        self._thread = threading.Thread(target=self._run, name="pdf-watcher", daemon=True)
+        self._thread.start()
+        mode = "inotify" if self._observer is not None else f"verificação a cada {self.interval:g}s"
+        print(f"Observando {self.pdf_dir} ({mode}).")
+
+    def stop(self) -> None:
+        """Para a observação."""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+        if self._thread is not None:
+            self._thread.join()
+
+    def snapshot(self) -> Snapshot:
+        """Nome, mtime e tamanho de cada PDF do diretório."""
+        snapshot: Snapshot = {}
+        try:
+            with os.scandir(self.pdf_dir) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".pdf") and entry.is_file():
+                        stat = entry.stat()
+                        snapshot[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            pass
+        return snapshot
+
+    def _run(self) -> None:
+        self._request_update()
+        previous = self.snapshot()
+        last_change: Optional[float] = None
+
+        while not self._stopped.is_set():
+            # Com inotify, a verificação periódica é só uma garantia extra,
+            # exceto enquanto se espera o fim de uma rajada de mudanças
+            waiting = self._observer is None or last_change is not None
+            timeout = self.interval if waiting else self.interval * 30
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+            if self._stopped.is_set():
+                break
+
+            current = self.snapshot()
+            now = time.monotonic()
+            if current != previous:
+                previous = current
+                last_change = now
+            if last_change is not None and now - last_change >= self.debounce:
+                last_change = None
+                self._request_update()
+
+    def _request_update(self) -> None:
+        future = self.faiss_manager.request_update()
+        future.add_done_callback(self._log_result)
+
+    @staticmethod
+    def _log_result(future: Future) -> None:
+        try:
+            diff = future.result()
+        except Exception as e:
+            print(f"Erro ao atualizar índice a partir do diretório de PDFs: {e}")
+            return
+        if diff.has_changes:
+            print(
+                f"PDFs atualizados automaticamente: {len(diff.added)} novos, "
+                f"{len(diff.changed)} alterados, {len(diff.removed)} removidos."
+            )
@@ -0,0 +1,130 @@
+"""Embeddings de consultas com cache LRU e micro-lotes."""
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+from config import QUERY_CACHE_SIZE, EMBED_BATCH_WINDOW_MS, EMBED_MAX_BATCH
+from metrics import CACHE_LOOKUPS
+
+
+class QueryEmbedder:
+    """Calcula embeddings de consultas com cache e agrupamento em lotes.
+
+    Consultas repetidas são respondidas por um cache LRU limitado. As demais
+    entram em uma fila; uma thread dedicada reúne as consultas que chegam
+    dentro de `batch_window_ms` (até `max_batch`) e as codifica em uma única
+    chamada a `embed_documents`, aproveitando o forward em lote do modelo.
+    Com `batch_window_ms` igual a 0, cada consulta é codificada na própria
+    thread que a pediu.
+
+    Para modelos sentence-transformers sem `query_encode_kwargs`,
+    `embed_documents` e `embed_query` produzem os mesmos vetores.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        cache_size: int = QUERY_CACHE_SIZE,
+        batch_window_ms: float = EMBED_BATCH_WINDOW_MS,
+        max_batch: int = EMBED_MAX_BATCH,
+    ):
+        self.embeddings = embeddings
+        self.cache_size = cache_size
+        self.batch_window = batch_window_ms / 1000
+        self.max_batch = max(max_batch, 1)
+        self._cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.batches = 0
+
+    def embed_query(self, text: str) -> List[float]:
+        """Retorna o embedding da consulta, do cache ou do próximo lote."""
+        embedding = self._cache_get(text)
+        if embedding is not None:
+            return embedding
+
+        if self.batch_window <= 0:
+            embedding = self.embeddings.embed_query(text)
+        else:
+            future: Future = Future()
+            self._ensure_worker()
+            self._queue.put((text, future))
+            embedding = future.result()
+
+        self._cache_put(text, embedding)
+        return embedding
+
+    def stats(self) -> Dict[str, int]:
+        """Contadores do cache e dos lotes."""
+        with self._cache_lock:
+            return {
+                "entries": len(self._cache),
+                "hits": self.hits,
+                "misses": self.misses,
+                "batches": self.batches,
+            }
+
+    def _cache_get(self, text: str) -> Optional[List[float]]:
+        with self._cache_lock:
+            embedding = self._cache.get(text)
+            if embedding is None:
+                self.misses += 1
+                CACHE_LOOKUPS.inc(cache="query_embedding", result="miss")
+                return None
+            self._cache.move_to_end(text)
+            self.hits += 1
+            CACHE_LOOKUPS.inc(cache="query_embedding", result="hit")
+            return embedding
+
+    def _cache_put(self, text: str, embedding: List[float]) -> None:
+        if self.cache_size <= 0:
+            return
+        with self._cache_lock:
+            self._cache[text] = embedding
+            self._cache.move_to_end(text)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _ensure_worker(self) -> None:
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name="query-embedder", daemon=True
+                )
+                self._worker.start()
+
+    def _run(self) -> None:
+        """Laço da thread de micro-lotes."""
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            texts = list(dict.fromkeys(text for text, _ in batch))
+            try:
+                vectors = self.embeddings.embed_documents(texts)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            self.batches += 1
+            by_text = dict(zip(texts, vectors))
+            for text, future in batch:
+                future.set_result(by_text[text])
@@ -0,0 +1,191 @@
+"""Docstore em SQLite para o índice FAISS."""
+import json
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Union
+
+from langchain_community.docstore.base import AddableMixin, Docstore
+from langchain_core.documents import Document
+
+
+DOCSTORE_FILENAME = "docstore.sqlite"
+
+# Permite que o SQLite leia o arquivo via mmap, compartilhando o page cache
+# entre réplicas do bot no mesmo host
+_MMAP_SIZE = 256 * 1024 * 1024
+
+# Palavras muito frequentes em português que não ajudam a busca lexical
+_STOPWORDS = frozenset("""
+a ao aos as com como da das de do dos e em na nas no nos o os ou para pela pelas
+pelo pelos por qual quais que se sem sobre um uma umas uns é
+""".split())
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def build_match_query(text: str) -> str:
+    """Converte uma pergunta em consulta FTS5: termos entre aspas unidos por OR."""
+    terms = []
+    for token in _TOKEN_PATTERN.findall(text.lower()):
+        if token not in _STOPWORDS and token not in terms:
+            terms.append(token)
+    return " OR ".join(f'"{term}"' for term in terms)
+
+
+class SQLiteDocstore(Docstore, AddableMixin):
+    """Guarda textos e metadados dos chunks em SQLite, lidos sob demanda pelo id.
+
+    Também persiste o mapeamento posição no FAISS -> id do docstore, que é o
+    único dado carregado integralmente na memória ao abrir o índice. Cada
+    thread usa sua própria conexão, para que buscas paralelas não disputem
+    um lock.
+
+    Um índice invertido FTS5 (BM25) sobre o texto dos chunks é mantido por
+    triggers, acompanhando toda inclusão ou remoção no docstore. Se o SQLite
+    não tiver FTS5, `lexical_search` retorna sempre vazio.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS chunks ("
+                " id TEXT PRIMARY KEY,"
+                " content TEXT NOT NULL,"
+                " metadata TEXT NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS index_map ("
+                " position INTEGER PRIMARY KEY,"
+                " doc_id TEXT NOT NULL)"
+            )
+        self.fts_enabled = self._create_fts(conn)
+
+    @staticmethod
+    def _create_fts(conn: sqlite3.Connection) -> bool:
+        """Cria o índice FTS5 dos chunks, populando-o em docstores antigos."""
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'chunks_fts'"
+        ).fetchone()
+        try:
+            with conn:
+                conn.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5("
+                    " content, content='chunks', content_rowid='rowid',"
+                    " tokenize='unicode61 remove_diacritics 2')"
+                )
+                conn.execute(
+                    "CREATE TRIGGER IF NOT EXISTS chunks_fts_insert AFTER INSERT ON chunks BEGIN"
+                    " INSERT INTO chunks_fts (rowid, content) VALUES (new.rowid, new.content); END"
+                )
+                conn.execute(
+                    "CREATE TRIGGER IF NOT EXISTS chunks_fts_delete AFTER DELETE ON chunks BEGIN"
+                    " INSERT INTO chunks_fts (chunks_fts, rowid, content)"
+                    " VALUES ('delete', old.rowid, old.content); END"
+                )
+                if not exists:
+                    conn.execute("INSERT INTO chunks_fts (chunks_fts) VALUES ('rebuild')")
+        except sqlite3.OperationalError as e:
+            print(f"Busca lexical indisponível (SQLite sem FTS5): {e}")
+            return False
+        return True
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), check_same_thread=False)
+            conn.execute(f"PRAGMA mmap_size={_MMAP_SIZE}")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def add(self, texts: Dict[str, Document]) -> None:
+        """Adiciona documentos ao docstore."""
+        rows = [
+            (doc_id, doc.page_content, json.dumps(doc.metadata, ensure_ascii=False))
+            for doc_id, doc in texts.items()
+        ]
+        conn = self._connection()
+        try:
+            with conn:
+                conn.executemany("INSERT INTO chunks (id, content, metadata) VALUES (?, ?, ?)", rows)
+        except sqlite3.IntegrityError as e:
+            raise ValueError(f"Tentativa de sobrescrever ids existentes no docstore: {e}")
+
+    def search(self, search: str) -> Union[str, Document]:
+        """Busca um documento pelo id."""
+        row = self._connection().execute(
+            "SELECT content, metadata FROM chunks WHERE id = ?", (search,)
+        ).fetchone()
+        if row is None:
+            return f"ID {search} not found."
+        return Document(id=search, page_content=row[0], metadata=json.loads(row[1]))
+
+    def delete(self, ids: List) -> None:
+        """Remove documentos pelo id."""
+        conn = self._connection()
+        with conn:
+            conn.executemany("DELETE FROM chunks WHERE id = ?", [(doc_id,) for doc_id in ids])
+
+    def delete_unmapped(self) -> int:
+        """Remove os documentos fora do mapeamento salvo e retorna quantos eram.
+
+        São chunks gravados por uma atualização cujo índice não chegou a ser
+        salvo (por exemplo, se o processo terminou antes da gravação). Sem
+        mapeamento salvo, nada é removido.
+        """
+        conn = self._connection()
+        with conn:
+            if conn.execute("SELECT 1 FROM index_map LIMIT 1").fetchone() is None:
+                return 0
+            cursor = conn.execute("DELETE FROM chunks WHERE id NOT IN (SELECT doc_id FROM index_map)")
+        return cursor.rowcount
+
+    def lexical_search(self, query: str, k: int) -> List[str]:
+        """Retorna os ids dos `k` chunks mais relevantes para a consulta segundo o BM25."""
+        match = build_match_query(query)
+        if not self.fts_enabled or not match:
+            return []
+        cursor = self._connection().execute(
+            "SELECT chunks.id FROM chunks_fts JOIN chunks ON chunks.rowid = chunks_fts.rowid"
+            " WHERE chunks_fts MATCH ? ORDER BY bm25(chunks_fts) LIMIT ?",
+            (match, k),
+        )
+        return [row[0] for row in cursor]
+
+    def iter_documents(self) -> Iterator[Document]:
+        """Percorre todos os documentos do docstore."""
+        cursor = self._connection().execute("SELECT id, content, metadata FROM chunks")
+        for doc_id, content, metadata in cursor:
+            yield Document(id=doc_id, page_content=content, metadata=json.loads(metadata))
+
+    def load_index_map(self) -> Dict[int, str]:
+        """Carrega o mapeamento posição no FAISS -> id do docstore."""
+        cursor = self._connection().execute("SELECT position, doc_id FROM index_map")
+        return dict(cursor.fetchall())
+
+    def save_index_map(self, index_to_docstore_id: Dict[int, str]) -> None:
+        """Substitui o mapeamento posição no FAISS -> id do docstore."""
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM index_map")
+            conn.executemany(
+                "INSERT INTO index_map (position, doc_id) VALUES (?, ?)",
+                index_to_docstore_id.items(),
+            )
+
+    def close(self) -> None:
+        """Fecha todas as conexões abertas."""
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
@@ -0,0 +1,204 @@
+"""Roteamento de chats para condomínios, cada um com seu próprio índice."""
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from config import TENANTS_FILE, TENANTS_DIR, INDEX_MEMORY_BUDGET_MB
+from db.faiss_db import FAISSManager, get_faiss_manager
+from metrics import INDEX_SHARDS_LOADED
+
+
+DEFAULT_TENANT = "default"
+
+_router_lock = threading.Lock()
+_shared_router: Optional["TenantRouter"] = None
+
+
+class UnknownTenantError(LookupError):
+    """Indica que o chat não está vinculado a nenhum condomínio."""
+
+
+@dataclass
+class Tenant:
+    """Um condomínio: os chats que ele atende, seus PDFs e seu índice."""
+    name: str
+    pdf_dir: Path
+    index_path: Path
+    chat_ids: List[int] = field(default_factory=list)
+
+
+def load_tenants(path: Path, base_dir: Path = TENANTS_DIR) -> List[Tenant]:
+    """Lê os condomínios de um arquivo JSON.
+
+    O arquivo mapeia o nome de cada condomínio para seus `chat_ids` e,
+    opcionalmente, `pdf_dir` e `index_path` (por padrão,
+    `<base_dir>/<nome>/pdfs` e `<base_dir>/<nome>/faiss_index`).
+    """
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+
+    tenants = []
+    for name, entry in data.items():
+        tenant_dir = Path(base_dir) / name
+        tenants.append(Tenant(
+            name=name,
+            pdf_dir=Path(entry.get("pdf_dir", tenant_dir / "pdfs")),
+            index_path=Path(entry.get("index_path", tenant_dir / "faiss_index")),
+            chat_ids=[int(chat_id) for chat_id in entry.get("chat_ids", [])],
+        ))
+    return tenants
+
+
+class TenantRouter:
+    """Encaminha cada chat ao índice (shard) do seu condomínio.
+
+    Os shards são `FAISSManager`s criados sob demanda, todos com o mesmo
+    modelo de embeddings. Um índice só é carregado na primeira busca do
+    condomínio; quando os índices carregados passam de `memory_budget` bytes
+    (0 desativa o limite), os usados há mais tempo são descarregados e
+    voltam a ser lidos do disco na próxima busca. O limite é aplicado após
+    cada busca e cada atualização de um índice (por exemplo, do `/reload` ou
+    da atualização automática), que também carrega o índice. Sem `chat_ids`
+    cadastrados, o único condomínio atende a todos os chats.
+    """
+
+    def __init__(self, tenants: List[Tenant], memory_budget: int = INDEX_MEMORY_BUDGET_MB * 1024 * 1024,
+                 managers: Optional[Dict[str, FAISSManager]] = None):
+        if not tenants:
+            raise ValueError("Nenhum condomínio configurado")
+        self.tenants: Dict[str, Tenant] = {tenant.name: tenant for tenant in tenants}
+        self.memory_budget = memory_budget
+        self._by_chat: Dict[int, str] = {}
+        for tenant in tenants:
+            for chat_id in tenant.chat_ids:
+                self._by_chat[chat_id] = tenant.name
+        self._default = tenants[0].name if len(tenants) == 1 and not self._by_chat else None
+
+        self._lock = threading.Lock()
+        self._managers: Dict[str, FAISSManager] = {}
+        self._recent: "OrderedDict[str, None]" = OrderedDict()
+        self._change_listeners: List[Callable[[], None]] = []
+        for name, manager in (managers or {}).items():
+            self._managers[name] = manager
+            manager.add_update_listener(self._enforce_budget)
+            if manager.db is not None:
+                self._recent[name] = None
+
+    @classmethod
+    def single(cls, manager: FAISSManager) -> "TenantRouter":
+        """Roteador de um só condomínio, que atende a todos os chats com `manager`."""
+        tenant = Tenant(DEFAULT_TENANT, manager.pdf_processor.pdf_dir, manager.index_path)
+        return cls([tenant], memory_budget=0, managers={DEFAULT_TENANT: manager})
+
+    @property
+    def is_multi_tenant(self) -> bool:
+        return self._default is None
+
+    def tenant_for(self, chat_id: Optional[int]) -> Tenant:
+        """Condomínio ao qual o chat pertence."""
+        name = self._by_chat.get(chat_id, self._default) if chat_id is not None else self._default
+        if name is None:
+            raise UnknownTenantError(f"Chat {chat_id} não vinculado a nenhum condomínio")
+        return self.tenants[name]
+
+    def manager(self, name: str) -> FAISSManager:
+        """`FAISSManager` do condomínio, criado (sem carregar o índice) na primeira chamada."""
+        with self._lock:
+            manager = self._managers.get(name)
+            if manager is None:
+                tenant = self.tenants[name]
+                manager = FAISSManager(index_path=tenant.index_path, pdf_dir=tenant.pdf_dir)
+                for listener in self._change_listeners:
+                    manager.add_change_listener(listener)
+                manager.add_update_listener(self._enforce_budget)
+                self._managers[name] = manager
+            return manager
+
+    def manager_for(self, chat_id: Optional[int]) -> FAISSManager:
+        """`FAISSManager` do condomínio do chat."""
+        return self.manager(self.tenant_for(chat_id).name)
+
+    def add_change_listener(self, listener: Callable[[], None]) -> None:
+        """Registra uma função chamada quando o índice de qualquer condomínio muda."""
+        with self._lock:
+            self._change_listeners.append(listener)
+            managers = list(self._managers.values())
+        for manager in managers:
+            manager.add_change_listener(listener)
+
+    def search(self, chat_id: Optional[int], query: str) -> Tuple[List[Document], List[float]]:
+        """Busca no índice do condomínio do chat, carregando-o se preciso.
+
+        Bloqueia durante o carregamento; deve rodar fora do event loop. Com o
+        índice já carregado, não espera o lock do `FAISSManager`: durante uma
+        atualização, a busca usa a versão atual até a troca.
+        """
+        name = self.tenant_for(chat_id).name
+        manager = self.manager(name)
+        if manager.db is None:
+            manager.create_or_load_index()
+        self._touch(name)
+        return manager.similarity_search_with_embedding(query)
+
+    def _touch(self, name: str) -> None:
+        """Marca o shard como usado agora e descarrega os mais antigos acima do orçamento."""
+        with self._lock:
+            self._recent[name] = None
+            self._recent.move_to_end(name)
+        self._enforce_budget(keep=name)
+
+    def _enforce_budget(self, keep: Optional[str] = None) -> None:
+        """Descarrega os shards usados há mais tempo até o total caber no orçamento.
+
+        O shard `keep` (o recém-usado) nunca é descarregado.
+        """
+        with self._lock:
+            if self.memory_budget <= 0:
+                return
+            # Shards carregados só por atualizações (sem buscas) são os mais antigos
+            idle = [other for other, manager in self._managers.items()
+                    if other not in self._recent and manager.db is not None]
+            loaded = [(other, self._managers[other]) for other in idle + list(self._recent)]
+
+        total = sum(manager.memory_bytes for _, manager in loaded)
+        for other, manager in loaded:
+            if other == keep:
+                continue
+            if total <= self.memory_budget:
+                break
+            size = manager.memory_bytes
+            if manager.unload():
+                total -= size
+                with self._lock:
+                    self._recent.pop(other, None)
+                print(f"Índice do condomínio {other} descarregado da memória.")
+        INDEX_SHARDS_LOADED.set(sum(1 for _, manager in loaded if manager.db is not None))
+
+    def loaded(self) -> List[str]:
+        """Condomínios com índice carregado, do usado há mais tempo ao mais recente."""
+        with self._lock:
+            return list(self._recent)
+
+    def close(self) -> None:
+        """Encerra os workers de atualização de todos os condomínios."""
+        with self._lock:
+            managers = list(self._managers.values())
+        for manager in managers:
+            manager.close()
+
+
+def get_tenant_router() -> TenantRouter:
+    """Retorna o roteador do processo: condomínios de `TENANTS_FILE` ou, sem ele, o índice padrão."""
+    global _shared_router
+    with _router_lock:
+        if _shared_router is None:
+            if TENANTS_FILE is not None:
+                _shared_router = TenantRouter(load_tenants(TENANTS_FILE))
+            else:
+                _shared_router = TenantRouter.single(get_faiss_manager())
+        return _shared_router
@@ -0,0 +1,92 @@
+"""Aquecimento do serviço de busca em segundo plano."""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional
+
+from db.faiss_db import get_embeddings
+from db.tenants import TenantRouter
+from metrics import set_ready, span
+
+
+class RetrievalWarmup:
+    """Carrega o modelo de embeddings e o índice em uma thread de fundo.
+
+    O bot começa a receber updates antes disso e avisa que está iniciando
+    enquanto `ready` for falso. Com um só condomínio o índice também é
+    carregado (ou criado a partir dos PDFs); com vários, cada índice
+    continua sendo carregado na primeira pergunta do condomínio. O `/health`
+    só responde 200 depois que o aquecimento termina. As funções
+    de `preload` (por exemplo, a criação do cliente do modelo de linguagem)
+    rodam antes, e as de `on_ready` depois, na mesma thread. `on_phase`
+    recebe o nome e a duração de cada fase (`llm`, `modelo` e `indice`).
+    """
+
+    def __init__(self, tenants: TenantRouter, on_ready: Optional[List[Callable[[], None]]] = None,
+                 preload: Optional[List[Callable[[], None]]] = None,
+                 on_phase: Optional[Callable[[str, float], None]] = None):
+        self.tenants = tenants
+        self.on_ready = list(on_ready or [])
+        self.preload = list(preload or [])
+        self.on_phase = on_phase
+        self.error: Optional[Exception] = None
+        self.elapsed: Optional[float] = None
+        self._ready = threading.Event()
+        self._done = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    @property
+    def failed(self) -> bool:
+        return self.error is not None
+
+    def start(self) -> "RetrievalWarmup":
+        """Inicia o aquecimento em uma thread de fundo."""
+        self._thread = threading.Thread(target=self.run, name="retrieval-warmup", daemon=True)
+        self._thread.start()
+        return self
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Espera o aquecimento terminar; retorna se o serviço ficou pronto."""
+        self._done.wait(timeout)
+        return self.ready
+
+    def run(self) -> None:
+        """Carrega o modelo e o índice, bloqueando até terminar."""
+        start = time.perf_counter()
+        try:
+            with span("warmup"):
+                if self.preload:
+                    with self._phase("llm"):
+                        for task in self.preload:
+                            task()
+                manager = None if self.tenants.is_multi_tenant else self.tenants.manager_for(None)
+                with self._phase("modelo"):
+                    if manager is None:
+                        get_embeddings()
+                    else:
+                        manager.embeddings
+                if manager is not None:
+                    with self._phase("indice"):
+                        manager.create_or_load_index()
+            self.elapsed = time.perf_counter() - start
+            self._ready.set()
+            set_ready(True)
+            print(f"Serviço de busca pronto em {self.elapsed:.2f}s.")
+            for callback in self.on_ready:
+                callback()
+        except Exception as e:
+            self.error = e
+            print(f"Erro ao inicializar o serviço de busca: {e}")
+        finally:
+            self._done.set()
+
+    @contextmanager
+    def _phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        yield
+        if self.on_phase is not None:
+            self.on_phase(name, time.perf_counter() - start)
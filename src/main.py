@@ -1,9 +1,11 @@
 import logging
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Tuple
+
 from dotenv import load_dotenv
 
-from bot.handlers import TelegramBot
-from config import TELEGRAM_BOT_TOKEN, GOOGLE_API_KEY
-from db.initialize_db import initialize_database
+from config import TELEGRAM_BOT_TOKEN, GOOGLE_API_KEY, METRICS_HOST, METRICS_PORT, PDF_WATCH
 
 # Configurar logging
 logging.basicConfig(
@@ -13,6 +15,31 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+
+class StartupTimer:
+    """Mede o tempo de cada fase da inicialização."""
+
+    def __init__(self, title: str = "Tempo de inicialização"):
+        self.title = title
+        self.phases: List[Tuple[str, float]] = []
+
+    def record(self, name: str, elapsed: float) -> None:
+        self.phases.append((name, elapsed))
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def log_summary(self) -> None:
+        total = sum(elapsed for _, elapsed in self.phases)
+        breakdown = ", ".join(f"{name}={elapsed:.2f}s" for name, elapsed in self.phases)
+        logger.info(f"{self.title}: {breakdown} (total={total:.2f}s)")
+
+
 def check_environment():
     """Verifica se todas as variáveis de ambiente necessárias estão configuradas."""
     if not TELEGRAM_BOT_TOKEN:
@@ -27,6 +54,17 @@ def check_environment():
 
 def main():
     """Função principal para iniciar o bot."""
+    timer = StartupTimer()
+    # Os módulos do bot são importados aqui, e não no topo: os processos de
+    # ingestão ("spawn") reimportam este módulo e não precisam deles
+    with timer.phase("imports"):
+        from bot.handlers import TelegramBot
+        from bot.utils import ChatbotUtils
+        from db.pdf_watcher import PDFWatcher
+        from db.tenants import get_tenant_router
+        from db.warmup import RetrievalWarmup
+        from metrics import start_metrics_server
+
     # Carregar variáveis de ambiente
     load_dotenv()
     
@@ -35,18 +73,48 @@ def main():
         logger.error("Configuração incompleta. Abortando processo de inicialização...")
         return
     
-    # Inicializar banco de dados FAISS com os PDFs existentes
+    # Carregar o modelo de embeddings e o índice em segundo plano: o bot já
+    # recebe updates e avisa que está iniciando até o serviço de busca ficar
+    # pronto. Com vários condomínios, cada índice é carregado na primeira
+    # pergunta do condomínio.
     try:
-        logger.info("Inicializando banco de dados...")
-        initialize_database()
-        logger.info("Banco de dados inicializado com sucesso!")
+        tenants = get_tenant_router()
     except Exception as e:
-        logger.error(f"Erro ao inicializar banco de dados: {e}")
+        logger.error(f"Erro ao carregar os condomínios: {e}")
         return
+    if tenants.is_multi_tenant:
+        logger.info(f"{len(tenants.tenants)} condomínios configurados.")
+    
+    # Atualizar o índice automaticamente quando PDFs forem adicionados,
+    # alterados ou removidos (depois do carregamento inicial)
+    watchers = []
+    if PDF_WATCH:
+        watchers = [
+            PDFWatcher(tenants.manager(tenant.name), tenant.pdf_dir) for tenant in tenants.tenants.values()
+        ]
+    # O cliente do Gemini também é criado em segundo plano, e as fases do
+    # carregamento são registradas à parte
+    chatbot_utils = ChatbotUtils()
+    warmup_timer = StartupTimer("Tempo de carregamento do serviço de busca")
+    logger.info("Carregando modelo de embeddings e índice em segundo plano...")
+    warmup = RetrievalWarmup(
+        tenants, on_ready=[warmup_timer.log_summary] + [watcher.start for watcher in watchers],
+        preload=[chatbot_utils.load_llm], on_phase=warmup_timer.record,
+    ).start()
+    
+    # Expor as métricas para o Prometheus
+    if METRICS_PORT:
+        try:
+            start_metrics_server(METRICS_HOST, METRICS_PORT)
+            logger.info(f"Métricas disponíveis em http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+        except OSError as e:
+            logger.error(f"Não foi possível iniciar o servidor de métricas: {e}")
     
     # Criar e iniciar o bot
-    bot = TelegramBot()
+    with timer.phase("telegram"):
+        bot = TelegramBot(chatbot_utils=chatbot_utils, tenants=tenants, warmup=warmup, watchers=watchers)
+    timer.log_summary()
     bot.start()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
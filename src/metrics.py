@@ -0,0 +1,289 @@
+"""Métricas de latência, cache, erros e tokens do bot.
+
+Contadores, gauges e histogramas simples, sem dependências externas,
+expostos em formato texto do Prometheus (`render_prometheus`) por um
+servidor HTTP local e resumidos no comando `/stats` (`format_summary`).
+"""
+import bisect
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from config import METRICS_SAMPLE_SIZE
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKEN_BUCKETS = (16, 64, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+LabelValues = Tuple[str, ...]
+
+
+class _Metric:
+    """Base das métricas: uma série por combinação de valores de labels."""
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._series: Dict[LabelValues, object] = {}
+        REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _format_labels(self, key: LabelValues, extra: str = "") -> str:
+        pairs = [f'{name}="{value}"' for name, value in zip(self.labelnames, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            series = sorted(self._series.items())
+        for key, value in series:
+            lines.extend(self._render_series(key, value))
+        return lines
+
+    def _render_series(self, key: LabelValues, value) -> List[str]:
+        return [f"{self.name}{self._format_labels(key)} {value}"]
+
+
+class Counter(_Metric):
+    """Valor que só cresce (ex.: total de acertos de cache)."""
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._series.get(self._key(labels), 0)
+
+    def values(self) -> Dict[LabelValues, float]:
+        with self._lock:
+            return dict(self._series)
+
+
+class Gauge(Counter):
+    """Valor que sobe e desce (ex.: perguntas em andamento)."""
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._series[self._key(labels)] = value
+
+
+class _HistogramSeries:
+    __slots__ = ("bucket_counts", "count", "total", "samples")
+
+    def __init__(self, buckets: int, sample_size: int):
+        self.bucket_counts = [0] * buckets
+        self.count = 0
+        self.total = 0.0
+        self.samples: Deque[float] = deque(maxlen=sample_size)
+
+
+class Histogram(_Metric):
+    """Distribuição de valores em buckets cumulativos, como no Prometheus.
+
+    Guarda também as últimas `sample_size` observações de cada série para
+    calcular percentis exatos recentes (p50/p95/p99) no `/stats`.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS, sample_size: int = METRICS_SAMPLE_SIZE):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.sample_size = sample_size
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _HistogramSeries(len(self.buckets), self.sample_size)
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series.bucket_counts[index] += 1
+            series.count += 1
+            series.total += value
+            series.samples.append(value)
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Mede a duração do bloco em segundos."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def percentiles(self, quantiles: Sequence[float] = (0.5, 0.95, 0.99),
+                    **labels: str) -> Optional[List[float]]:
+        """Percentis das observações recentes da série, ou None se ela estiver vazia."""
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            samples = sorted(series.samples) if series is not None else []
+        if not samples:
+            return None
+        return [samples[min(len(samples) - 1, int(q * len(samples)))] for q in quantiles]
+
+    def label_values(self) -> List[LabelValues]:
+        with self._lock:
+            return sorted(self._series)
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            series = self._series.get(self._key(labels))
+            return series.count if series is not None else 0
+
+    def _render_series(self, key: LabelValues, series: _HistogramSeries) -> List[str]:
+        lines = []
+        cumulative = 0
+        bounds = [str(bound) for bound in self.buckets] + ["+Inf"]
+        counts = series.bucket_counts + [series.count - sum(series.bucket_counts)]
+        for bound, bucket_count in zip(bounds, counts):
+            cumulative += bucket_count
+            le = 'le="' + bound + '"'
+            lines.append(f"{self.name}_bucket{self._format_labels(key, le)} {cumulative}")
+        labels = self._format_labels(key)
+        lines.append(f"{self.name}_sum{labels} {series.total}")
+        lines.append(f"{self.name}_count{labels} {series.count}")
+        return lines
+
+
+REGISTRY: List[_Metric] = []
+
+STAGE_SECONDS = Histogram(
+    "chatbot_stage_seconds", "Duração de cada etapa do atendimento de uma pergunta.", ("stage",)
+)
+REQUESTS = Counter("chatbot_requests_total", "Perguntas recebidas, por resultado.", ("outcome",))
+REQUESTS_IN_FLIGHT = Gauge("chatbot_requests_in_flight", "Perguntas em processamento ou na fila.")
+ERRORS = Counter("chatbot_errors_total", "Erros, por etapa e tipo de exceção.", ("stage", "error"))
+INDEX_SHARDS_LOADED = Gauge("chatbot_index_shards_loaded", "Índices de condomínios carregados em memória.")
+CACHE_LOOKUPS = Counter("chatbot_cache_lookups_total", "Consultas aos caches, por resultado.", ("cache", "result"))
+LLM_TOKENS = Histogram(
+    "chatbot_llm_tokens", "Tokens por chamada ao modelo de linguagem.", ("kind",), buckets=TOKEN_BUCKETS
+)
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Mede a duração de uma etapa e conta as exceções que a interrompem."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        ERRORS.inc(stage=stage, error=type(e).__name__)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+
+
+def render_prometheus() -> str:
+    """Todas as métricas no formato texto de exposição do Prometheus."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def format_summary() -> str:
+    """Resumo legível das métricas, usado pelo comando /stats."""
+    lines = ["⏱ Latência por etapa (p50 / p95 / p99, ms):"]
+    for (stage,) in STAGE_SECONDS.label_values():
+        p50, p95, p99 = STAGE_SECONDS.percentiles(stage=stage)
+        lines.append(
+            f"• {stage}: {p50 * 1000:.0f} / {p95 * 1000:.0f} / {p99 * 1000:.0f} "
+            f"({STAGE_SECONDS.count(stage=stage)}x)"
+        )
+
+    lines.append("\n📨 Perguntas:")
+    for (outcome,), value in sorted(REQUESTS.values().items()):
+        lines.append(f"• {outcome}: {value:.0f}")
+    lines.append(f"• em andamento: {REQUESTS_IN_FLIGHT.value():.0f}")
+
+    lines.append("\n🗃 Caches:")
+    for (cache, result), value in sorted(CACHE_LOOKUPS.values().items()):
+        lines.append(f"• {cache} {result}: {value:.0f}")
+
+    lines.append("\n🔤 Tokens por chamada (p50 / p95 / p99):")
+    for (kind,) in LLM_TOKENS.label_values():
+        p50, p95, p99 = LLM_TOKENS.percentiles(kind=kind)
+        lines.append(f"• {kind}: {p50:.0f} / {p95:.0f} / {p99:.0f}")
+
+    errors = ERRORS.values()
+    if errors:
+        lines.append("\n❌ Erros:")
+        for (stage, error), value in sorted(errors.items()):
+            lines.append(f"• {stage} {error}: {value:.0f}")
+    return "\n".join(lines)
+
+
+_serving = threading.Event()
+_ready = threading.Event()
+
+
+def set_serving(serving: bool) -> None:
+    """Marca se o bot está recebendo updates (resposta de `/health`)."""
+    if serving:
+        _serving.set()
+    else:
+        _serving.clear()
+
+
+def set_ready(ready: bool) -> None:
+    """Marca se o serviço de busca terminou de carregar (também exigido por `/health`)."""
+    if ready:
+        _ready.set()
+    else:
+        _ready.clear()
+
+
+def is_healthy() -> bool:
+    """Indica se o bot está recebendo updates e pronto para respondê-los."""
+    return _serving.is_set() and _ready.is_set()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        path = self.path.split("?")[0]
+        if path == "/health":
+            # Para o balanceador de carga: 503 até o índice carregar e durante o encerramento
+            status, body = (200, b"ok") if is_healthy() else (503, b"unavailable")
+            content_type = "text/plain; charset=utf-8"
+        elif path in ("/", "/metrics"):
+            status, body = 200, render_prometheus().encode("utf-8")
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def start_metrics_server(host: str, port: int) -> ThreadingHTTPServer:
+    """Serve `/metrics` e `/health` em uma thread de fundo."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="metrics", daemon=True)
+    thread.start()
+    return server
@@ -0,0 +1,53 @@
+"""Fixtures compartilhadas: corpus de PDFs e índices com embeddings falsos."""
+import shutil
+from pathlib import Path
+from typing import Callable
+
+import pytest
+
+from bench.corpus import generate_corpus
+from bench.micro import bench_embeddings
+from db.faiss_db import FAISSManager
+from db.pdf_processor import PDFProcessor
+
+
+@pytest.fixture(autouse=True)
+def isolated_workdir(tmp_path, monkeypatch):
+    """Roda cada teste em um diretório próprio (o cache de páginas e o índice padrão são relativos)."""
+    monkeypatch.chdir(tmp_path)
+
+
+@pytest.fixture(scope="session")
+def corpus_dir(tmp_path_factory) -> Path:
+    """PDFs sintéticos gerados uma vez; os testes copiam os que precisam."""
+    directory = tmp_path_factory.mktemp("corpus")
+    generate_corpus(directory, files=4, pages=2, seed=1)
+    return directory
+
+
+@pytest.fixture
+def pdf_dir(tmp_path, corpus_dir) -> Path:
+    """Diretório de PDFs do teste, começando com três arquivos do corpus."""
+    directory = tmp_path / "pdfs"
+    directory.mkdir()
+    for path in sorted(corpus_dir.glob("*.pdf"))[:3]:
+        shutil.copy(path, directory / path.name)
+    return directory
+
+
+@pytest.fixture
+def make_manager(tmp_path, pdf_dir) -> Callable[..., FAISSManager]:
+    """Cria `FAISSManager`s sobre `pdf_dir`, com embeddings falsos e ingestão no próprio processo."""
+    managers = []
+
+    def factory(**kwargs) -> FAISSManager:
+        kwargs.setdefault("index_path", tmp_path / "faiss_index")
+        kwargs.setdefault("pdf_dir", pdf_dir)
+        manager = FAISSManager(embeddings=bench_embeddings(True), **kwargs)
+        manager.pdf_processor = PDFProcessor(kwargs["pdf_dir"], workers=1, cache_dir=None)
+        managers.append(manager)
+        return manager
+
+    yield factory
+    for manager in managers:
+        manager.close()
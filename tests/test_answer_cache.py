@@ -0,0 +1,111 @@
+from datetime import timedelta
+
+from langchain_core.documents import Document
+
+from bench.fake_llm import FakeChatModel
+from bot import answer_cache
+from bot.answer_cache import AnswerCache
+from bot.utils import ChatbotUtils
+from metrics import CACHE_LOOKUPS
+
+
+DOCS = [Document(page_content="Art. 1º ...", id="a"), Document(page_content="Art. 2º ...", id="b")]
+OTHER_DOCS = [Document(page_content="Art. 3º ...", id="c")]
+
+
+def test_hit_ignores_case_spaces_and_punctuation():
+    cache = AnswerCache(similarity_threshold=0)
+    cache.put("Qual o horário da piscina?", DOCS, "Das 8h às 22h.")
+
+    assert cache.get("  qual o   horário da PISCINA ", DOCS) == "Das 8h às 22h."
+    assert cache.get("Qual o horário da piscina?", list(reversed(DOCS))) == "Das 8h às 22h."
+
+
+def test_miss_when_retrieved_chunks_differ():
+    cache = AnswerCache(similarity_threshold=0)
+    cache.put("Qual o horário da piscina?", DOCS, "Das 8h às 22h.")
+
+    assert cache.get("Qual o horário da piscina?", OTHER_DOCS) is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = AnswerCache(max_entries=2, similarity_threshold=0)
+    cache.put("pergunta 1", DOCS, "resposta 1")
+    cache.put("pergunta 2", DOCS, "resposta 2")
+    cache.get("pergunta 1", DOCS)
+    cache.put("pergunta 3", DOCS, "resposta 3")
+
+    assert cache.get("pergunta 2", DOCS) is None
+    assert cache.get("pergunta 1", DOCS) == "resposta 1"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(answer_cache.time, "monotonic", lambda: now[0])
+    cache = AnswerCache(ttl=10, similarity_threshold=0)
+    cache.put("pergunta", DOCS, "resposta")
+
+    now[0] += 5
+    assert cache.get("pergunta", DOCS) == "resposta"
+    now[0] += 10
+    assert cache.get("pergunta", DOCS) is None
+
+
+def test_near_duplicate_requires_same_chunks():
+    cache = AnswerCache(similarity_threshold=0.95)
+    cache.put("Posso ter cachorro?", DOCS, "Sim, animais de pequeno porte.", embedding=[1.0, 0.0, 0.1])
+
+    assert cache.get("Posso ter um cachorro?", DOCS, embedding=[1.0, 0.0, 0.12]) == "Sim, animais de pequeno porte."
+    assert cache.get("Posso ter um cachorro?", OTHER_DOCS, embedding=[1.0, 0.0, 0.12]) is None
+    assert cache.get("Posso ter um gato?", DOCS, embedding=[0.0, 1.0, 0.0]) is None
+    assert cache.stats()["near_hits"] == 1
+
+
+def test_clear():
+    cache = AnswerCache(similarity_threshold=0)
+    cache.put("pergunta", DOCS, "resposta")
+    cache.clear()
+
+    assert cache.get("pergunta", DOCS) is None
+    assert cache.stats()["entries"] == 0
+
+
+def make_utils(**kwargs):
+    return ChatbotUtils(llm=FakeChatModel(latency=0, token_delay=0, response_tokens=5), **kwargs)
+
+
+def age_history(utils, chat_id, seconds):
+    for message in utils.conversation_manager.get_conversation_history(chat_id):
+        message.timestamp -= timedelta(seconds=seconds)
+
+
+def test_recent_follow_up_skips_the_cache():
+    utils = make_utils(followup_window=600)
+    utils.generate_response("Qual o horário da piscina?", DOCS)
+    utils.generate_response("E o do salão?", DOCS, chat_id=1)
+    before = CACHE_LOOKUPS.value(cache="answer", result="history")
+
+    utils.generate_response("Qual o horário da piscina?", DOCS, chat_id=1)
+
+    assert utils.answer_cache.stats()["hits"] == 0
+    assert CACHE_LOOKUPS.value(cache="answer", result="history") == before + 1
+
+
+def test_cache_is_used_once_the_conversation_goes_quiet():
+    utils = make_utils(followup_window=600)
+    first = utils.generate_response("Qual o horário da piscina?", DOCS)
+    utils.generate_response("E o do salão?", DOCS, chat_id=1)
+    age_history(utils, 1, 601)
+
+    assert utils.generate_response("Qual o horário da piscina?", DOCS, chat_id=1) == first
+    assert utils.answer_cache.stats()["hits"] == 1
+    assert len(utils.conversation_manager.get_conversation_history(1)) == 4
+
+
+def test_zero_follow_up_window_always_uses_the_cache():
+    utils = make_utils(followup_window=0)
+    first = utils.generate_response("Qual o horário da piscina?", DOCS)
+    utils.generate_response("E o do salão?", DOCS, chat_id=1)
+
+    assert utils.generate_response("Qual o horário da piscina?", DOCS, chat_id=1) == first
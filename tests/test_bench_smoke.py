@@ -0,0 +1,20 @@
+"""Teste de fumaça dos benchmarks: roda o teste de carga pequeno e verifica os limites."""
+from bench import load_test
+
+
+def test_load_test_smoke():
+    exit_code = load_test.main([
+        "--chats", "10", "--messages", "2", "--files", "2", "--pages", "2", "--fake-embeddings",
+        "--llm-latency", "0.05", "--token-delay", "0.001", "--telegram-latency", "0.001",
+        "--max-errors", "0", "--max-p95-ms", "3000",
+    ])
+    assert exit_code == 0
+
+
+def test_load_test_reports_exceeded_thresholds():
+    exit_code = load_test.main([
+        "--chats", "2", "--messages", "1", "--files", "1", "--pages", "1", "--fake-embeddings",
+        "--llm-latency", "0.05", "--token-delay", "0.001", "--telegram-latency", "0.001",
+        "--max-p95-ms", "1",
+    ])
+    assert exit_code == 1
@@ -0,0 +1,62 @@
+from langchain_core.documents import Document
+
+from bot.context_builder import ContextBuilder
+
+TEXT = "Art. 1º O condomínio se rege por esta convenção. Art. 2º Os condôminos devem respeitar o regimento."
+
+
+def chunk(start, end, source="convencao.pdf", **metadata):
+    return Document(page_content=TEXT[start:end],
+                    metadata={"source": source, "start_index": start, **metadata})
+
+
+def test_overlapping_and_adjacent_chunks_become_one_block():
+    blocks = ContextBuilder(token_budget=0).merge_chunks([chunk(40, 80), chunk(0, 50), chunk(81, len(TEXT))])
+
+    assert len(blocks) == 1
+    assert blocks[0].text == TEXT[:80] + "\n" + TEXT[81:]
+    assert blocks[0].rank == 0
+
+
+def test_chunks_of_other_files_or_far_apart_stay_separate():
+    blocks = ContextBuilder(token_budget=0).merge_chunks(
+        [chunk(0, 30), chunk(60, 90), chunk(0, 30, source="regimento.pdf")]
+    )
+
+    assert [(block.source, block.start) for block in blocks] == \
+        [("convencao.pdf", 0), ("convencao.pdf", 60), ("regimento.pdf", 0)]
+
+
+def test_chunks_without_positions_are_merged_by_text_overlap():
+    first = Document(page_content=TEXT[:70], metadata={"source": "antigo.pdf"})
+    second = Document(page_content=TEXT[40:], metadata={"source": "antigo.pdf"})
+    duplicate = Document(page_content=TEXT[10:30], metadata={"source": "antigo.pdf"})
+
+    blocks = ContextBuilder(token_budget=0, max_overlap=50).merge_chunks([second, first, duplicate])
+
+    assert [block.text for block in blocks] == [TEXT]
+
+
+def test_blocks_are_added_by_relevance_while_they_fit():
+    builder = ContextBuilder(chars_per_token=1)
+    docs = [
+        Document(page_content="a" * 50, metadata={"source": "um.pdf", "page": 3, "start_index": 0}),
+        Document(page_content="b" * 500, metadata={"source": "dois.pdf"}),
+        Document(page_content="c" * 20, metadata={"source": "tres.pdf"}),
+    ]
+
+    context = builder.build(docs, token_budget=120)
+
+    assert context.startswith("[um.pdf, p. 3]:\n" + "a" * 50)
+    assert "b" * 10 not in context and "c" * 20 in context
+    # O bloco mais relevante entra mesmo sem caber
+    assert "b" * 500 in builder.build(docs[1:], token_budget=10)
+
+
+def test_blocks_merged_by_text_keep_their_first_page():
+    later = Document(page_content=TEXT[40:], metadata={"source": "antigo.pdf", "page": 2})
+    earlier = Document(page_content=TEXT[:70], metadata={"source": "antigo.pdf", "page": 1})
+
+    context = ContextBuilder(token_budget=0, max_overlap=50).build([later, earlier])
+
+    assert context == f"[antigo.pdf, p. 1]:\n{TEXT}"
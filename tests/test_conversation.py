@@ -0,0 +1,64 @@
+import asyncio
+from datetime import datetime
+
+from bot import conversation
+from bot.conversation import ConversationManager
+from bot.conversation_store import SQLiteConversationStore
+
+
+def test_store_reads_pending_writes_before_they_are_flushed(tmp_path):
+    store = SQLiteConversationStore(tmp_path / "conversas.db", flush_interval=3600)
+    store.append(1, "user", "olá", datetime.now())
+    store.append(2, "user", "outro chat", datetime.now())
+
+    assert [row[:2] for row in store.load(1, 10)] == [("user", "olá")]
+    assert store._conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0] == 0
+
+    store.flush()
+    store.append(1, "assistant", "oi", datetime.now())
+    store.clear(2)
+    assert [row[1] for row in store.load(1, 10)] == ["olá", "oi"]
+    assert store.load(2, 10) == []
+    store.close()
+
+
+def test_history_survives_a_restart(tmp_path):
+    db_path = tmp_path / "conversas.db"
+    manager = ConversationManager(max_history=3, db_path=db_path)
+    for i in range(4):
+        manager.add_message(7, "user", f"mensagem {i}")
+    manager.close()
+
+    restarted = ConversationManager(max_history=3, db_path=db_path)
+    asyncio.run(restarted.preload(7))
+    assert [message.content for message in restarted.get_conversation_history(7)] == \
+        ["mensagem 1", "mensagem 2", "mensagem 3"]
+
+    restarted.clear_conversation(7)
+    restarted.close()
+    cleared = ConversationManager(db_path=db_path)
+    assert cleared.get_conversation_history(7) == []
+    cleared.close()
+
+
+def test_memory_is_bounded_by_chats_and_characters():
+    manager = ConversationManager(max_chats=2, max_chars=100, db_path=None)
+    for chat_id in (1, 2, 3):
+        manager.add_message(chat_id, "user", "x" * 10)
+    assert list(manager.conversations) == [2, 3]
+
+    manager.add_message(3, "user", "y" * 95)
+    assert list(manager.conversations) == [3]
+    assert manager._total_chars == 105
+
+
+def test_idle_chats_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(conversation.time, "monotonic", lambda: now[0])
+    manager = ConversationManager(ttl=60, db_path=None)
+    manager.add_message(1, "user", "olá")
+
+    now[0] += 30
+    assert manager.get_conversation_history(1)
+    now[0] += 61
+    assert manager.get_conversation_history(1) == []
@@ -0,0 +1,46 @@
+import asyncio
+import logging
+
+import pytest
+
+from bench.fake_llm import FakeChatModel
+from bench.fake_telegram import FakeBot, FakeContext, FakeTelegramAPI, make_text_update
+from bot.handlers import TelegramBot
+from bot.retry import LLMUnavailableError
+from bot.utils import ChatbotUtils
+from metrics import ERRORS
+
+
+@pytest.fixture
+def bot(make_manager):
+    return TelegramBot(make_manager(), ChatbotUtils(llm=FakeChatModel()), token="0:teste")
+
+
+def handle_error(bot, error):
+    api = FakeTelegramAPI()
+    update = make_text_update(api, 1, "Qual o horário da piscina?")
+    asyncio.run(bot.error_handler(update, FakeContext(FakeBot(api), error=error)))
+    return update.message.replies[0].text
+
+
+def raised(error):
+    try:
+        raise error
+    except Exception as e:
+        return e
+
+
+def test_unexpected_error_is_logged_with_traceback_and_counted(bot, caplog):
+    before = ERRORS.value(stage="handler", error="KeyError")
+    with caplog.at_level(logging.ERROR, logger="bot.handlers"):
+        reply = handle_error(bot, raised(KeyError("chat")))
+
+    assert reply.startswith("❌")
+    assert ERRORS.value(stage="handler", error="KeyError") == before + 1
+    record = caplog.records[-1]
+    assert record.exc_info and record.exc_info[0] is KeyError
+    assert "Traceback" in caplog.text
+
+
+def test_llm_unavailable_gets_the_overload_message(bot):
+    assert handle_error(bot, LLMUnavailableError("cota")).startswith("⏳")
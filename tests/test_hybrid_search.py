@@ -0,0 +1,30 @@
+from langchain_core.documents import Document
+
+from db.faiss_db import reciprocal_rank_fusion
+from db.sqlite_docstore import build_match_query
+
+
+def test_rrf_favors_documents_found_by_both_searches():
+    vector = ["a", "b", "c"]
+    lexical = ["c", "d"]
+
+    # Empates (mesma posição nas duas listas) mantêm a ordem da primeira
+    assert reciprocal_rank_fusion([vector, lexical]) == ["c", "a", "b", "d"]
+    assert reciprocal_rank_fusion([vector]) == vector
+
+
+def test_match_query_drops_stopwords_and_repeated_terms():
+    assert build_match_query("Qual é o horário da piscina? E o da PISCINA infantil?") == \
+        '"horário" OR "piscina" OR "infantil"'
+    assert build_match_query("o que é?") == ""
+
+
+def test_hybrid_search_finds_exact_terms_missed_by_vectors(make_manager):
+    manager = make_manager(hybrid_search=True)
+    manager.create_or_load_index()
+    manager.add_documents([Document(page_content="Regras de pouso no heliponto da cobertura")]).result()
+
+    results = manager.similarity_search("Posso usar o heliponto?", k=4)
+
+    assert "heliponto" in results[0].page_content
+    assert len(results) == 4
@@ -0,0 +1,65 @@
+import os
+import shutil
+
+from db.index_manifest import FileEntry, IndexManifest
+
+
+def pdf_files(pdf_dir):
+    return sorted(pdf_dir.glob("*.pdf"))
+
+
+def test_diff_detects_added_changed_and_removed_files(pdf_dir, corpus_dir):
+    first, second, third = pdf_files(pdf_dir)
+    manifest = IndexManifest()
+    for path in (first, second):
+        manifest.set_file(path, ids=[path.stem])
+    manifest.files["/antigo/removido.pdf"] = FileEntry("x", 0, 0, ["r"])
+
+    shutil.copy(sorted(corpus_dir.glob("*.pdf"))[-1], second)
+    diff = manifest.diff([first, second, third])
+
+    assert diff.added == [third] and diff.changed == [second]
+    assert diff.removed == ["/antigo/removido.pdf"]
+    assert set(diff.hashes) == {str(second), str(third)}
+
+
+def test_touched_file_is_not_a_change(pdf_dir):
+    path = pdf_files(pdf_dir)[0]
+    manifest = IndexManifest()
+    manifest.set_file(path, ids=["a"])
+    os.utime(path, (1, 1))
+
+    assert not manifest.diff([path]).has_changes
+    assert manifest.files[str(path)].mtime == 1
+
+
+def test_manifest_round_trip(tmp_path, pdf_dir):
+    path = pdf_files(pdf_dir)[0]
+    manifest = IndexManifest(index_type="ivf", loose_ids=["avulso"])
+    manifest.set_file(path, ids=["a", "b"])
+    manifest.save(tmp_path / "indice")
+
+    loaded = IndexManifest.load(tmp_path / "indice")
+    assert loaded.files == manifest.files
+    assert loaded.index_type == "ivf" and loaded.loose_ids == ["avulso"]
+    assert IndexManifest.load(tmp_path / "ausente") is None
+
+
+def test_incremental_update_reindexes_only_affected_files(make_manager, pdf_dir, corpus_dir):
+    manager = make_manager(save_delay=0)
+    manager.create_or_load_index()
+    first, second, third = pdf_files(pdf_dir)
+    untouched_ids = manager.manifest.files[str(third)].ids
+    old_ids = manager.manifest.files[str(second)].ids + manager.manifest.files[str(first)].ids
+
+    first.unlink()
+    shutil.copy(sorted(corpus_dir.glob("*.pdf"))[-1], second)
+    diff = manager.request_update().result()
+
+    assert diff.changed == [second] and diff.removed == [str(first)] and not diff.added
+    indexed = set(manager.db.index_to_docstore_id.values())
+    assert not indexed & set(old_ids)
+    assert set(untouched_ids) <= indexed
+    assert set(manager.manifest.files) == {str(second), str(third)}
+    assert indexed == {doc_id for entry in manager.manifest.files.values() for doc_id in entry.ids}
+    assert not manager.request_update().result().has_changes
@@ -0,0 +1,107 @@
+import shutil
+
+from langchain_core.documents import Document
+
+from db.index_manifest import IndexManifest
+
+
+def indexed_ids(manager):
+    return set(manager.db.index_to_docstore_id.values())
+
+
+def docstore_ids(manager):
+    return {doc.id for doc in manager.db.docstore.iter_documents()}
+
+
+def crash(manager):
+    """Simula o fim do processo antes da gravação agendada."""
+    manager._save_timer.cancel()
+    manager._dirty = False
+    manager._close_store()
+
+
+def add_pdf(pdf_dir, corpus_dir, name="novo.pdf"):
+    source = sorted(corpus_dir.glob("*.pdf"))[-1]
+    shutil.copy(source, pdf_dir / name)
+    return pdf_dir / name
+
+
+def test_incremental_changes_are_saved_together(make_manager, pdf_dir, corpus_dir):
+    manager = make_manager(save_delay=3600)
+    manager.create_or_load_index()
+    first = sorted(pdf_dir.glob("*.pdf"))[0]
+    removed_ids = manager.manifest.files[str(first)].ids
+
+    first.unlink()
+    add_pdf(pdf_dir, corpus_dir)
+    diff = manager.request_update().result()
+
+    assert [path.name for path in diff.added] == ["novo.pdf"] and diff.removed == [str(first)]
+    assert manager._dirty
+    assert not indexed_ids(manager) & set(removed_ids)
+    # Até a gravação, o índice salvo e os chunks removidos continuam em disco
+    assert str(first) in IndexManifest.load(manager.index_path).files
+    assert set(removed_ids) <= docstore_ids(manager)
+
+    manager._save_pending()
+    assert not manager._dirty
+    assert "novo.pdf" in {path.rsplit("/", 1)[-1] for path in IndexManifest.load(manager.index_path).files}
+    assert docstore_ids(manager) == indexed_ids(manager)
+
+
+def test_unsaved_changes_are_saved_on_close(make_manager, pdf_dir, corpus_dir):
+    manager = make_manager(save_delay=3600)
+    manager.create_or_load_index()
+    add_pdf(pdf_dir, corpus_dir)
+    manager.request_update().result()
+    manager.close()
+
+    reloaded = make_manager()
+    reloaded.create_or_load_index()
+    assert str(pdf_dir / "novo.pdf") in reloaded.manifest.files
+    assert not reloaded.update_index().has_changes
+
+
+def test_lexical_search_ignores_chunks_outside_the_index(make_manager):
+    manager = make_manager(hybrid_search=True)
+    manager.create_or_load_index()
+    manager.db.docstore.add({"orfao": Document(page_content="Regras do heliponto xyzzy")})
+
+    results = manager.similarity_search("heliponto xyzzy")
+
+    assert "orfao" in manager.db.docstore.lexical_search("heliponto xyzzy", 5)
+    assert "orfao" not in {doc.id for doc in results}
+
+
+def test_chunks_of_an_unsaved_update_are_purged_on_load(make_manager, pdf_dir, corpus_dir):
+    manager = make_manager(save_delay=3600, hybrid_search=True)
+    manager.create_or_load_index()
+    add_pdf(pdf_dir, corpus_dir)
+    manager.request_update().result()
+    manager.add_documents([Document(page_content="Aviso avulso sobre o heliponto xyzzy")]).result()
+    crash(manager)
+
+    restarted = make_manager(hybrid_search=True)
+    restarted.create_or_load_index()
+    assert docstore_ids(restarted) == indexed_ids(restarted)
+
+    # O PDF volta a ser indexado, sem duplicar os chunks da tentativa anterior
+    diff = restarted.request_update().result()
+    assert [path.name for path in diff.added] == ["novo.pdf"]
+    assert docstore_ids(restarted) == indexed_ids(restarted)
+    novo = [doc for doc in restarted.similarity_search("heliponto xyzzy artigo", k=10)
+            if doc.metadata.get("source") == "novo.pdf"]
+    assert {doc.id for doc in novo} <= indexed_ids(restarted)
+    assert not restarted.db.docstore.lexical_search("heliponto xyzzy", 5)
+
+
+def test_loose_documents_survive_full_rebuild(make_manager):
+    manager = make_manager(save_delay=0)
+    manager.create_or_load_index()
+    manager.add_documents([Document(page_content="Aviso avulso sobre a piscina")]).result()
+
+    manager.request_update(full=True).result()
+
+    contents = [doc.page_content for doc in manager.db.docstore.iter_documents()]
+    assert "Aviso avulso sobre a piscina" in contents
+    assert len(manager.manifest.loose_ids) == 1
@@ -0,0 +1,63 @@
+import time
+
+from langchain_core.documents import Document
+
+
+def version_dirs(manager):
+    return sorted(path.name for path in manager._versions_path.iterdir())
+
+
+def test_rebuild_swaps_the_symlink_and_keeps_the_previous_version_until_the_next_swap(make_manager):
+    manager = make_manager()
+    old_db = manager.create_or_load_index()
+    first = manager.index_path.resolve()
+    assert manager.index_path.is_symlink() and first.parent == manager._versions_path
+
+    manager.request_update(full=True).result()
+    second = manager.index_path.resolve()
+
+    assert second != first and manager.db is not old_db
+    # Uma busca que começou antes da troca ainda consegue ler a versão anterior
+    assert first.exists()
+    embedding = manager.embeddings.embed_query("piscina")
+    assert old_db.similarity_search_by_vector(embedding, k=2)
+
+    manager.request_update(full=True).result()
+    assert not first.exists() and second.exists()
+    assert len(version_dirs(manager)) == 2
+
+
+def test_leftovers_of_interrupted_builds_are_removed(make_manager):
+    manager = make_manager()
+    manager.create_or_load_index()
+    (manager._versions_path / "20000101000000-interrompida").mkdir()
+    stale_link = manager.index_path.with_name(f".{manager.index_path.name}-abc.tmp")
+    stale_link.symlink_to(manager._versions_path)
+
+    manager.request_update(full=True).result()
+
+    assert "20000101000000-interrompida" not in version_dirs(manager)
+    assert not stale_link.is_symlink()
+
+
+def test_requests_made_while_an_update_runs_are_coalesced(make_manager):
+    manager = make_manager(save_delay=0)
+    manager.create_or_load_index()
+    version = manager.index_path.resolve()
+
+    with manager._lock:
+        running = manager.request_update()
+        while manager._scheduled is not None:
+            time.sleep(0.001)
+        second = manager.request_update()
+        third = manager.add_documents([Document(page_content="Aviso avulso sobre a garagem")])
+        fourth = manager.request_update(full=True)
+
+    assert second is third is fourth and second is not running
+    running.result()
+    diff = fourth.result()
+
+    # Uma única recriação completa, que também recebeu o documento avulso
+    assert len(diff.added) == 3
+    assert manager.index_path.resolve() != version
+    assert len(manager.manifest.loose_ids) == 1
@@ -0,0 +1,24 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from db.pdf_processor import PDFProcessor
+
+
+def test_parallel_extraction_matches_serial(pdf_dir):
+    pdf_files = sorted(pdf_dir.glob("*.pdf"))
+    serial = list(PDFProcessor(pdf_dir, workers=1, cache_dir=None).iter_chunks(pdf_files))
+    parallel = list(PDFProcessor(pdf_dir, workers=2, cache_dir=None).iter_chunks(pdf_files))
+
+    assert [(doc.page_content, doc.metadata) for doc in parallel] == \
+        [(doc.page_content, doc.metadata) for doc in serial]
+
+
+def test_entry_points_stay_light_for_spawned_workers():
+    # Os processos do pool reimportam o módulo principal do programa
+    code = (
+        "import sys, main, db.initialize_db\n"
+        "heavy = [m for m in ('langchain_core', 'fitz', 'bot.handlers', 'db.faiss_db') if m in sys.modules]\n"
+        "assert not heavy, heavy\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=Path(__file__).parents[1] / "src")
@@ -0,0 +1,93 @@
+from db import pdf_processor
+from db.legal_chunker import LegalChunker
+from db.pdf_processor import PDFProcessor
+
+
+def article(number: int, body: str) -> str:
+    return f"Art. {number}º {body}\n"
+
+
+def test_small_articles_are_grouped_with_their_chapter():
+    pages = [
+        "CAPÍTULO I\nDAS DISPOSIÇÕES GERAIS\n" + article(1, "O condomínio se rege por esta convenção.")
+        + article(2, "Os condôminos devem respeitar o regimento."),
+    ]
+    chunks = LegalChunker(chunk_size=500, chunk_overlap=0).split_pages(pages, {"source": "convencao.pdf"})
+
+    assert len(chunks) == 1
+    assert chunks[0].page_content.startswith("CAPÍTULO I")
+    assert chunks[0].metadata["articles"] == ["Art. 1", "Art. 2"]
+    assert chunks[0].metadata["source"] == "convencao.pdf"
+
+
+def test_articles_are_not_split_across_chunks():
+    text = "".join(article(number, "Texto do artigo. " * 8) for number in range(1, 6))
+    chunks = LegalChunker(chunk_size=300, chunk_overlap=0).split_pages([text])
+
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert chunk.page_content.startswith("Art.")
+        assert len(chunk.page_content) <= 300
+    labels = [label for chunk in chunks for label in chunk.metadata["articles"]]
+    assert labels == [f"Art. {number}" for number in range(1, 6)]
+
+
+def test_large_article_is_split_into_paragraphs_keeping_lists():
+    incisos = "".join(f"{numeral} - item {numeral} da lista;\n" for numeral in ("I", "II", "III"))
+    text = (
+        article(10, "É proibido:\n" + incisos)
+        + "§ 1º " + "Primeiro parágrafo do artigo. " * 6 + "\n"
+        + "§ 2º " + "Segundo parágrafo do artigo. " * 6 + "\n"
+    )
+    chunks = LegalChunker(chunk_size=220, chunk_overlap=0).split_pages([text])
+
+    assert len(chunks) >= 2
+    assert all(len(chunk.page_content) <= 220 for chunk in chunks)
+    # A lista de incisos cabe inteira e fica no mesmo chunk
+    assert any(all(f"{numeral} - item" in chunk.page_content for numeral in ("I", "II", "III")) for chunk in chunks)
+    assert all(chunk.metadata["articles"] == ["Art. 10"] for chunk in chunks)
+
+
+def test_chunks_are_exact_slices_with_pages():
+    pages = [article(1, "Primeira página."), article(2, "Segunda página.")]
+    text = "".join(pages)
+    chunks = LegalChunker(chunk_size=30, chunk_overlap=0).split_pages(pages)
+
+    for chunk in chunks:
+        start = chunk.metadata["start_index"]
+        assert text[start:start + len(chunk.page_content)] == chunk.page_content
+    assert [(chunk.metadata["page"], chunk.metadata["page_end"]) for chunk in chunks] == [(1, 1), (2, 2)]
+
+
+def test_unstructured_text_is_split_by_size():
+    text = "palavra " * 200
+    chunks = LegalChunker(chunk_size=100, chunk_overlap=0).split_pages([text])
+
+    assert len(chunks) > 1
+    assert all(len(chunk.page_content) <= 100 for chunk in chunks)
+    assert all("articles" not in chunk.metadata for chunk in chunks)
+
+
+def test_extracted_pages_are_cached_by_file_hash(tmp_path, pdf_dir, monkeypatch):
+    pdf_path = sorted(pdf_dir.glob("*.pdf"))[0]
+    processor = PDFProcessor(pdf_dir, workers=1, cache_dir=tmp_path / "page_cache")
+    pages = processor.extract_pages_from_pdf(pdf_path)
+
+    def fail(*args):
+        raise AssertionError("PDF aberto de novo")
+
+    # Um arquivo renomeado tem o mesmo hash e também vem do cache
+    renamed = pdf_path.rename(pdf_dir / "renomeado.pdf")
+    monkeypatch.setattr(pdf_processor, "extract_pages", fail)
+    monkeypatch.setattr(pdf_processor, "page_count", fail)
+    assert processor.extract_pages_from_pdf(renamed) == pages
+    assert len(pages) == 2
+
+
+def test_chunks_of_a_pdf_record_pages_and_articles(pdf_dir):
+    pdf_path = sorted(pdf_dir.glob("*.pdf"))[0]
+    chunks = list(PDFProcessor(pdf_dir, workers=1, cache_dir=None).iter_chunks([pdf_path]))
+
+    assert {chunk.metadata["page"] for chunk in chunks} == {1, 2}
+    assert all(chunk.metadata["source"] == pdf_path.name for chunk in chunks)
+    assert chunks[0].metadata["articles"][0] == "Art. 1"
@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+from langchain_core.documents import Document
+
+from bot.pipeline import PipelineBusyError, QuestionPipeline
+from bot.rate_limit import ChatRateLimiter
+
+
+class FakeTenants:
+    def search(self, chat_id, query):
+        return [Document(page_content=query)], [0.0]
+
+
+class FakeUtils:
+    """Responde depois do atraso indicado na própria pergunta e registra a ordem de início e fim."""
+
+    def __init__(self):
+        self.events = []
+
+    async def agenerate_response(self, query, docs, chat_id, query_embedding=None):
+        self.events.append(("início", query))
+        await asyncio.sleep(float(query.split()[-1]))
+        self.events.append(("fim", query))
+        return query
+
+
+def make_pipeline(**kwargs):
+    kwargs.setdefault("chat_limiter", ChatRateLimiter(per_minute=0))
+    return QuestionPipeline(FakeTenants(), FakeUtils(), retrieval_workers=2, **kwargs)
+
+
+def test_questions_of_a_chat_are_answered_in_order():
+    async def main():
+        pipeline = make_pipeline(max_concurrent=4)
+        answers = await asyncio.gather(
+            pipeline.answer(1, "primeira 0.05"),
+            pipeline.answer(1, "segunda 0"),
+            pipeline.answer(2, "outro chat 0"),
+        )
+        pipeline.close()
+        return pipeline, answers
+
+    pipeline, answers = asyncio.run(main())
+
+    assert answers == ["primeira 0.05", "segunda 0", "outro chat 0"]
+    events = pipeline.chatbot_utils.events
+    # A segunda pergunta do chat 1 espera a primeira; o chat 2 não espera ninguém
+    assert events.index(("fim", "primeira 0.05")) < events.index(("início", "segunda 0"))
+    assert events.index(("fim", "outro chat 0")) < events.index(("fim", "primeira 0.05"))
+    assert not pipeline._chat_locks and pipeline.pending == 0
+
+
+def test_full_queue_rejects_new_questions():
+    async def main():
+        pipeline = make_pipeline(max_concurrent=1, max_pending=1)
+        first = asyncio.create_task(pipeline.answer(1, "lenta 0.05"))
+        await asyncio.sleep(0.01)
+        with pytest.raises(PipelineBusyError):
+            await pipeline.answer(2, "rápida 0")
+        await first
+        pipeline.close()
+
+    asyncio.run(main())
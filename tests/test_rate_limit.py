@@ -0,0 +1,72 @@
+import pytest
+
+from bot import rate_limit
+from bot.rate_limit import ChatRateLimiter, LLMOverloadedError, RateLimitedError, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock)
+    return clock
+
+
+def test_burst_is_served_immediately(clock):
+    bucket = TokenBucket(rate=1, capacity=3)
+    assert [bucket.reserve() for _ in range(3)] == [0, 0, 0]
+
+
+def test_waiting_reservations_are_served_in_order(clock):
+    bucket = TokenBucket(rate=2, capacity=1)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.5)
+    assert bucket.reserve() == pytest.approx(1.0)
+
+
+def test_tokens_refill_up_to_capacity(clock):
+    bucket = TokenBucket(rate=1, capacity=2)
+    bucket.reserve()
+    bucket.reserve()
+    clock.now += 10
+    assert [bucket.reserve() for _ in range(2)] == [0, 0]
+    assert bucket.reserve() == pytest.approx(1.0)
+
+
+def test_reservation_over_max_wait_raises_and_keeps_tokens(clock):
+    bucket = TokenBucket(rate=1, capacity=1)
+    bucket.reserve()
+    with pytest.raises(RateLimitedError) as info:
+        bucket.reserve(max_wait=0.5)
+    assert info.value.retry_after == pytest.approx(1.0)
+    # A reserva recusada não consome token
+    assert bucket.reserve() == pytest.approx(1.0)
+
+
+def test_custom_error(clock):
+    bucket = TokenBucket(rate=1, capacity=1, error=LLMOverloadedError)
+    bucket.reserve()
+    with pytest.raises(LLMOverloadedError):
+        bucket.reserve(max_wait=0)
+
+
+def test_zero_rate_disables_limit(clock):
+    bucket = TokenBucket(rate=0, capacity=1)
+    assert all(bucket.reserve(max_wait=0) == 0 for _ in range(100))
+
+
+def test_chat_limiter_is_per_chat(clock):
+    limiter = ChatRateLimiter(per_minute=60, burst=1)
+    limiter.check(1)
+    limiter.check(2)
+    with pytest.raises(RateLimitedError):
+        limiter.check(1)
+    clock.now += 1
+    limiter.check(1)
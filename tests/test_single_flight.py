@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from bot.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_result():
+    calls = 0
+
+    async def call():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "resposta"
+
+    async def main():
+        flight = SingleFlight()
+        return await asyncio.gather(*(flight.do("chave", call) for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert calls == 1
+    assert [result for result, _ in results] == ["resposta"] * 5
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+
+
+def test_different_keys_do_not_share():
+    async def main():
+        flight = SingleFlight()
+
+        async def call(value):
+            await asyncio.sleep(0.01)
+            return value
+
+        return await asyncio.gather(flight.do("a", lambda: call("a")), flight.do("b", lambda: call("b")))
+
+    assert asyncio.run(main()) == [("a", False), ("b", False)]
+
+
+def test_error_is_shared_and_key_released():
+    calls = 0
+
+    async def failing():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise ValueError("falhou")
+
+    async def main():
+        flight = SingleFlight()
+        results = await asyncio.gather(*(flight.do("chave", failing) for _ in range(3)), return_exceptions=True)
+        assert flight.pending("chave") is None
+        return results
+
+    results = asyncio.run(main())
+    assert calls == 1
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_cancelled_leader_lets_waiters_run_alone():
+    calls = 0
+
+    async def call():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "resposta"
+
+    async def main():
+        flight = SingleFlight()
+        leader = asyncio.create_task(flight.do("chave", call))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(flight.do("chave", call))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await waiter
+
+    assert asyncio.run(main()) == ("resposta", False)
+    assert calls == 2
@@ -0,0 +1,117 @@
+import asyncio
+
+from langchain_core.documents import Document
+from telegram.error import RetryAfter
+
+from bench.fake_llm import FakeChatModel
+from bench.fake_telegram import FakeChat, FakeMessage, FakeTelegramAPI
+from bot.streaming import TelegramStreamWriter, split_message
+from bot.utils import ChatbotUtils
+
+
+def make_message():
+    api = FakeTelegramAPI()
+    return api, FakeMessage(api, FakeChat(1), "pergunta")
+
+
+def test_split_prefers_line_breaks_then_spaces():
+    assert split_message("a) item um\nb) item dois", limit=15) == ["a) item um", "b) item dois"]
+    assert split_message("palavra " * 3, limit=10) == ["palavra", " palavra", " palavra "]
+    assert split_message("x" * 25, limit=10) == ["x" * 10, "x" * 10, "x" * 5]
+
+
+def test_split_keeps_finished_parts_stable_as_text_grows():
+    text = "".join(f"Item {i}: regra do condomínio.\n" for i in range(40))
+    final = split_message(text, limit=100)
+    for end in range(1, len(text), 37):
+        parts = split_message(text[:end], limit=100)
+        assert parts[:-1] == final[:len(parts) - 1]
+    assert all(len(part) <= 100 for part in final)
+
+
+def test_stream_edits_the_reply_and_spills_into_new_messages():
+    api, message = make_message()
+
+    async def main():
+        writer = TelegramStreamWriter(message, edit_interval=0)
+        for word in ("linha " * 1000).split():
+            await writer.write(word + " ")
+        await writer.finish()
+        return writer
+
+    writer = asyncio.run(main())
+
+    assert "".join(reply.text for reply in message.replies).split() == writer.text.split()
+    assert len(message.replies) == 2 and api.sent_messages == 2
+    assert api.edits > 0
+
+
+def test_edits_are_throttled_but_the_final_text_is_published():
+    api, message = make_message()
+
+    async def main():
+        writer = TelegramStreamWriter(message, edit_interval=3600)
+        for word in ("um", " dois", " três"):
+            await writer.write(word)
+        assert message.replies[0].text == "um"
+        await writer.finish()
+
+    asyncio.run(main())
+
+    assert message.replies[0].text == "um dois três"
+    assert api.edits == 1
+
+
+class FloodedMessage(FakeMessage):
+    """Responde ao primeiro `edit_text` com o erro de flood control do Telegram."""
+
+    flooded = False
+
+    async def reply_text(self, text, **kwargs):
+        reply = FloodedMessage(self.api, self.chat, text)
+        self.replies.append(reply)
+        return reply
+
+    async def edit_text(self, text, **kwargs):
+        if not self.flooded:
+            self.flooded = True
+            raise RetryAfter(0)
+        return await super().edit_text(text, **kwargs)
+
+
+def test_flood_control_postpones_edits_until_the_end():
+    message = FloodedMessage(FakeTelegramAPI(), FakeChat(1), "pergunta")
+
+    async def main():
+        writer = TelegramStreamWriter(message, edit_interval=0)
+        await writer.write("um")
+        await writer.write(" dois")
+        await writer.finish()
+
+    asyncio.run(main())
+
+    reply = message.replies[0]
+    assert reply.flooded and reply.text == "um dois"
+
+
+def test_streamed_answer_is_recorded_only_when_complete():
+    utils = ChatbotUtils(llm=FakeChatModel(latency=0, token_delay=0, response_tokens=6))
+    docs = [Document(page_content="Art. 1º A piscina abre às 8h.", id="a")]
+    history_sizes = []
+
+    async def main():
+        parts = []
+        async for part in utils.astream_response("Quando abre a piscina?", docs, chat_id=1):
+            parts.append(part)
+            history_sizes.append(len(utils.conversation_manager.get_conversation_history(1)))
+        return parts
+
+    parts = asyncio.run(main())
+
+    assert len("".join(parts).split()) == 6
+    # A pergunta entra no histórico ao montar o prompt; a resposta, só no fim
+    assert set(history_sizes) == {1}
+    history = utils.conversation_manager.get_conversation_history(1)
+    assert [message.role for message in history] == ["user", "assistant"]
+    assert history[-1].content == "".join(parts)
+    assert utils.generate_response("Quando abre a piscina?", docs) == "".join(parts)
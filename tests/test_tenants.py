@@ -0,0 +1,135 @@
+from pathlib import Path
+
+import pytest
+
+from db.tenants import Tenant, TenantRouter, UnknownTenantError
+
+
+MB = 1024 * 1024
+
+
+class FakeManager:
+    """Substitui o `FAISSManager`: só registra carregamentos e descarregamentos."""
+
+    def __init__(self, size: int, dirty: bool = False):
+        self.size = size
+        self.dirty = dirty
+        self.db = None
+        self.loads = 0
+        self.update_listeners = []
+
+    @property
+    def memory_bytes(self) -> int:
+        return self.size if self.db is not None else 0
+
+    def create_or_load_index(self) -> None:
+        self.loads += 1
+        self.db = object()
+
+    def unload(self) -> bool:
+        if self.dirty:
+            return False
+        self.db = None
+        return True
+
+    def similarity_search_with_embedding(self, query):
+        return [], []
+
+    def request_update(self) -> None:
+        # Como o FAISSManager: a atualização carrega o índice e avisa ao terminar
+        self.create_or_load_index()
+        for listener in self.update_listeners:
+            listener()
+
+    def add_change_listener(self, listener) -> None:
+        pass
+
+    def add_update_listener(self, listener) -> None:
+        self.update_listeners.append(listener)
+
+    def close(self) -> None:
+        pass
+
+
+def make_router(sizes, budget, dirty=()):
+    tenants = [Tenant(name, Path(name) / "pdfs", Path(name) / "faiss_index", chat_ids=[chat_id])
+               for chat_id, name in enumerate(sizes, start=1)]
+    managers = {name: FakeManager(size * MB, dirty=name in dirty) for name, size in sizes.items()}
+    return TenantRouter(tenants, memory_budget=budget * MB, managers=managers), managers
+
+
+def test_chat_is_routed_to_its_tenant():
+    router, managers = make_router({"aurora": 10, "horizonte": 10}, budget=100)
+    router.search(2, "pergunta")
+
+    assert managers["horizonte"].loads == 1
+    assert managers["aurora"].db is None
+    with pytest.raises(UnknownTenantError):
+        router.search(99, "pergunta")
+
+
+def test_least_recently_used_shard_is_unloaded_over_budget():
+    router, managers = make_router({"a": 40, "b": 40, "c": 40}, budget=100)
+    router.search(1, "pergunta")
+    router.search(2, "pergunta")
+    router.search(1, "pergunta")
+    router.search(3, "pergunta")
+
+    assert router.loaded() == ["a", "c"]
+    assert managers["b"].db is None
+    assert managers["a"].loads == 1
+
+
+def test_unloaded_shard_is_reloaded_on_next_search():
+    router, managers = make_router({"a": 60, "b": 60}, budget=100)
+    router.search(1, "pergunta")
+    router.search(2, "pergunta")
+    router.search(1, "pergunta")
+
+    assert managers["a"].loads == 2
+    assert router.loaded() == ["a"]
+
+
+def test_shard_that_cannot_unload_is_skipped():
+    router, managers = make_router({"a": 40, "b": 40, "c": 40}, budget=100, dirty={"a"})
+    router.search(1, "pergunta")
+    router.search(2, "pergunta")
+    router.search(3, "pergunta")
+
+    assert managers["a"].db is not None
+    assert managers["b"].db is None
+    assert router.loaded() == ["a", "c"]
+
+
+def test_zero_budget_keeps_every_shard():
+    router, managers = make_router({"a": 500, "b": 500}, budget=0)
+    router.search(1, "pergunta")
+    router.search(2, "pergunta")
+
+    assert router.loaded() == ["a", "b"]
+
+
+def test_budget_is_applied_after_updates():
+    router, managers = make_router({"a": 40, "b": 40, "c": 40}, budget=100)
+    router.search(1, "pergunta")
+    for name in ("b", "c"):
+        managers[name].request_update()
+
+    # Shards carregados só por atualizações saem antes dos usados em buscas
+    assert managers["a"].db is not None
+    assert sum(manager.db is not None for manager in managers.values()) == 2
+    assert managers["b"].db is None
+
+
+def test_updates_of_real_managers_respect_the_budget(make_manager, tmp_path, pdf_dir):
+    tenants = [Tenant(name, pdf_dir, tmp_path / name / "faiss_index", chat_ids=[chat_id])
+               for chat_id, name in enumerate(("a", "b"), start=1)]
+    managers = {tenant.name: make_manager(index_path=tenant.index_path) for tenant in tenants}
+    router = TenantRouter(tenants, memory_budget=1, managers=managers)
+
+    for manager in managers.values():
+        manager.request_update().result()
+    assert all(manager.db is None for manager in managers.values())
+
+    router.search(1, "assembleia")
+    assert managers["a"].db is not None and managers["b"].db is None
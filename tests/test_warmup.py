@@ -0,0 +1,94 @@
+import urllib.error
+import urllib.request
+
+import pytest
+
+import metrics
+from db.warmup import RetrievalWarmup
+
+
+class FakeManager:
+    def __init__(self, error=None):
+        self.error = error
+        self.loads = 0
+        self.embeddings = object()
+
+    def create_or_load_index(self):
+        self.loads += 1
+        if self.error is not None:
+            raise self.error
+
+
+class FakeTenants:
+    is_multi_tenant = False
+
+    def __init__(self, manager):
+        self.manager = manager
+
+    def manager_for(self, chat_id):
+        return self.manager
+
+
+@pytest.fixture
+def health_url():
+    metrics.set_serving(False)
+    metrics.set_ready(False)
+    server = metrics.start_metrics_server("127.0.0.1", 0)
+    yield f"http://127.0.0.1:{server.server_address[1]}/health"
+    server.shutdown()
+    metrics.set_serving(False)
+    metrics.set_ready(False)
+
+
+def health_status(url):
+    try:
+        with urllib.request.urlopen(url) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def test_health_waits_for_warmup(health_url):
+    warmup = RetrievalWarmup(FakeTenants(FakeManager()))
+    metrics.set_serving(True)
+    assert health_status(health_url) == 503
+
+    warmup.run()
+    assert warmup.ready
+    assert health_status(health_url) == 200
+
+    metrics.set_serving(False)
+    assert health_status(health_url) == 503
+
+
+def test_failed_warmup_stays_unhealthy(health_url):
+    warmup = RetrievalWarmup(FakeTenants(FakeManager(RuntimeError("índice corrompido"))))
+    metrics.set_serving(True)
+    warmup.run()
+
+    assert warmup.failed and not warmup.ready
+    assert health_status(health_url) == 503
+
+
+def test_preload_runs_before_index_and_callbacks_after():
+    calls = []
+    manager = FakeManager()
+    warmup = RetrievalWarmup(
+        FakeTenants(manager), on_ready=[lambda: calls.append(("ready", manager.loads))],
+        preload=[lambda: calls.append(("preload", manager.loads))],
+    )
+    warmup.run()
+    metrics.set_ready(False)
+
+    assert calls == [("preload", 0), ("ready", 1)]
+
+
+def test_phases_are_timed_separately():
+    phases = []
+    warmup = RetrievalWarmup(
+        FakeTenants(FakeManager()), preload=[lambda: None], on_phase=lambda name, elapsed: phases.append(name),
+    )
+    warmup.run()
+    metrics.set_ready(False)
+
+    assert phases == ["llm", "modelo", "indice"]